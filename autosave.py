@@ -0,0 +1,127 @@
+"""Debounced, coalesced background auto-save.
+
+Bursts of edits are merged into one write after a quiet period. The
+session is snapshotted on the Tk thread (Tk variables may only be read
+there), then serialized and written on a worker thread with an atomic
+temp-file-plus-rename. Completion is reported back on the Tk thread.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from session_io import write_session
+
+# Quiet period after the last edit before auto-saving (milliseconds)
+DEFAULT_AUTO_SAVE_DELAY_MS = 750
+# How often the Tk thread checks whether a background write finished
+POLL_INTERVAL_MS = 50
+
+
+class AutoSaveScheduler:
+    """Merges auto-save requests and writes them on a worker thread.
+
+    Args:
+        root: Tk root (or any widget) used for ``after`` scheduling.
+        snapshot: Called on the Tk thread when a save starts. Returns the
+            keyword arguments for :func:`session_io.write_session`, or
+            None if there is nothing to save.
+        on_saved: Called on the Tk thread as ``on_saved(error)`` when the
+            latest changes are on disk (error is None) or a write failed.
+        delay_ms: Quiet period before a requested save starts.
+        writer: Called with the snapshot's keyword arguments to do the
+            write (on the worker thread, or on the Tk thread when flushing).
+    """
+
+    def __init__(self, root, snapshot, on_saved,
+                 delay_ms=DEFAULT_AUTO_SAVE_DELAY_MS, writer=write_session):
+        self.root = root
+        self.snapshot = snapshot
+        self.on_saved = on_saved
+        self.delay_ms = delay_ms
+        self.writer = writer
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="autosave")
+        self._timer_id = None  # Pending quiet-period timer
+        self._future = None  # Write currently running on the worker
+        self._poll_id = None
+        self._save_again = False  # Changes arrived while a write was running
+
+    @property
+    def is_pending(self):
+        """True while changes are waiting to be written or being written"""
+        return (self._timer_id is not None or self._future is not None
+                or self._save_again)
+
+    def request(self):
+        """Ask for a save; restarts the quiet period."""
+        if self._timer_id is not None:
+            self.root.after_cancel(self._timer_id)
+        self._timer_id = self.root.after(self.delay_ms, self._on_quiet)
+
+    def flush(self):
+        """Write any pending changes now and wait for them to be on disk."""
+        has_changes = self._timer_id is not None or self._save_again
+        self._cancel_timer()
+        self._save_again = False
+        self._wait_for_write()
+        if not has_changes:
+            return
+        kwargs = self.snapshot()
+        if kwargs is None:
+            return
+        try:
+            self.writer(**kwargs)
+        except Exception as e:
+            self.on_saved(e)
+        else:
+            self.on_saved(None)
+
+    def shutdown(self):
+        """Flush pending changes and stop the worker thread."""
+        self.flush()
+        self._executor.shutdown(wait=True)
+
+    def _on_quiet(self):
+        self._timer_id = None
+        if self._future is not None:
+            # Save again once the running write finishes
+            self._save_again = True
+            return
+        self._submit()
+
+    def _submit(self):
+        kwargs = self.snapshot()
+        if kwargs is None:
+            return
+        self._future = self._executor.submit(self.writer, **kwargs)
+        self._poll_id = self.root.after(POLL_INTERVAL_MS, self._poll)
+
+    def _poll(self):
+        self._poll_id = None
+        if not self._future.done():
+            self._poll_id = self.root.after(POLL_INTERVAL_MS, self._poll)
+            return
+        self._finish_write()
+
+    def _finish_write(self):
+        error = self._future.exception()
+        self._future = None
+        if self._save_again:
+            self._save_again = False
+            self._submit()
+        # Only report success once nothing newer is waiting to be written
+        if error is not None or not self.is_pending:
+            self.on_saved(error)
+
+    def _wait_for_write(self):
+        if self._future is None:
+            return
+        if self._poll_id is not None:
+            self.root.after_cancel(self._poll_id)
+            self._poll_id = None
+        self._future.exception()  # Blocks until the write finishes
+        self._save_again = False
+        self._finish_write()
+
+    def _cancel_timer(self):
+        if self._timer_id is not None:
+            self.root.after_cancel(self._timer_id)
+            self._timer_id = None
@@ -0,0 +1,8 @@
+"""Reproducible performance benchmarks for the Unit Cost Calculator.
+
+``python -m benchmarks.generate`` writes synthetic Dry and Liquid sessions;
+``python -m benchmarks.run`` times the load, calculate, render, auto-save
+and edit paths on them and writes the timings as JSON, so runs from
+different commits can be compared. Scenarios that need a display are
+skipped when none is available.
+"""
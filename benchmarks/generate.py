@@ -0,0 +1,95 @@
+"""Synthetic session generator.
+
+Sessions are generated from a fixed seed, so the same size and unit type
+always give the same file and timings stay comparable between commits.
+Run from the repository root: ``python -m benchmarks.generate``.
+"""
+import argparse
+import os
+import random
+
+from session_io import write_session
+from units import units_to_base
+
+# Named sizes used by the benchmark runner
+SIZES = {
+    "10": 10,
+    "1k": 1_000,
+    "10k": 10_000,
+    "100k": 100_000,
+}
+UNIT_TYPES = ("Dry", "Liquid")
+DEFAULT_SEED = 20240601
+
+# Same choices as the app's store combobox
+STORES = ("Aldi", "Amazon", "Target", "Walmart", "Other", "")
+_BRANDS = ("Acme", "Golden", "Harvest", "Sunny", "Valley", "Peak", "Store Brand")
+_PRODUCTS = {
+    "Dry": ("Oats", "Rice", "Flour", "Cereal", "Coffee", "Sugar", "Pasta"),
+    "Liquid": ("Milk", "Juice", "Shampoo", "Olive Oil", "Soda", "Detergent"),
+}
+
+
+def generate_products(count, unit_type, seed=DEFAULT_SEED):
+    """Return ``count`` product dicts (PRODUCT_FIELDS strings) for a session.
+
+    About 2% of rows are deliberately invalid (bad price or missing unit)
+    so validation paths are exercised too.
+    """
+    rng = random.Random(f"{seed}-{unit_type}-{count}")
+    units = list(units_to_base(unit_type))
+    products = []
+    for i in range(count):
+        unit = rng.choice(units)
+        price = f"{rng.uniform(0.5, 40):.2f}"
+        quantity = str(rng.choice((1, 2, 6, 12, 16, 24, 32, 64)) * rng.choice((1, 1, 1.5)))
+        if rng.random() < 0.02:
+            if rng.random() < 0.5:
+                price = "n/a"
+            else:
+                unit = ""
+        products.append({
+            "name": f"{rng.choice(_BRANDS)} {rng.choice(_PRODUCTS[unit_type])} #{i + 1}",
+            "price": price,
+            "quantity": quantity,
+            "unit_type": unit_type,
+            "unit": unit,
+            "store": rng.choice(STORES),
+            "url": f"https://example.com/p/{i + 1}" if rng.random() < 0.3 else "",
+        })
+    return products
+
+
+def session_path(directory, size_name, unit_type, extension=".xml"):
+    return os.path.join(directory, f"synthetic_{unit_type.lower()}_{size_name}{extension}")
+
+
+def write_synthetic_session(path, count, unit_type, seed=DEFAULT_SEED):
+    """Write a synthetic session; the extension picks XML or binary."""
+    title = os.path.splitext(os.path.basename(path))[0]
+    write_session(path, title, unit_type, generate_products(count, unit_type, seed))
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out-dir", default="synthetic_sessions",
+                        help="Directory to write the sessions to")
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=list(SIZES))
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--binary", action="store_true",
+                        help="Also write .ucsb copies of every session")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    for size_name in args.sizes:
+        for unit_type in UNIT_TYPES:
+            extensions = (".xml", ".ucsb") if args.binary else (".xml",)
+            for extension in extensions:
+                path = session_path(args.out_dir, size_name, unit_type, extension)
+                write_synthetic_session(path, SIZES[size_name], unit_type, args.seed)
+                print(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Benchmark runner.
+
+    python -m benchmarks.run --sizes 10 1k --repeat 5 --output results.json
+
+Generates the synthetic sessions into a temp directory, times every
+scenario for each size and unit type, and writes one JSON document with
+the environment and the timings (seconds). Compare two result files to
+spot regressions between commits.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.generate import (DEFAULT_SEED, SIZES, UNIT_TYPES,
+                                 session_path, write_synthetic_session)
+from benchmarks.scenarios import (GUI_SCENARIOS, HEADLESS_SCENARIOS,
+                                  BenchContext, GuiHarness)
+from pricing_engine import HAS_NUMPY
+from session_io import open_session
+
+RESULTS_VERSION = 1
+
+
+def time_scenario(factory, ctx, repeat):
+    """Time ``repeat`` runs of a scenario; returns the durations in seconds
+
+    One untimed run comes first, so imports, caches and lazy setup don't
+    land in the first sample.
+    """
+    factory(ctx)()
+    durations = []
+    for _ in range(repeat):
+        run = factory(ctx)
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def summarize(durations):
+    return {
+        "repeat": len(durations),
+        "min_s": min(durations),
+        "median_s": statistics.median(durations),
+        "mean_s": statistics.fmean(durations),
+        "max_s": max(durations),
+    }
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+            text=True, check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": HAS_NUMPY,
+    }
+
+
+def run_benchmarks(sizes, scenarios, repeat, seed=DEFAULT_SEED, gui=True,
+                   log=sys.stderr):
+    """Run the benchmarks and return the results document (a dict)"""
+    headless = {name: f for name, f in HEADLESS_SCENARIOS.items()
+                if scenarios is None or name in scenarios}
+    gui_scenarios = {name: f for name, f in GUI_SCENARIOS.items()
+                     if scenarios is None or name in scenarios}
+    results = []
+    skipped = []
+
+    harness = None
+    if gui and gui_scenarios:
+        try:
+            harness = GuiHarness()
+        except RuntimeError as e:
+            skipped.extend({"scenario": name, "reason": str(e)} for name in gui_scenarios)
+    elif gui_scenarios:
+        skipped.extend({"scenario": name, "reason": "disabled with --no-gui"}
+                       for name in gui_scenarios)
+
+    with tempfile.TemporaryDirectory(prefix="ucc-bench-") as work_dir:
+        try:
+            for size_name in sizes:
+                for unit_type in UNIT_TYPES:
+                    path = write_synthetic_session(
+                        session_path(work_dir, size_name, unit_type), SIZES[size_name],
+                        unit_type, seed)
+                    binary_path = write_synthetic_session(
+                        session_path(work_dir, size_name, unit_type, ".ucsb"),
+                        SIZES[size_name], unit_type, seed)
+                    with open_session(path) as reader:
+                        products = list(reader)
+                    ctx = BenchContext(path, binary_path, unit_type, products,
+                                       work_dir, gui=harness)
+
+                    to_run = dict(headless)
+                    if harness is not None:
+                        to_run.update(gui_scenarios)
+                    for name, factory in to_run.items():
+                        durations = time_scenario(factory, ctx, repeat)
+                        entry = {"scenario": name, "size": size_name,
+                                 "products": SIZES[size_name], "unit_type": unit_type}
+                        entry.update(summarize(durations))
+                        results.append(entry)
+                        print(f"{name:>20} {size_name:>5} {unit_type:<6} "
+                              f"median {entry['median_s'] * 1000:10.3f} ms", file=log)
+        finally:
+            if harness is not None:
+                harness.close()
+
+    return {
+        "version": RESULTS_VERSION,
+        "environment": environment(),
+        "settings": {"sizes": list(sizes), "repeat": repeat, "seed": seed},
+        "results": results,
+        "skipped": skipped,
+    }
+
+
+def main(argv=None):
+    all_scenarios = list(HEADLESS_SCENARIOS) + list(GUI_SCENARIOS)
+    parser = argparse.ArgumentParser(description="Run the performance benchmarks.")
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=list(SIZES))
+    parser.add_argument("--scenarios", nargs="+", choices=all_scenarios, default=None,
+                        help="Only run these scenarios (default: all)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--no-gui", action="store_true",
+                        help="Skip the scenarios that need a display")
+    parser.add_argument("--output", help="Write the JSON here (default: stdout)")
+    args = parser.parse_args(argv)
+
+    document = run_benchmarks(args.sizes, args.scenarios, args.repeat,
+                              seed=args.seed, gui=not args.no_gui)
+    text = json.dumps(document, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+"""Timed benchmark scenarios.
+
+Each scenario is a factory ``factory(ctx) -> run``: the factory does any
+per-repeat setup (not timed) and returns the zero-argument callable that is
+timed. ``ctx`` is a :class:`BenchContext` for one session file.
+
+Headless scenarios exercise the same modules the app uses, without Tk.
+GUI scenarios drive a real UnitCostCalculatorApp and need a display.
+"""
+import csv
+import io
+import os
+import tempfile
+import time
+from dataclasses import dataclass, field
+
+from price_history import PriceHistory, history_key
+from price_import import PriceImport, guess_mapping
+from pricing_engine import (ProductGroups, RankedIndex, best_products,
+                            exact_price_key, price_product, price_products,
+                            product_group_key, rank_products, validate_rows)
+from results_export import write_results_file
+from row_model import ProductRow
+from session_io import build_session_tree, open_session, write_session
+from session_snapshot import SessionSnapshotCache, source_fingerprint
+
+
+@dataclass
+class BenchContext:
+    """State shared by the scenarios of one session file.
+
+    Attributes:
+        path: The session file (XML).
+        binary_path: The same session in the binary format.
+        unit_type: "Dry" or "Liquid".
+        products: The session's product dicts, as read from the file.
+        work_dir: Scratch directory for files written by scenarios.
+        gui: A GuiHarness when GUI scenarios can run, else None.
+    """
+    path: str
+    binary_path: str
+    unit_type: str
+    products: list
+    work_dir: str
+    gui: object = None
+    cache: dict = field(default_factory=dict)
+
+
+def _read_rows(path):
+    """The load path without widgets: stream the file into row records"""
+    with open_session(path) as reader:
+        return [ProductRow(row_id, row_id, **product)
+                for row_id, product in enumerate(reader)]
+
+
+def _rows(ctx):
+    """The session as the app's row records (built once per context)"""
+    if "rows" not in ctx.cache:
+        ctx.cache["rows"] = [ProductRow(i, i, **product)
+                             for i, product in enumerate(ctx.products)]
+    return ctx.cache["rows"]
+
+
+def _validated_products(rows):
+    return validate_rows(rows).products
+
+
+# --- Headless scenarios ---
+
+def load_xml(ctx):
+    return lambda: _read_rows(ctx.path)
+
+
+def load_binary(ctx):
+    return lambda: _read_rows(ctx.binary_path)
+
+
+def load_snapshot(ctx):
+    """Startup load of the XML through a valid snapshot (hash check included)"""
+    if "snapshots" not in ctx.cache:
+        snapshots = SessionSnapshotCache(ctx.work_dir)
+        with open_session(ctx.path) as reader:
+            title, unit_type = reader.title, reader.unit_type
+        snapshots.store(source_fingerprint(ctx.path), title, unit_type, ctx.products)
+        ctx.cache["snapshots"] = snapshots
+
+    def run():
+        reader, _ = ctx.cache["snapshots"].open(ctx.path)
+        if reader is None:
+            raise RuntimeError("session snapshot was not valid")
+        with reader:
+            return [ProductRow(i, i, **product) for i, product in enumerate(reader)]
+    return run
+
+
+def calculate(ctx):
+    """Validate every row and rank them, as calculate_costs does"""
+    rows = _rows(ctx)
+    return lambda: rank_products(_validated_products(rows), ctx.unit_type)
+
+
+def calculate_top_k(ctx):
+    """Validate and price every row, but only rank the best page (Top 100)"""
+    rows = _rows(ctx)
+
+    def run():
+        valid = price_products(_validated_products(rows), ctx.unit_type)
+        return best_products(valid, 100)
+    return run
+
+
+def calculate_exact(ctx):
+    """``calculate`` with the exact ranking, to compare against the float path"""
+    rows = _rows(ctx)
+    return lambda: rank_products(_validated_products(rows), ctx.unit_type, exact=True)
+
+
+def calculate_top_k_exact(ctx):
+    """``calculate_top_k`` with the exact ranking"""
+    rows = _rows(ctx)
+
+    def run():
+        valid = price_products(_validated_products(rows), ctx.unit_type)
+        return best_products(
+            valid, 100, key=lambda p: (p["price_per_base_unit"], p["row_id"]),
+            exact_key=lambda p: (exact_price_key(p, ctx.unit_type), p["row_id"]))
+    return run
+
+
+def calculate_grouped(ctx):
+    """``calculate`` plus filling the per-product groups of the grouped view"""
+    rows = _rows(ctx)
+
+    def run():
+        groups = ProductGroups()
+        groups.reset(
+            (p["row_id"], product_group_key(p["name"]), p["price_per_base_unit"])
+            for p in rank_products(_validated_products(rows), ctx.unit_type))
+        return groups
+    return run
+
+
+def import_csv(ctx):
+    """Parse and validate the session as a store CSV (the import worker's part)"""
+    path = os.path.join(ctx.work_dir, "import.csv")
+    if "import_mapping" not in ctx.cache:
+        columns = ("name", "store", "price", "quantity", "unit", "url")
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            writer.writerows([product[column] for column in columns]
+                             for product in ctx.products)
+        ctx.cache["import_mapping"] = guess_mapping(columns)
+
+    def run():
+        importer = PriceImport(path, ctx.cache["import_mapping"], ctx.unit_type)
+        return [chunk.rows for chunk in importer.iter_chunks()]
+    return run
+
+
+def export_results(ctx):
+    """Write the ranked results, with every output-unit column, as CSV"""
+    ranked = rank_products(_validated_products(_rows(ctx)), ctx.unit_type)
+    target = os.path.join(ctx.work_dir, "export.csv")
+    return lambda: write_results_file(target, ranked, ctx.unit_type)
+
+
+def _new_history(path):
+    """A PriceHistory on a fresh file"""
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    return PriceHistory(path)
+
+
+def history_record(ctx):
+    """First save of the session into an empty price history"""
+    history = _new_history(os.path.join(ctx.work_dir, "history_record.sqlite3"))
+    return lambda: history.record(ctx.unit_type, ctx.products)
+
+
+def history_lookup(ctx):
+    """90-day low and trend of a Top 100 page, over 10 saves of the session"""
+    if "history" not in ctx.cache:
+        history = _new_history(os.path.join(ctx.work_dir, "history_lookup.sqlite3"))
+        now = time.time()
+        for days_ago in range(90, 0, -9):
+            history.record(ctx.unit_type, ctx.products, now - days_ago * 24 * 60 * 60)
+        ctx.cache["history"] = history
+    history = ctx.cache["history"]
+    keys = [history_key(ctx.unit_type, product["name"], product["store"])
+            for product in ctx.products[:100]]
+    return lambda: history.lookup(keys)
+
+
+def autosave_serialize(ctx):
+    """Build and serialize the session XML in memory (the worker's CPU part)"""
+    def run():
+        tree = build_session_tree("bench", ctx.unit_type, ctx.products)
+        tree.write(io.BytesIO(), encoding="utf-8", xml_declaration=True)
+    return run
+
+
+def autosave_write(ctx):
+    """Full auto-save write: serialize plus atomic replace on disk"""
+    target = os.path.join(ctx.work_dir, "autosave_target.xml")
+    return lambda: write_session(target, "bench", ctx.unit_type, ctx.products)
+
+
+def edit_single_field(ctx):
+    """Re-price one edited row and move it in the ranking"""
+    if "ranking" not in ctx.cache:
+        ranked = rank_products(_validated_products(_rows(ctx)), ctx.unit_type)
+        ctx.cache["ranked"] = ranked
+        ctx.cache["ranking"] = RankedIndex()
+        ctx.cache["ranking"].reset(
+            (p["row_id"], p["price_per_base_unit"]) for p in ranked)
+        ctx.cache["edits"] = 0
+    ranked = ctx.cache["ranked"]
+    ranking = ctx.cache["ranking"]
+    ctx.cache["edits"] += 1
+    product = dict(ranked[len(ranked) // 2])
+    product["original_price"] = 0.5 + ctx.cache["edits"] % 50
+
+    def run():
+        if price_product(product, ctx.unit_type):
+            ranking.set(product["row_id"], product["price_per_base_unit"])
+    return run
+
+
+HEADLESS_SCENARIOS = {
+    "load_xml": load_xml,
+    "load_binary": load_binary,
+    "load_snapshot": load_snapshot,
+    "calculate": calculate,
+    "calculate_top_k": calculate_top_k,
+    "calculate_exact": calculate_exact,
+    "calculate_top_k_exact": calculate_top_k_exact,
+    "calculate_grouped": calculate_grouped,
+    "import_csv": import_csv,
+    "export_results": export_results,
+    "history_record": history_record,
+    "history_lookup": history_lookup,
+    "autosave_serialize": autosave_serialize,
+    "autosave_write": autosave_write,
+    "edit_single_field": edit_single_field,
+}
+
+
+# --- GUI scenarios ---
+
+class GuiHarness:
+    """One Tk root and app instance reused by all GUI scenarios.
+
+    Raises:
+        RuntimeError: If tkinter or a display is not available.
+    """
+
+    def __init__(self):
+        try:
+            import tkinter as tk
+        except ImportError as e:
+            raise RuntimeError(f"tkinter is not available: {e}")
+        try:
+            self.root = tk.Tk()
+        except tk.TclError as e:
+            raise RuntimeError(f"no display available: {e}")
+        self.root.withdraw()
+
+        from config_service import ConfigService
+        from main import UnitCostCalculatorApp
+
+        # A throwaway config keeps the user's last session and settings out
+        self._config_dir = tempfile.TemporaryDirectory(prefix="ucc-bench-config-")
+        config = ConfigService(os.path.join(self._config_dir.name, "config.json"))
+        self.app = UnitCostCalculatorApp(self.root, config=config)
+        self.loaded_path = None
+
+    def load(self, path):
+        """Run the app's session load to completion"""
+        app = self.app
+        app._start_session_load(path, is_interactive=False)
+        while app.loading_session:
+            self.root.update()
+        self.root.update_idletasks()
+        self.loaded_path = path
+
+    def ensure_loaded(self, path):
+        if self.loaded_path != path:
+            self.load(path)
+            # Edits must not trigger disk writes while being timed
+            self.app.current_filename = None
+
+    def close(self):
+        # The app's own close path: stops the stall monitor and every
+        # worker (auto-save, snapshots, price history, config) and destroys
+        # the root
+        self.app.on_close()
+        self._config_dir.cleanup()
+
+
+def gui_load(ctx):
+    def run():
+        ctx.gui.load(ctx.path)
+        ctx.gui.app.current_filename = None
+    return run
+
+
+def gui_calculate(ctx):
+    ctx.gui.ensure_loaded(ctx.path)
+    return ctx.gui.app.calculate_costs
+
+
+def gui_render(ctx):
+    """Render the full results list into an empty Treeview"""
+    ctx.gui.ensure_loaded(ctx.path)
+    app = ctx.gui.app
+    app.calculate_costs()
+    products = [app._row_results[row_id] for row_id in app._ranking]
+    app._clear_results()
+
+    def run():
+        app._display_results(products)
+        ctx.gui.root.update_idletasks()
+    return run
+
+
+def gui_edit(ctx):
+    """One price edit, through field-change handling and auto-calculate"""
+    ctx.gui.ensure_loaded(ctx.path)
+    app = ctx.gui.app
+    if not app._results_cache_valid:
+        app.calculate_costs()
+    row = app.input_rows_data[len(app.input_rows_data) // 2]
+    ctx.cache["gui_edits"] = ctx.cache.get("gui_edits", 0) + 1
+    new_price = f"{0.5 + ctx.cache['gui_edits'] % 50:.2f}"
+
+    def run():
+        row["price"] = new_price
+        app._on_row_field_change(row, "price")
+        app.auto_calculate()
+        ctx.gui.root.update_idletasks()
+    return run
+
+
+GUI_SCENARIOS = {
+    "gui_load": gui_load,
+    "gui_calculate": gui_calculate,
+    "gui_render": gui_render,
+    "gui_edit": gui_edit,
+}
@@ -0,0 +1,137 @@
+"""Cold-start budget check.
+
+    python -m benchmarks.startup --size 10k --repeat 5
+
+Launches the app in a fresh process with a throwaway home directory and
+UCC_STARTUP_REPORT set, so it writes its startup milestones and exits as
+soon as it is interactive. Milestones are measured from process launch
+(interpreter startup included) and the medians are compared with
+startup.STARTUP_BUDGET_MS. Exits with 1 if a milestone is over budget and
+2 if the app couldn't be started (it needs a display).
+
+By default the runs share one home directory after a warm-up run, so the
+last session loads from its snapshot as on a normal start; ``--cold``
+gives every run a fresh home (no snapshot, XML is parsed).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.generate import DEFAULT_SEED, SIZES, UNIT_TYPES, write_synthetic_session
+from config_service import ConfigService, default_config_path
+from startup import REPORT_ENV_VAR, STARTUP_BUDGET_MS
+
+MAIN_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           "main.py")
+
+
+class StartupError(Exception):
+    """The app didn't start or didn't write its report"""
+
+
+def make_home(directory, session_file=None):
+    """Create a home directory whose config points at ``session_file``"""
+    os.makedirs(directory, exist_ok=True)
+    if session_file is not None:
+        config_path = os.path.join(directory, os.path.basename(default_config_path()))
+        config = ConfigService(config_path)
+        config.update({"last_session_file": session_file,
+                       "recent_sessions": [session_file]})
+        config.close()
+    return directory
+
+
+def launch(home, timeout):
+    """Start the app once; returns its milestones in ms since launch"""
+    report_file = os.path.join(home, "startup_report.json")
+    if os.path.exists(report_file):
+        os.remove(report_file)
+    env = dict(os.environ, HOME=home, USERPROFILE=home)
+    env[REPORT_ENV_VAR] = report_file
+
+    launched = time.time()
+    try:
+        result = subprocess.run([sys.executable, MAIN_SCRIPT], env=env,
+                                capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        raise StartupError(f"the app did not become interactive within {timeout} s")
+    if result.returncode != 0 or not os.path.exists(report_file):
+        detail = (result.stderr.strip().splitlines() or ["no output"])[-1]
+        raise StartupError(f"the app exited with code {result.returncode}: {detail}")
+
+    with open(report_file, encoding="utf-8") as f:
+        report = json.load(f)
+    offset_ms = (report["started_at"] - launched) * 1000
+    return {name: offset_ms + elapsed_ms
+            for name, elapsed_ms in report["milestones_ms"].items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", choices=list(SIZES), default=None,
+                        help="Start with a synthetic last session of this size "
+                             "(default: no last session)")
+    parser.add_argument("--unit-type", choices=UNIT_TYPES, default=UNIT_TYPES[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--cold", action="store_true",
+                        help="Fresh home directory (no snapshot) for every run")
+    parser.add_argument("--budget-first-frame", type=float,
+                        default=STARTUP_BUDGET_MS["first_frame"], metavar="MS")
+    parser.add_argument("--budget-interactive", type=float,
+                        default=STARTUP_BUDGET_MS["interactive"], metavar="MS")
+    parser.add_argument("--timeout", type=float, default=120,
+                        help="Seconds to wait for each run")
+    parser.add_argument("--output", help="Also write the results as JSON to this file")
+    args = parser.parse_args(argv)
+    budget = {"first_frame": args.budget_first_frame,
+              "interactive": args.budget_interactive}
+
+    with tempfile.TemporaryDirectory(prefix="ucc-startup-") as work_dir:
+        session_file = None
+        if args.size is not None:
+            session_file = os.path.join(work_dir, f"startup_{args.size}.xml")
+            write_synthetic_session(session_file, SIZES[args.size],
+                                    args.unit_type, DEFAULT_SEED)
+
+        runs = []
+        try:
+            if not args.cold:
+                home = make_home(os.path.join(work_dir, "home"), session_file)
+                launch(home, args.timeout)  # Warm-up: writes the snapshot
+            for i in range(args.repeat):
+                if args.cold:
+                    home = make_home(os.path.join(work_dir, f"home{i}"), session_file)
+                runs.append(launch(home, args.timeout))
+        except StartupError as e:
+            print(f"Startup benchmark could not run: {e}", file=sys.stderr)
+            return 2
+
+    results = {}
+    over_budget = []
+    for name, limit in budget.items():
+        values = [run[name] for run in runs if name in run]
+        if not values:
+            continue
+        median = statistics.median(values)
+        results[name] = {"median_ms": median, "min_ms": min(values),
+                         "max_ms": max(values), "budget_ms": limit}
+        status = "ok" if median <= limit else "OVER BUDGET"
+        if median > limit:
+            over_budget.append(name)
+        print(f"{name:>12}: median {median:7.1f} ms  (min {min(values):.1f}, "
+              f"max {max(values):.1f})  budget {limit:.0f} ms  {status}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"settings": vars(args), "runs": runs, "results": results},
+                      f, indent=2)
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
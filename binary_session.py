@@ -0,0 +1,340 @@
+"""Compact binary session format (``.ucsb``), read through mmap.
+
+An opt-in alternative to the XML session format, chosen by file extension.
+Numeric columns are stored as fixed-width little-endian arrays, so a file
+can be memory-mapped and ranked without a parse step (the batch ranking in
+cli.py does so). Text fields live in a deduplicated, offset-indexed UTF-8
+string table.
+
+Layout (every section starts on an 8-byte boundary)::
+
+    header          HEADER struct (see below)
+    prices          float64[row_count]   NaN when the text isn't a number
+    quantities      float64[row_count]
+    unit_codes      int16[row_count]     index into the unit table, -1 if none
+    unit_table      int32[unit_count]    string index of each unit name
+    string_refs     int32[row_count * len(STRING_FIELDS)]
+    string_offsets  uint32[string_count + 1]
+    string_blob     UTF-8 bytes
+
+Conversion to and from XML is lossless: the original price and quantity
+text is kept in the string table whenever it can't be rebuilt exactly
+from the stored number.
+"""
+import mmap
+import struct
+import sys
+from array import array
+
+from lazy_imports import lazy_import
+from pricing_engine import (UNKNOWN_UNIT_CODE, compute_unit_prices, parse_number,
+                            unit_names)
+from session_io import PRODUCT_FIELDS, SessionFormatError, atomic_write
+
+np = lazy_import("numpy")  # Loaded on first use
+HAS_NUMPY = np is not None
+
+BINARY_SESSION_EXTENSION = ".ucsb"
+MAGIC = b"UCSB"
+FORMAT_VERSION = 1
+
+# magic, version, reserved, row_count, unit_count, string_count,
+# title string index, unit type string index
+HEADER = struct.Struct("<4sHHIIIii")
+
+# Per-row string references, in storage order. For "price" and "quantity"
+# a reference of NO_STRING means "rebuild the text from the number"; the
+# other fields always reference a string ("" when missing).
+STRING_FIELDS = ("name", "store", "url", "unit_type", "unit",
+                 "price", "quantity")
+NO_STRING = -1
+NO_UNIT = -1
+
+_IS_LITTLE_ENDIAN = sys.byteorder == "little"
+
+
+def write_binary_session(filename, title, unit_type, products):
+    """Write a session in the binary format, atomically replacing the file.
+
+    Takes the same arguments as :func:`session_io.write_session_xml`.
+    """
+    strings = []
+    string_index = {}
+
+    def intern(text):
+        if text is None:
+            return NO_STRING
+        index = string_index.get(text)
+        if index is None:
+            index = string_index[text] = len(strings)
+            strings.append(text)
+        return index
+
+    title_index = intern(title)
+    unit_type_index = intern(unit_type)
+    unit_table = []
+    unit_code_by_name = {}
+    prices = array("d")
+    quantities = array("d")
+    unit_codes = array("h")
+    string_refs = array("i")
+
+    for product in products:
+        numbers = {}
+        for field, column in (("price", prices), ("quantity", quantities)):
+            numbers[field] = value = parse_number(product.get(field, ""))
+            column.append(value)
+
+        unit = product.get("unit", "")
+        if unit:
+            code = unit_code_by_name.get(unit)
+            if code is None:
+                code = unit_code_by_name[unit] = len(unit_table)
+                unit_table.append(intern(unit))
+            unit_codes.append(code)
+        else:
+            unit_codes.append(NO_UNIT)
+
+        for field in STRING_FIELDS:
+            text = product.get(field)
+            if text is None:
+                text = ""  # NO_STRING would read back as a number
+            if field in numbers and _format_number(numbers[field]) == text:
+                string_refs.append(NO_STRING)  # Rebuilt from the number on load
+            else:
+                string_refs.append(intern(text))
+
+    encoded = [text.encode("utf-8") for text in strings]
+    string_offsets = array("I", [0])
+    for data in encoded:
+        string_offsets.append(string_offsets[-1] + len(data))
+
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(prices), len(unit_table),
+                         len(strings), title_index, unit_type_index)
+
+    def write(f):
+        f.write(header)
+        f.write(b"\0" * (_align(len(header)) - len(header)))
+        for column in (prices, quantities, unit_codes, array("i", unit_table),
+                       string_refs, string_offsets):
+            _write_padded(f, column)
+        for data in encoded:
+            f.write(data)
+
+    atomic_write(filename, write)
+
+
+class BinarySessionReader:
+    """Memory-mapped reader for ``.ucsb`` files.
+
+    Offers the same interface as :class:`session_io.SessionReader` (title,
+    unit_type, progress, iterating product dicts, close) plus direct,
+    zero-copy access to the numeric columns for ranking and exporting.
+
+    Raises:
+        session_io.SessionFormatError: If the file is not a binary session.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._file = open(filename, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty file
+            self._file.close()
+            raise SessionFormatError("Invalid session file format.")
+        try:
+            (magic, version, _, self._row_count, unit_count, string_count,
+             title_index, unit_type_index) = HEADER.unpack_from(self._mm, 0)
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise SessionFormatError("Invalid session file format.")
+
+            offset = _align(HEADER.size)
+            self._prices_offset, offset = offset, _align(offset + 8 * self._row_count)
+            self._quantities_offset, offset = offset, _align(offset + 8 * self._row_count)
+            self._unit_codes_offset, offset = offset, _align(offset + 2 * self._row_count)
+            self._unit_table_offset, offset = offset, _align(offset + 4 * unit_count)
+            self._string_refs_offset, offset = offset, _align(
+                offset + 4 * self._row_count * len(STRING_FIELDS))
+            self._string_offsets_offset, offset = offset, _align(offset + 4 * (string_count + 1))
+            self._blob_offset = offset
+
+            self._unit_count = unit_count
+            self._string_refs = self._column("i", self._string_refs_offset,
+                                             self._row_count * len(STRING_FIELDS))
+            self._string_offsets = self._column("I", self._string_offsets_offset,
+                                                string_count + 1)
+            if self._blob_offset + self._string_offsets[-1] > len(self._mm):
+                raise SessionFormatError("Truncated session file.")
+            self.title = self._string(title_index)
+            self.unit_type = self._string(unit_type_index)
+        except (struct.error, IndexError):
+            self.close()
+            raise SessionFormatError("Invalid session file format.")
+        except BaseException:
+            self.close()
+            raise
+        self._next_row = 0
+
+    def __len__(self):
+        return self._row_count
+
+    @property
+    def progress(self):
+        """Fraction of the products read so far (0.0 to 1.0)"""
+        if not self._row_count:
+            return 1.0
+        return self._next_row / self._row_count
+
+    @property
+    def prices(self):
+        """Price column (NaN where the text isn't a number), zero-copy"""
+        return self._numeric_column("d", self._prices_offset)
+
+    @property
+    def quantities(self):
+        """Quantity column (NaN where the text isn't a number), zero-copy"""
+        return self._numeric_column("d", self._quantities_offset)
+
+    def unit_names(self):
+        """Return the unit name for each unit code in this file"""
+        table = self._column("i", self._unit_table_offset, self._unit_count)
+        return [self._string(index) for index in table]
+
+    def unit_codes(self, unit_type):
+        """Return the unit column as pricing_engine unit codes for ``unit_type``.
+
+        Units that aren't valid for the unit type become UNKNOWN_UNIT_CODE.
+        """
+        code_by_name = {name: code for code, name in enumerate(unit_names(unit_type))}
+        remap = [code_by_name.get(name, UNKNOWN_UNIT_CODE) for name in self.unit_names()]
+        codes = self._column("h", self._unit_codes_offset, self._row_count)
+        if HAS_NUMPY:
+            # NO_UNIT (-1) indexes the trailing sentinel
+            lookup = np.asarray(remap + [UNKNOWN_UNIT_CODE], dtype=np.intp)
+            return lookup[np.asarray(codes, dtype=np.intp)]
+        return [remap[code] if code != NO_UNIT else UNKNOWN_UNIT_CODE for code in codes]
+
+    def compute_unit_prices(self, unit_type=None, exact=False):
+        """Price every row straight from the mapped columns.
+
+        Args:
+            unit_type: Defaults to the session unit type.
+            exact: Use the exact ranking (see
+                pricing_engine.compute_unit_prices).
+
+        Returns:
+            A pricing_engine.PricingResult indexed like the file's rows.
+        """
+        unit_type = unit_type or self.unit_type
+        return compute_unit_prices(self.prices, self.quantities,
+                                   self.unit_codes(unit_type), unit_type, exact)
+
+    def field_values(self, field):
+        """Yield text field ``field`` (not "price" or "quantity") of every row.
+
+        Each distinct string is decoded once, so this is much cheaper than
+        decoding whole products.
+        """
+        refs = self._string_refs[STRING_FIELDS.index(field)::len(STRING_FIELDS)]
+        decoded = {}
+        for ref in refs:
+            text = decoded.get(ref)
+            if text is None:
+                text = decoded[ref] = "" if ref == NO_STRING else self._string(ref)
+            yield text
+
+    def product(self, i):
+        """Decode the product at row ``i`` as a dict keyed by PRODUCT_FIELDS"""
+        base = i * len(STRING_FIELDS)
+        refs = self._string_refs
+        product = {}
+        for k, field in enumerate(STRING_FIELDS):
+            ref = refs[base + k]
+            if ref != NO_STRING:
+                product[field] = self._string(ref)
+            elif field == "price":
+                product[field] = _format_number(self._number(self._prices_offset, i))
+            elif field == "quantity":
+                product[field] = _format_number(self._number(self._quantities_offset, i))
+            else:
+                product[field] = ""
+        return {field: product[field] for field in PRODUCT_FIELDS}
+
+    def __iter__(self):
+        for i in range(self._next_row, self._row_count):
+            self._next_row = i + 1
+            yield self.product(i)
+
+    def close(self):
+        self._string_refs = self._string_offsets = None
+        try:
+            self._mm.close()
+        except BufferError:
+            pass  # A caller still holds a column view; the map closes with it
+        except AttributeError:
+            pass  # mmap never opened
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _string(self, index):
+        """Decode string ``index`` (SessionFormatError if the file is damaged)"""
+        if index == NO_STRING:
+            return None
+        if not 0 <= index < len(self._string_offsets) - 1:
+            raise SessionFormatError("Invalid session file format.")
+        start = self._blob_offset + self._string_offsets[index]
+        end = self._blob_offset + self._string_offsets[index + 1]
+        try:
+            return self._mm[start:end].decode("utf-8")
+        except UnicodeDecodeError:
+            raise SessionFormatError("Invalid session file format.") from None
+
+    def _number(self, column_offset, i):
+        return struct.unpack_from("<d", self._mm, column_offset + 8 * i)[0]
+
+    def _column(self, typecode, offset, count):
+        size = array(typecode).itemsize * count
+        if offset + size > len(self._mm):
+            raise SessionFormatError("Truncated session file.")
+        if _IS_LITTLE_ENDIAN:
+            return memoryview(self._mm)[offset:offset + size].cast(typecode)
+        column = array(typecode, self._mm[offset:offset + size])
+        column.byteswap()
+        return column
+
+    def _numeric_column(self, typecode, offset):
+        if HAS_NUMPY:
+            return np.frombuffer(self._mm, dtype="<f8", count=self._row_count,
+                                 offset=offset)
+        return self._column(typecode, offset, self._row_count)
+
+
+def is_binary_session_file(filename):
+    """True if ``filename`` should be read/written in the binary format"""
+    return filename.lower().endswith(BINARY_SESSION_EXTENSION)
+
+
+def _format_number(value):
+    """Canonical text for a stored number ("18" for 18.0, "4.99" for 4.99)"""
+    text = repr(value)
+    return text[:-2] if text.endswith(".0") else text
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+def _write_padded(f, column):
+    if not _IS_LITTLE_ENDIAN:
+        column = array(column.typecode, column)
+        column.byteswap()
+    data = column.tobytes()
+    f.write(data)
+    f.write(b"\0" * (_align(len(data)) - len(data)))
+
@@ -0,0 +1,272 @@
+"""Headless batch ranking: ``python main.py rank sessions/*.xml --top 5``.
+
+Never imports tkinter, so it runs on machines without a display. Session
+files are spread across a process pool and each file's ranking is written
+as soon as it (and every file before it) is done, so output streams in
+command-line order. Rows are validated and ranked exactly as the GUI's
+calculate_costs does it (pricing_engine.validate_rows and rank_products).
+Binary (.ucsb) sessions are priced straight from their mapped columns, and
+only the rows that are output or can't be priced are decoded.
+"""
+import argparse
+import contextlib
+import csv
+import glob
+import json
+import logging
+import os
+import sys
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+
+from binary_session import BinarySessionReader
+from pricing_engine import (best_products, exact_price_key, price_products,
+                            rank_products, validate_row, validate_rows)
+from session_io import SessionFormatError, open_session
+from units import base_unit, set_custom_units, unit_table
+
+logger = logging.getLogger(__name__)
+
+# Columns written for every ranked product
+OUTPUT_FIELDS = ("session", "rank", "name", "store", "price", "quantity",
+                 "unit", "unit_type", "price_per_base_unit", "base_unit", "url")
+OUTPUT_FORMATS = ("text", "csv", "jsonl")
+
+
+def rank_session_file(filename, top=None, custom_units=None, exact=False):
+    """Rank the products of one session file.
+
+    Runs in a worker process, so it only takes and returns picklable data.
+
+    Args:
+        filename: XML or binary (.ucsb) session file.
+        top: Keep only the best ``top`` products (all when None).
+        custom_units: The config's "custom_units" entries, so sessions that
+            use them rank the same as in the GUI.
+        exact: Order near-ties by exact fixed-point values (see
+            exact_pricing).
+
+    Returns:
+        (records, warnings, error): the ranked output records (dicts keyed
+        by OUTPUT_FIELDS), per-row warning messages, and an error message
+        if the file couldn't be ranked at all (None otherwise).
+    """
+    set_custom_units(custom_units)
+    try:
+        with open_session(filename) as reader:
+            title = reader.title or os.path.splitext(os.path.basename(filename))[0]
+            unit_type = reader.unit_type
+            if not unit_type:
+                return [], [], "Session has no unit type."
+            if isinstance(reader, BinarySessionReader):
+                ranked, errors = _rank_columns(reader, unit_type, top, exact)
+            else:
+                ranked, errors = _rank_rows(list(reader), unit_type, top, exact)
+    except (ET.ParseError, SessionFormatError, OSError) as e:
+        return [], [], str(e)
+    warnings = [error.message.replace("\n", " ") for error in errors]
+
+    unit = base_unit(unit_type)
+    records = [{
+        "session": title,
+        "rank": rank,
+        "name": product["name"],
+        "store": product["store"],
+        "price": product["original_price"],
+        "quantity": product["original_quantity"],
+        "unit": product["original_unit"],
+        "unit_type": unit_type,
+        "price_per_base_unit": product["price_per_base_unit"],
+        "base_unit": unit,
+        "url": product["url"],
+    } for rank, product in enumerate(ranked, start=1)]
+    return records, warnings, None
+
+
+def _rank_rows(rows, unit_type, top, exact):
+    """Validate and rank product dicts; returns (ranked, row errors)"""
+    validation = validate_rows(rows)
+    products = validation.products
+    if top is None:
+        ranked = rank_products(products, unit_type, exact=exact)
+    else:
+        # Bounded heap: only the best `top` products are ever ordered
+        ranked = best_products(
+            price_products(products, unit_type), top,
+            exact_key=(lambda p: (exact_price_key(p, unit_type), p["row_id"]))
+            if exact else None)
+    return ranked, validation.errors
+
+
+def _rank_columns(reader, unit_type, top, exact):
+    """Rank a binary session from its numeric columns.
+
+    Gives the same result as :func:`_rank_rows` on the decoded rows: rows
+    are taken best first from the columns' order and decoded, and any that
+    fail validation are skipped. Other rows are only decoded for their
+    error messages: the ones the columns can't price, and the ones whose
+    unit doesn't belong to their own unit type (the only check the columns,
+    priced with the session unit type, leave out).
+
+    Returns:
+        (ranked, row errors), like :func:`_rank_rows`.
+    """
+    result = reader.compute_unit_prices(unit_type, exact=exact)
+    ranked = []
+    errors = []
+    validated = set()
+    for i in result.order:
+        if top is not None and len(ranked) == top:
+            break
+        i = int(i)
+        validated.add(i)
+        product, error = validate_row(reader.product(i), i)
+        if product is None:
+            errors.append(error)
+            continue
+        product["price_per_base_unit"] = float(result.price_per_base_unit[i])
+        ranked.append(product)
+
+    unit_fits = {}
+    rows = zip(result.is_valid, reader.field_values("unit_type"),
+               reader.field_values("unit"))
+    for i, (is_valid, row_unit_type, unit) in enumerate(rows):
+        if i in validated:
+            continue
+        if is_valid:
+            fits = unit_fits.get((row_unit_type, unit))
+            if fits is None:
+                fits = unit_fits[row_unit_type, unit] = (
+                    unit in unit_table(row_unit_type).codes)
+            if fits:
+                continue
+        errors.append(validate_row(reader.product(i), i)[1])
+    errors = sorted((error for error in errors if error is not None),
+                    key=lambda error: error.index)
+    return ranked, errors
+
+
+def load_custom_units():
+    """The "custom_units" entry of the GUI's config file (never written)"""
+    # Imported here: without PyYAML the module prints a notice, which must
+    # not end up in the ranking output
+    with contextlib.redirect_stdout(sys.stderr):
+        from config_service import ConfigService
+    return ConfigService(read_only=True).get("custom_units") or []
+
+
+def expand_paths(patterns):
+    """Expand glob patterns the shell left alone (e.g. on Windows)"""
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else []
+        paths.extend(matches or [pattern])
+    return paths
+
+
+class _Writer:
+    """Writes output records in one of OUTPUT_FORMATS"""
+
+    def __init__(self, stream, output_format):
+        self.stream = stream
+        self.output_format = output_format
+        self._csv = None
+        if output_format == "csv":
+            self._csv = csv.DictWriter(stream, fieldnames=OUTPUT_FIELDS,
+                                       lineterminator="\n")
+            self._csv.writeheader()
+
+    def write_file(self, filename, records):
+        if self.output_format == "csv":
+            self._csv.writerows(records)
+        elif self.output_format == "jsonl":
+            for record in records:
+                self.stream.write(json.dumps(record) + "\n")
+        else:
+            self.stream.write(f"== {filename}\n")
+            for record in records:
+                self.stream.write(
+                    f"{record['rank']:>4}. {record['name']}"
+                    f"{' (' + record['store'] + ')' if record['store'] else ''}"
+                    f"  ${record['price']:.2f} / {record['quantity']:g} {record['unit']}"
+                    f"  ${record['price_per_base_unit']:.5f} per {record['base_unit']}\n")
+        self.stream.flush()
+
+
+def _positive_int(text):
+    """argparse type for counts that must be at least 1"""
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{text}'") from None
+    if value < 1:
+        raise argparse.ArgumentTypeError("must be at least 1")
+    return value
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="main.py rank",
+        description="Rank the products of session files, best value first.")
+    parser.add_argument("files", nargs="+", help="Session files (.xml or .ucsb)")
+    parser.add_argument("--top", type=int, default=None,
+                        help="Only output the best N products of each file")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="text",
+                        dest="output_format", help="Output format (default: text)")
+    parser.add_argument("--jobs", type=_positive_int, default=None,
+                        help="Worker processes (default: one per CPU)")
+    parser.add_argument("--exact", action="store_true",
+                        help="Order near-ties by exact fixed-point prices "
+                             "(slower, never depends on float rounding)")
+    return parser
+
+
+def main(argv=None):
+    """Entry point for ``main.py rank``; returns the process exit code.
+
+    Args:
+        argv: Arguments starting with "rank" (defaults to sys.argv[1:]).
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "rank":
+        argv = argv[1:]
+    args = build_parser().parse_args(argv)
+    if args.top is not None and args.top < 1:
+        build_parser().error("--top must be at least 1")
+    logging.basicConfig(format="rank: %(message)s", level=logging.WARNING)
+
+    files = expand_paths(args.files)
+    writer = _Writer(sys.stdout, args.output_format)
+    jobs = args.jobs or os.cpu_count() or 1
+    failed = False
+
+    def report(filename, result):
+        nonlocal failed
+        records, warnings, error = result
+        for warning in warnings:
+            logger.warning("%s: %s", filename, warning)
+        if error is not None:
+            logger.error("%s: %s", filename, error)
+            failed = True
+            return
+        writer.write_file(filename, records)
+
+    custom_units = load_custom_units()
+    tops = [args.top] * len(files)
+    if jobs == 1 or len(files) == 1:
+        for filename in files:
+            report(filename, rank_session_file(
+                filename, args.top, custom_units, args.exact))
+    else:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(files))) as executor:
+            # map() yields in input order as results arrive, so output streams
+            for filename, result in zip(
+                    files, executor.map(rank_session_file, files, tops,
+                                        [custom_units] * len(files),
+                                        [args.exact] * len(files))):
+                report(filename, result)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
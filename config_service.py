@@ -0,0 +1,211 @@
+"""In-memory application config with write-behind persistence.
+
+The config file is read once; every later read is served from memory.
+Changes are merged and written on a background thread after a short
+delay (atomically, through session_io.atomic_write), so recording a recent
+session or a preference never blocks the UI. Call :meth:`ConfigService.flush`
+or :meth:`ConfigService.close` on exit to write anything still pending.
+"""
+import copy
+import json
+import logging
+import os
+import threading
+
+import perf
+from lazy_imports import lazy_import
+from session_io import atomic_write
+
+# Use yaml if it is installed (loaded on first use), fallback to json if not
+yaml = lazy_import("yaml")
+HAS_YAML = yaml is not None
+if not HAS_YAML:
+    print("PyYAML not found, falling back to JSON for config file")
+
+logger = logging.getLogger(__name__)
+
+CONFIG_VERSION = "1.0"
+DEFAULT_CONFIG = {
+    "last_session_file": None,
+    "recent_sessions": [],
+    # Files open as workspace tabs, reopened (lazily) on the next start
+    "open_sessions": [],
+    # User-defined units, see units.UnitRegistry
+    "custom_units": [],
+    # Order near-tied results exactly (see exact_pricing)
+    "exact_ranking": False,
+    "group_by_product": False,
+    # Window of the price history low and trend shown next to results
+    "price_history_days": 90,
+    "version": CONFIG_VERSION,
+}
+# Entries kept in the recent sessions list
+MAX_RECENT_SESSIONS = 10
+# Changes arriving within this window are written together (seconds)
+DEFAULT_WRITE_DELAY = 0.5
+
+
+def default_config_path():
+    """Config file in the home directory (YAML if PyYAML is installed)"""
+    return os.path.join(
+        os.path.expanduser("~"),
+        ".unit_cost_calculator_config.yaml" if HAS_YAML else ".unit_cost_calculator_config.json"
+    )
+
+
+class ConfigService:
+    """Cached config dict with batched, asynchronous writes.
+
+    Args:
+        path: Config file; the format follows its extension (.yaml/.yml or
+            JSON otherwise).
+        write_delay: Seconds to wait for more changes before writing.
+        read_only: Never write the file, not even the default config when
+            there is none (for headless tools); changes stay in memory.
+    """
+
+    def __init__(self, path=None, write_delay=DEFAULT_WRITE_DELAY, read_only=False):
+        self.path = path or default_config_path()
+        self.write_delay = write_delay
+        self.read_only = read_only
+        self._data = None  # Loaded lazily, once
+        self._lock = threading.RLock()  # Guards _data, _dirty and _timer
+        self._write_lock = threading.Lock()  # Keeps writes in order
+        self._dirty = False
+        self._timer = None
+
+    # --- Reads (from memory) ---
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._loaded().get(key, default)
+            return copy.deepcopy(value) if isinstance(value, (list, dict)) else value
+
+    def as_dict(self):
+        """Return a copy of the whole config"""
+        with self._lock:
+            return copy.deepcopy(self._loaded())
+
+    @property
+    def recent_sessions(self):
+        """Recently used session files, most recent first"""
+        return self.get("recent_sessions", [])
+
+    # --- Writes (batched, in the background) ---
+
+    def set(self, key, value):
+        self.update({key: value})
+
+    def update(self, values):
+        with self._lock:
+            data = self._loaded()
+            changed = any(data.get(key) != value for key, value in values.items())
+            if not changed:
+                return
+            data.update(copy.deepcopy(values))
+            self._schedule_write()
+
+    def replace(self, config_data):
+        """Replace the whole config (keeps the defaults for missing keys)"""
+        with self._lock:
+            self._data = self._with_defaults(config_data)
+            self._schedule_write()
+
+    def add_recent_session(self, filename):
+        """Move ``filename`` to the top of the recent sessions list"""
+        filename = os.path.abspath(filename)
+        with self._lock:
+            recent = [path for path in self._loaded().get("recent_sessions") or []
+                      if os.path.normcase(path) != os.path.normcase(filename)]
+            recent.insert(0, filename)
+            self.set("recent_sessions", recent[:MAX_RECENT_SESSIONS])
+
+    def remove_recent_session(self, filename):
+        filename = os.path.abspath(filename)
+        with self._lock:
+            recent = [path for path in self._loaded().get("recent_sessions") or []
+                      if os.path.normcase(path) != os.path.normcase(filename)]
+            self.set("recent_sessions", recent)
+
+    def clear_recent_sessions(self):
+        self.set("recent_sessions", [])
+
+    def flush(self):
+        """Write pending changes now, on the calling thread"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        self._write_pending()
+
+    def close(self):
+        """Flush pending changes; call on exit"""
+        self.flush()
+
+    # --- Internals ---
+
+    def _loaded(self):
+        if self._data is None:
+            self._data = self._read()
+        return self._data
+
+    @perf.instrument("load_config")
+    def _read(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r') as f:
+                    if self._is_yaml():
+                        config_data = yaml.safe_load(f)
+                    else:
+                        config_data = json.load(f)
+                if isinstance(config_data, dict):
+                    return self._with_defaults(config_data)
+                return self._with_defaults({})
+            # Create default config file
+            data = self._with_defaults({})
+            self._schedule_write()
+            return data
+        except Exception as e:
+            logger.warning("Failed to load config: %s", e)
+            return self._with_defaults({})
+
+    @staticmethod
+    def _with_defaults(config_data):
+        data = copy.deepcopy(DEFAULT_CONFIG)
+        data.update(config_data or {})
+        if not isinstance(data.get("recent_sessions"), list):
+            data["recent_sessions"] = []
+        return data
+
+    def _is_yaml(self):
+        return HAS_YAML and self.path.endswith((".yaml", ".yml"))
+
+    def _schedule_write(self):
+        if self.read_only:
+            return
+        self._dirty = True
+        if self._timer is None:
+            self._timer = threading.Timer(self.write_delay, self._on_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _on_timer(self):
+        with self._lock:
+            self._timer = None
+        self._write_pending()
+
+    def _write_pending(self):
+        with self._write_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                snapshot = copy.deepcopy(self._data)
+                self._dirty = False
+            try:
+                if self._is_yaml():
+                    text = yaml.dump(snapshot, default_flow_style=False)
+                else:
+                    text = json.dumps(snapshot, indent=2)
+                atomic_write(self.path, lambda f: f.write(text.encode("utf-8")))
+            except Exception as e:
+                logger.warning("Failed to save config: %s", e)
@@ -0,0 +1,179 @@
+"""Tk event-loop helpers: a coalescing idle queue and a latency monitor.
+
+:class:`IdleScheduler` replaces scattered ``root.after_idle`` calls. Tasks
+are keyed, so scheduling the same key again while it is pending is a
+no-op, and a burst of edits runs each task once.
+
+:class:`LatencyMonitor` measures how long the main loop is blocked. A
+heartbeat timer notes how late each tick fires; callbacks run through
+:meth:`LatencyMonitor.wrap` (including every IdleScheduler task) are
+timed, so a stall can be blamed on the slowest callback that ran since
+the previous tick.
+"""
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import perf
+
+logger = logging.getLogger(__name__)
+
+# Heartbeat period; lateness is measured against this
+DEFAULT_HEARTBEAT_MS = 50
+# Blocks longer than this are logged as stalls
+DEFAULT_STALL_THRESHOLD_MS = 150
+# Lateness samples and stall records kept for stats
+HISTORY_SIZE = 2000
+UNTRACKED_CULPRIT = "untracked (event handling or redraw)"
+
+
+class LatencyMonitor:
+    """Heartbeat-based measurement of main-loop blocking.
+
+    Args:
+        root: Tk root used for the heartbeat timer.
+        heartbeat_ms: Heartbeat period.
+        stall_threshold_ms: Lateness above which a stall is logged.
+    """
+
+    def __init__(self, root, heartbeat_ms=DEFAULT_HEARTBEAT_MS,
+                 stall_threshold_ms=DEFAULT_STALL_THRESHOLD_MS):
+        self.root = root
+        self.heartbeat_ms = heartbeat_ms
+        self.stall_threshold_ms = stall_threshold_ms
+        self.lateness_ms = deque(maxlen=HISTORY_SIZE)
+        self.stalls = deque(maxlen=HISTORY_SIZE)  # (time, lateness_ms, culprit, culprit_ms)
+        self._after_id = None
+        self._expected = None
+        # Slowest tracked callback since the last heartbeat
+        self._worst_name = None
+        self._worst_ms = 0.0
+
+    @property
+    def is_running(self):
+        return self._after_id is not None
+
+    def start(self):
+        if self._after_id is None:
+            self._schedule_tick()
+
+    def stop(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    @contextmanager
+    def track(self, name):
+        """Time a block so stalls can be attributed to it"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if elapsed_ms > self._worst_ms:
+                self._worst_name = name
+                self._worst_ms = elapsed_ms
+
+    def wrap(self, name, callback):
+        """Return ``callback`` wrapped in :meth:`track` (for after/bind)"""
+        def tracked(*args, **kwargs):
+            with self.track(name):
+                return callback(*args, **kwargs)
+        return tracked
+
+    def stats(self):
+        """Return p50/p95/max lateness (ms) and the number of stalls"""
+        values = sorted(self.lateness_ms)
+        if not values:
+            return {"samples": 0, "p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0,
+                    "stalls": len(self.stalls)}
+        return {
+            "samples": len(values),
+            "p50_ms": values[len(values) // 2],
+            "p95_ms": values[min(len(values) - 1, len(values) * 95 // 100)],
+            "max_ms": values[-1],
+            "stalls": len(self.stalls),
+        }
+
+    def _schedule_tick(self):
+        self._expected = time.perf_counter() + self.heartbeat_ms / 1000
+        self._after_id = self.root.after(self.heartbeat_ms, self._tick)
+
+    def _tick(self):
+        now = time.perf_counter()
+        lateness_ms = max(0.0, (now - self._expected) * 1000)
+        self.lateness_ms.append(lateness_ms)
+        if perf.recorder.enabled:
+            perf.recorder.record("event_loop.lateness", time.perf_counter_ns(),
+                                 int(lateness_ms * 1e6))
+        if lateness_ms > self.stall_threshold_ms:
+            culprit = self._worst_name or UNTRACKED_CULPRIT
+            self.stalls.append((time.time(), lateness_ms, culprit, self._worst_ms))
+            logger.warning("UI blocked for %.0f ms; slowest callback: %s (%.0f ms)",
+                           lateness_ms, culprit, self._worst_ms)
+        self._worst_name = None
+        self._worst_ms = 0.0
+        self._schedule_tick()
+
+
+class IdleScheduler:
+    """Runs keyed tasks once when Tk is idle, coalescing duplicates.
+
+    Args:
+        root: Tk root used for ``after_idle``.
+        monitor: Optional LatencyMonitor that times every task.
+    """
+
+    def __init__(self, root, monitor=None):
+        self.root = root
+        self.monitor = monitor
+        self._tasks = {}  # key -> callback, in the order first scheduled
+        self._after_id = None
+        self.coalesced = 0  # Requests merged into an already pending task
+
+    def schedule(self, key, callback):
+        """Run ``callback`` at the next idle time unless ``key`` is pending.
+
+        Returns:
+            True if the task was queued, False if it was already pending.
+        """
+        if key in self._tasks:
+            self.coalesced += 1
+            return False
+        self._tasks[key] = callback
+        if self._after_id is None:
+            self._after_id = self.root.after_idle(self._run_pending)
+        return True
+
+    def is_pending(self, key):
+        return key in self._tasks
+
+    def cancel(self, key):
+        self._tasks.pop(key, None)
+        if not self._tasks and self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def flush(self):
+        """Run every pending task now"""
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+        self._run_pending()
+
+    def _run_pending(self):
+        self._after_id = None
+        # Tasks scheduled while these run go to the next idle turn
+        tasks, self._tasks = self._tasks, {}
+        for key, callback in tasks.items():
+            name = f"idle:{key}"
+            try:
+                if self.monitor is not None:
+                    with self.monitor.track(name), perf.span(name):
+                        callback()
+                else:
+                    with perf.span(name):
+                        callback()
+            except Exception:
+                # One failing task must not drop the others
+                logger.exception("Idle task %s failed", key)
@@ -0,0 +1,185 @@
+"""Exact (fixed-point) price comparison for the optional exact ranking mode.
+
+Floats are fast, but two products whose prices per base unit are equal or
+within a few ulps of each other can come out in either order depending on
+how the divisions round. In exact mode prices are parsed into integer
+micro-cents and quantities and unit factors into scaled integers, so a
+price per base unit is an integer ratio and two of them compare with one
+cross-multiplication.
+
+Ranking still sorts by the float price first. Only runs of neighbours whose
+floats are within :data:`AMBIGUOUS_RELATIVE_GAP` of each other are re-sorted
+by their exact values, so the order is the float order wherever the floats
+are unambiguous, and exact ties keep their input order.
+
+Numbers are recovered from their shortest float repr, which is exact for
+anything typed with up to 15 significant digits.
+"""
+import functools
+import math
+
+# Integer price unit: one micro-cent
+MICRO_CENTS_PER_DOLLAR = 10 ** 8
+# Parsed numbers kept per function; sessions repeat the same prices and
+# pack sizes a lot
+PARSE_CACHE_SIZE = 65536
+# Floats closer than this (relative) may be ordered differently from the
+# exact values; the float error of a price per base unit is a few ulps
+AMBIGUOUS_RELATIVE_GAP = 1e-12
+
+
+@functools.lru_cache(maxsize=PARSE_CACHE_SIZE)
+def to_scaled_int(value):
+    """Split a finite number into ``(mantissa, scale)``, value = mantissa / 10**scale"""
+    digits, _, exponent = repr(float(value)).partition("e")
+    whole, _, fraction = digits.partition(".")
+    mantissa = int(whole + fraction)
+    scale = len(fraction) - int(exponent or 0)
+    if scale < 0:
+        return mantissa * 10 ** -scale, 0
+    return mantissa, scale
+
+
+@functools.lru_cache(maxsize=PARSE_CACHE_SIZE)
+def to_micro_cents(price):
+    """A price in dollars as integer micro-cents (rounded half to even)"""
+    mantissa, scale = to_scaled_int(price)
+    shift = scale - 8  # MICRO_CENTS_PER_DOLLAR is 10**8
+    if shift <= 0:
+        return mantissa * 10 ** -shift
+    quotient, remainder = divmod(mantissa, 10 ** shift)
+    twice = 2 * remainder
+    if twice > 10 ** shift or (twice == 10 ** shift and quotient % 2):
+        quotient += 1
+    return quotient
+
+
+def exact_unit_price(price, quantity, factor):
+    """Exact price per base unit, in micro-cents, as ``(numerator, denominator)``.
+
+    Args:
+        price: Package price in dollars.
+        quantity: Package quantity in its own unit (positive).
+        factor: ``(mantissa, scale)`` of the unit's base units per unit
+            (see :func:`to_scaled_int`).
+    """
+    quantity_int, quantity_scale = to_scaled_int(quantity)
+    factor_int, factor_scale = factor
+    return (to_micro_cents(price) * 10 ** (quantity_scale + factor_scale),
+            quantity_int * factor_int)
+
+
+def is_ambiguous(a, b):
+    """Whether floats ``a`` and ``b`` are too close to trust their order"""
+    return abs(a - b) <= AMBIGUOUS_RELATIVE_GAP * max(abs(a), abs(b))
+
+
+class ExactPrice:
+    """Sort key for a price per base unit that orders exactly.
+
+    Compares by the float ``value`` when that is unambiguous and by the
+    exact integer ratio otherwise. The ratio is only worked out the first
+    time it is needed, so keys are cheap to build for a whole session.
+
+    Args:
+        value: The float price per base unit.
+        price: Package price in dollars.
+        quantity: Package quantity in its own unit.
+        factor: ``(mantissa, scale)`` of the unit's base units per unit.
+    """
+
+    __slots__ = ("value", "price", "quantity", "factor", "_ratio")
+
+    def __init__(self, value, price, quantity, factor):
+        self.value = value
+        self.price = price
+        self.quantity = quantity
+        self.factor = factor
+        self._ratio = None
+
+    def ratio(self):
+        """The exact value as ``(numerator, denominator)`` micro-cents"""
+        if self._ratio is None:
+            self._ratio = exact_unit_price(self.price, self.quantity, self.factor)
+        return self._ratio
+
+    def _compare(self, other):
+        """-1, 0 or 1 as self is less than, equal to or greater than other"""
+        a, b = self.value, other.value
+        if not is_ambiguous(a, b):
+            return -1 if a < b else 1
+        numerator, denominator = self.ratio()
+        other_numerator, other_denominator = other.ratio()
+        left = numerator * other_denominator
+        right = other_numerator * denominator
+        return (left > right) - (left < right)
+
+    def __lt__(self, other):
+        return self._compare(other) < 0
+
+    def __le__(self, other):
+        return self._compare(other) <= 0
+
+    def __gt__(self, other):
+        return self._compare(other) > 0
+
+    def __ge__(self, other):
+        return self._compare(other) >= 0
+
+    def __eq__(self, other):
+        if not isinstance(other, ExactPrice):
+            return NotImplemented
+        return self._compare(other) == 0
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"ExactPrice({self.value!r}, {self.price!r}, {self.quantity!r}, {self.factor!r})"
+
+
+def ambiguous_runs(sorted_values):
+    """``(start, stop)`` slices of neighbours whose floats are ambiguous.
+
+    Args:
+        sorted_values: Float prices in ranked order.
+    """
+    runs = []
+    run_start = 0
+    previous = None
+    for position, value in enumerate(sorted_values):
+        if previous is not None and not is_ambiguous(previous, value):
+            if position - run_start > 1:
+                runs.append((run_start, position))
+            run_start = position
+        previous = value
+    if len(sorted_values) - run_start > 1:
+        runs.append((run_start, len(sorted_values)))
+    return runs
+
+
+def refine_order(order, runs, exact_ratio):
+    """Re-sort the ambiguous runs of a float ranking by exact value.
+
+    Each run is brought to a common denominator, so it sorts on plain
+    integers rather than comparing ratios pair by pair.
+
+    Args:
+        order: Indices sorted by float price (stable, so ties are in input
+            order).
+        runs: ``(start, stop)`` slices of ``order`` to re-sort, from
+            :func:`ambiguous_runs`.
+        exact_ratio: ``exact_ratio(i)`` returns the
+            :func:`exact_unit_price` of index ``i``.
+
+    Returns:
+        The order as a list of ints, every run sorted by
+        ``(exact value, index)``.
+    """
+    order = [int(i) for i in order]
+    for start, stop in runs:
+        run = order[start:stop]
+        ratios = [exact_ratio(i) for i in run]
+        common = math.lcm(*(denominator for _, denominator in ratios))
+        keys = [numerator * (common // denominator) for numerator, denominator in ratios]
+        order[start:stop] = [i for _, i in sorted(zip(keys, run))]
+    return order
@@ -0,0 +1,88 @@
+"""Column mapping dialog for File → Import Prices (see price_import).
+
+Shows one drop-down per product field, listing the file's columns, with
+the guessed column preselected.
+"""
+import os
+import tkinter as tk
+from tkinter import ttk
+
+from price_import import IMPORT_FIELDS, REQUIRED_FIELDS
+from virtual_grid import ERROR_FOREGROUND
+
+# Drop-down entry for a field that isn't in the file
+NOT_MAPPED = "(none)"
+FIELD_LABELS = {"name": "Product name", "store": "Store", "price": "Price",
+                "quantity": "Quantity", "unit": "Unit", "url": "URL"}
+
+
+class ColumnMappingDialog(tk.Toplevel):
+    """Modal dialog that asks which column holds each product field.
+
+    Args:
+        parent: Window the dialog belongs to.
+        filename: The file being imported (shown in the title).
+        columns: The file's column names.
+        mapping: Preselected field-to-column mapping (e.g. from
+            price_import.guess_mapping).
+
+    Attributes:
+        result: The chosen mapping once the dialog closes, or None if it
+            was cancelled.
+    """
+
+    def __init__(self, parent, filename, columns, mapping):
+        super().__init__(parent)
+        self.title(f"Import {os.path.basename(filename)}")
+        self.transient(parent)
+        self.resizable(False, False)
+        self.result = None
+
+        body = ttk.Frame(self, padding="10")
+        body.pack(fill=tk.BOTH, expand=True)
+        ttk.Label(body, text="Choose the column that holds each field:").grid(
+            row=0, column=0, columnspan=2, sticky=tk.W, pady=(0, 8))
+        self.field_vars = {}
+        for row, field in enumerate(IMPORT_FIELDS, start=1):
+            required = " *" if field in REQUIRED_FIELDS else ""
+            ttk.Label(body, text=FIELD_LABELS[field] + required).grid(
+                row=row, column=0, sticky=tk.W, padx=(0, 10), pady=2)
+            var = tk.StringVar(value=mapping.get(field) or NOT_MAPPED)
+            ttk.Combobox(body, textvariable=var, values=[NOT_MAPPED] + list(columns),
+                         state="readonly", width=28).grid(row=row, column=1, pady=2)
+            self.field_vars[field] = var
+
+        ttk.Label(body, text="* required. A quantity like \"12 oz\" may include its unit.",
+                  foreground="gray").grid(
+            row=len(IMPORT_FIELDS) + 1, column=0, columnspan=2, sticky=tk.W, pady=(8, 0))
+        # Shown instead of a second dialog when a required field is missing
+        self.error_label = ttk.Label(body, text="", foreground=ERROR_FOREGROUND)
+        self.error_label.grid(row=len(IMPORT_FIELDS) + 2, column=0, columnspan=2,
+                              sticky=tk.W)
+
+        buttons = ttk.Frame(body)
+        buttons.grid(row=len(IMPORT_FIELDS) + 3, column=0, columnspan=2,
+                     sticky=tk.E, pady=(10, 0))
+        ttk.Button(buttons, text="Cancel", command=self.destroy).pack(side=tk.RIGHT)
+        ttk.Button(buttons, text="Import", command=self._on_import).pack(
+            side=tk.RIGHT, padx=5)
+        self.bind("<Return>", lambda e: self._on_import())
+        self.bind("<Escape>", lambda e: self.destroy())
+
+        self.grab_set()
+        self.wait_window(self)
+
+    def mapping(self):
+        """The mapping currently chosen in the drop-downs"""
+        return {field: None if var.get() == NOT_MAPPED else var.get()
+                for field, var in self.field_vars.items()}
+
+    def _on_import(self):
+        mapping = self.mapping()
+        missing = [FIELD_LABELS[field] for field in REQUIRED_FIELDS
+                   if not mapping[field]]
+        if missing:
+            self.error_label.config(text=f"Choose a column for {' and '.join(missing)}.")
+            return
+        self.result = mapping
+        self.destroy()
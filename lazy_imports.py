@@ -0,0 +1,52 @@
+"""Deferred imports for modules that aren't needed to draw the first frame.
+
+``lazy_import`` returns the module object right away but only executes the
+module on first attribute access (importlib.util.LazyLoader), so code can
+keep writing ``ET.parse(...)`` or ``messagebox.showerror(...)`` while the
+import cost moves out of startup.
+"""
+import importlib.util
+import sys
+
+
+def lazy_import(name):
+    """Return module ``name``, loading it on first use.
+
+    Returns:
+        The module (already loaded if something imported it before), or
+        None if it isn't installed, so optional dependencies can keep their
+        ``HAS_...`` flags.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    try:
+        spec = importlib.util.find_spec(name)
+    except (ImportError, ValueError):
+        return None
+    if spec is None or spec.loader is None:
+        return None
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+
+    # Match a normal import, which binds submodules on their package
+    parent, _, child = name.rpartition(".")
+    if parent:
+        setattr(sys.modules[parent], child, module)
+    return module
+
+
+def load_now(module):
+    """Finish loading a module returned by :func:`lazy_import`.
+
+    The deferred load on first attribute access isn't thread-safe before
+    CPython 3.12.3, so a module that worker threads use must be loaded on
+    one thread before any worker can touch it. None (not installed) is
+    ignored.
+    """
+    if module is not None:
+        getattr(module, "__doc__", None)
+    return module
@@ -1,59 +1,146 @@
+import sys
+import time
+
+# Startup is measured from here (see startup.py)
+STARTED_AT = time.perf_counter()
+
+# Batch mode (`python main.py rank ...`) must run on headless machines, so
+# hand off before tkinter is imported
+if __name__ == "__main__" and len(sys.argv) > 1 and sys.argv[1] == "rank":
+    from cli import main as cli_main
+    sys.exit(cli_main(sys.argv[1:]))
+
 import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
-import xml.etree.ElementTree as ET
+from tkinter import ttk
+import itertools
 import os
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
 
-# Try to import yaml, fallback to json if not available
-try:
-    import yaml
-    HAS_YAML = True
-except ImportError:
-    import json
-    HAS_YAML = False
-    print("PyYAML not found, falling back to JSON for config file")
+import perf
+from autosave import DEFAULT_AUTO_SAVE_DELAY_MS, AutoSaveScheduler
+from config_service import ConfigService
+from event_loop import DEFAULT_STALL_THRESHOLD_MS, IdleScheduler, LatencyMonitor
+from lazy_imports import lazy_import, load_now
+from price_history import (HAS_SQLITE, HISTORY_BASENAME, HISTORY_WINDOW_DAYS,
+                           PriceHistory, history_key)
+from price_import import (ImportFormatError, PriceImport, guess_mapping,
+                          read_columns, write_rejections)
+from pricing_engine import (best_products, exact_price_key, fill_unit_prices,
+                            price_product, price_products, product_group_key,
+                            rank_products, validate_row, validate_rows)
+from results_export import write_results_file
+from row_model import ProductRow
+from session_io import SessionFormatError, open_session, write_session
+from session_snapshot import SessionSnapshotCache, is_snapshot_candidate
+from startup import REPORT_ENV_VAR, StartupTimer
+from units import set_custom_units, unit_table, units_to_base
+from virtual_grid import ERROR_FOREGROUND, VirtualRowGrid
+from workspace import Session, same_file, session_title_for
+
+# Only needed once a dialog opens, so they load on first use instead of
+# before the window appears. These are only used on the Tk thread.
+messagebox = lazy_import("tkinter.messagebox")
+filedialog = lazy_import("tkinter.filedialog")
 
 # --- Constants ---
-# Conversion factors to base units
-# Base unit for Dry is gram (g)
-DRY_UNITS_TO_BASE = {
-    "g": 1.0,
-    "oz": 28.3495,
-    "lb": 453.592,
-    "kg": 1000.0,
-}
-# Base unit for Liquid is milliliter (ml)
-LIQUID_UNITS_TO_BASE = {
-    "ml": 1.0,
-    "fl oz": 29.5735,
-    "L": 1000.0,
-    "cup": 236.588,
-    "pint": 473.176,
-    "quart": 946.353,
-    "gallon": 3785.41,
-}
-
 # Store options
 STORE_OPTIONS = ["Aldi", "Amazon", "Target", "Walmart", "Other"]
 
-# Units to display in output columns (and their conversion factor from the base unit)
-# For Dry (base: g)
-DRY_OUTPUT_UNITS = {
-    "per g": 1.0,
-    "per oz": DRY_UNITS_TO_BASE["oz"],  # grams per oz
-    "per lb": DRY_UNITS_TO_BASE["lb"],          # grams per lb
-    "per kg": DRY_UNITS_TO_BASE["kg"],          # grams per kg
-}
-# For Liquid (base: ml)
-LIQUID_OUTPUT_UNITS = {
-    "per ml": 1.0,
-    "per fl oz": LIQUID_UNITS_TO_BASE["fl oz"],  # ml per fl oz
-    "per L": LIQUID_UNITS_TO_BASE["L"],              # ml per L
-}
+# Products added per event-loop turn while a session file loads
+LOAD_CHUNK_SIZE = 500
+
+# Price imports: how often finished chunks are collected from the worker,
+# and at most how many are appended per event-loop turn
+IMPORT_POLL_INTERVAL_MS = 50
+MAX_IMPORT_CHUNKS_PER_POLL = 4
+IMPORT_FILETYPES = [("Price lists", "*.csv *.tsv *.jsonl *.ndjson *.json"),
+                    ("CSV files", "*.csv"),
+                    ("JSON lines files", "*.jsonl *.ndjson *.json"),
+                    ("All files", "*.*")]
+
+# How often the Tk thread checks whether a results export has finished
+EXPORT_POLL_INTERVAL_MS = 50
+# How often the Tk thread checks for finished price history lookups
+HISTORY_POLL_INTERVAL_MS = 50
+# Smaller relative changes over the history window show as "steady"
+STEADY_PRICE_CHANGE = 0.005
+EXPORT_FILETYPES = [("CSV files", "*.csv"),
+                    ("JSON lines files", "*.jsonl *.ndjson"),
+                    ("JSON files", "*.json"),
+                    ("All files", "*.*")]
+
+# Results "Show" choices: page size, None for every result
+RESULTS_PAGE_SIZES = {"All": None, "Top 10": 10, "Top 25": 25, "Top 100": 100}
+
+# Invalid rows named in the validation summary before it is cut short
+MAX_LISTED_ERRORS = 5
+
+# Config and the last session load wait for the window's first paint; a
+# window that is never exposed (withdrawn, tests) starts after this delay
+FIRST_FRAME_TIMEOUT_MS = 500
+
+# Save dialog choices; the extension picks the session format
+SESSION_FILETYPES = [("XML files", "*.xml"),
+                     ("Binary session files", "*.ucsb"),
+                     ("All files", "*.*")]
+
+
+def _input_row_count(app, *args, **kwargs):
+    """Row count recorded by perf.instrument for app methods"""
+    return len(app.input_rows_data)
+
+
+def _positive_int(value, default=None):
+    """``value`` if it is a positive int (a config setting), else ``default``"""
+    if isinstance(value, int) and not isinstance(value, bool) and value > 0:
+        return value
+    return default
+
+
+class _SessionField:
+    """App attribute that reads and writes a field of the active Session"""
+
+    def __init__(self, field):
+        self.field = field
+
+    def __get__(self, app, owner=None):
+        if app is None:
+            return self
+        return getattr(app.session, self.field)
+
+    def __set__(self, app, value):
+        setattr(app.session, self.field, value)
 
 
 class UnitCostCalculatorApp:
-    def __init__(self, root):
+    # Per-session state lives on the active tab's Session (see workspace.py)
+    session_unit_type = _SessionField("unit_type")
+    session_title = _SessionField("title")
+    current_filename = _SessionField("filename")
+    is_saved = _SessionField("is_saved")
+    last_save_time = _SessionField("last_save_time")
+    loading_session = _SessionField("loading")
+    _load_reader = _SessionField("load_reader")
+    _load_products = _SessionField("load_products")
+    _load_after_id = _SessionField("load_after_id")
+    _load_is_interactive = _SessionField("load_is_interactive")
+    _edited_while_loading = _SessionField("edited_while_loading")
+    _load_fingerprint = _SessionField("load_fingerprint")
+    input_rows_data = _SessionField("rows")
+    _row_ids = _SessionField("row_ids")
+    _row_results = _SessionField("row_results")
+    _ranking = _SessionField("ranking")
+    _groups = _SessionField("groups")
+    _dirty_rows = _SessionField("dirty_rows")
+    _results_cache_valid = _SessionField("results_cache_valid")
+    _row_errors = _SessionField("row_errors")
+    auto_saver = _SessionField("auto_saver")
+
+    def __init__(self, root, config=None, started_at=None):
+        self.startup = StartupTimer(started_at)
         self.root = root
         self.root.title("Unit Cost Calculator")
         self.root.geometry("1200x700")  # Wider initial window
@@ -61,27 +148,127 @@ class UnitCostCalculatorApp:
         self.style = ttk.Style()
         self.style.theme_use('clam')  # Or 'alt', 'default', 'classic'
 
-        self.session_unit_type = None  # "Dry" or "Liquid"
-        self.session_title = "Untitled Session"  # Track session title
-        self.current_filename = None  # Track current saved filename for auto-save
-        self.is_saved = False  # Track if current state is saved - start as False for untitled
-        self.last_save_time = None  # Track last save time
-        self.loading_session = False  # Flag to prevent auto-save during loading
-        self.input_rows_data = []  # Stores dicts of tk.Vars for each row
-        self.input_row_frames = []  # Stores the Frame widget for each input row
-        self.config_file = os.path.join(
-            os.path.expanduser("~"),
-            ".unit_cost_calculator_config.yaml" if HAS_YAML else ".unit_cost_calculator_config.json"
-        )
+        # Nesting depth of bulk_update(); side effects are deferred while > 0
+        self._bulk_depth = 0
+        self._bulk_pending = set()  # Deferred work: "calculate", "save", "refresh"
+        # What the results Treeview currently shows, for diff-based updates
+        self._result_items = {}  # row_id -> (iid, values, tag)
+        self._result_order = []  # row_ids in displayed order
+        self._group_items = {}  # group key -> (iid, values) of its parent item
+        self._group_children = {}  # group key -> row_ids shown under it, in order
+        self._results_unit_type = None  # Unit type the columns are set up for
+        self._results_grouped = False  # Whether the tree is laid out in groups
+        self._results_price_columns = []
+        self._history_low_format = None  # (output factor, format) of the low column
+        self._import_after_id = None  # Next poll of the active tab's import
+        # Results paging: None shows every result, otherwise only one page
+        # of the best products is selected (bounded heap) and displayed
+        self.results_page_size = None
+        self.results_page = 0
+        # Order near-ties by exact fixed-point values (see exact_pricing)
+        self.exact_ranking = False
+        # Rank each product's rows on their own, under one parent per product
+        self.group_by_product = False
+        self.perf_overlay = None  # Debug panel, toggled with Ctrl+Shift+P
+        # Config is read once and written in the background
+        self.config = config if config is not None else ConfigService()
+        self.config_file = self.config.path
+        # Pre-parsed copy of the last session, so startup can skip XML parsing
+        self.session_snapshots = SessionSnapshotCache(
+            os.path.dirname(os.path.abspath(self.config_file)))
+        # Every saved price, for the low and trend shown next to results
+        # (None when Python was built without sqlite3)
+        self.price_history = PriceHistory(os.path.join(
+            os.path.dirname(os.path.abspath(self.config_file)),
+            HISTORY_BASENAME)) if HAS_SQLITE else None
+        self.price_history_days = HISTORY_WINDOW_DAYS
+        self._history_stats = {}  # history key -> PriceStats, or None
+        self._history_pending = set()  # Keys being looked up
+        # Bumped when new observations make running lookups stale
+        self._history_generation = 0
+
+        # Measures main-loop stalls; idle tasks are coalesced by key
+        self.loop_monitor = LatencyMonitor(self.root)
+        self.idle_tasks = IdleScheduler(self.root, self.loop_monitor)
+
+        # Open sessions in tab order. Only the active one is bound to the
+        # widgets; its rows, file and results are read through the
+        # _SessionField attributes above. Only the rows on screen have
+        # widgets (see VirtualRowGrid).
+        self.auto_save_delay_ms = DEFAULT_AUTO_SAVE_DELAY_MS
+        self.sessions = []
+        self.session = self._create_session()
 
         self._setup_ui()
+        self._add_session_tab(self.session)
         self.add_input_row(is_initial_row=True)  # Add the first row initially
 
+        # Everything else waits until the window is on screen
+        self._started = False
+        self._first_frame_bind_id = self.root.bind(
+            "<Expose>", self._on_first_expose, add="+")
+        self._first_frame_after_id = self.root.after(
+            FIRST_FRAME_TIMEOUT_MS, self._finish_startup)
+
+    def _on_first_expose(self, event):
+        # The redraws for this expose are queued idle tasks; run after them
+        self.root.after_idle(self._finish_startup)
+
+    @perf.instrument("startup.deferred")
+    def _finish_startup(self):
+        """Second half of startup, run once the first frame is drawn"""
+        if self._started:
+            return
+        self._started = True
+        self.root.unbind("<Expose>", self._first_frame_bind_id)
+        self.root.after_cancel(self._first_frame_after_id)
+        self.startup.mark("first_frame")
+        # Worker threads use these too (rows are priced for auto-save
+        # snapshots, history and imports; the config is written on a timer),
+        # so finish loading them here, before any worker starts
+        load_now(lazy_import("numpy"))
+        load_now(lazy_import("yaml"))
+
         # Initialize config file (creates it if it doesn't exist)
-        self.load_config()
+        config = self.config
+        self.auto_save_delay_ms = _positive_int(
+            config.get("auto_save_delay_ms"), DEFAULT_AUTO_SAVE_DELAY_MS)
+        for session in self.sessions:
+            session.auto_saver.delay_ms = self.auto_save_delay_ms
+        if config.get("perf_instrumentation"):
+            perf.set_enabled(True)
+        page_size = _positive_int(config.get("results_page_size"))
+        if page_size is not None:
+            self.set_results_page_size(page_size)
+        self.set_exact_ranking(bool(config.get("exact_ranking")))
+        self.set_group_by_product(bool(config.get("group_by_product")))
+        self.price_history_days = _positive_int(
+            config.get("price_history_days"), HISTORY_WINDOW_DAYS)
+        self.loop_monitor.stall_threshold_ms = _positive_int(
+            config.get("stall_threshold_ms"), DEFAULT_STALL_THRESHOLD_MS)
+        self.loop_monitor.start()
+        # Before anything is priced, so the unit tables include them
+        set_custom_units(config.get("custom_units"))
 
         # Load last session if available
         self.load_last_session()
+        if not self.loading_session:
+            self._on_startup_ready()
+
+    def _on_startup_ready(self):
+        """The last session is in (or there is none); results come next"""
+        if "interactive" in self.startup.milestones:
+            return
+        # Idle tasks run in order, so this follows the pending auto_calculate
+        self.idle_tasks.schedule("startup.interactive", self._mark_interactive)
+
+    def _mark_interactive(self):
+        self.startup.mark("interactive")
+        report_file = os.environ.get(REPORT_ENV_VAR)
+        if report_file:
+            # Startup measurement run (benchmarks.startup): report and exit
+            self.startup.write_report(report_file)
+            self.on_close()
 
     def _setup_ui(self):
         # --- Menu Bar ---
@@ -93,20 +280,55 @@ class UnitCostCalculatorApp:
         menubar.add_cascade(label="File", menu=file_menu)
         file_menu.add_command(label="New Session",
                               command=self.new_session, accelerator="Ctrl+N")
+        file_menu.add_command(label="New Tab",
+                              command=self.new_tab, accelerator="Ctrl+T")
         file_menu.add_separator()
         file_menu.add_command(label="Load Session...",
                               command=self.load_session, accelerator="Ctrl+O")
+        file_menu.add_command(label="Open in New Tab...",
+                              command=self.open_session_in_new_tab,
+                              accelerator="Ctrl+Shift+O")
         file_menu.add_command(label="Save Session...",
                               command=self.save_session, accelerator="Ctrl+S")
+        file_menu.add_separator()
+        file_menu.add_command(label="Import Prices...",
+                              command=self.import_prices, accelerator="Ctrl+I")
+        file_menu.add_command(label="Export Results...",
+                              command=self.export_results, accelerator="Ctrl+E")
+        file_menu.add_separator()
+        # Filled from the config's recent sessions each time it opens
+        self.recent_menu = tk.Menu(
+            file_menu, tearoff=0, postcommand=self._populate_recent_menu)
+        file_menu.add_cascade(label="Open Recent", menu=self.recent_menu)
+        file_menu.add_separator()
+        file_menu.add_command(label="Close Tab",
+                              command=self.close_tab, accelerator="Ctrl+W")
 
         # Bind keyboard shortcuts
         self.root.bind('<Control-n>', lambda e: self.new_session())
+        self.root.bind('<Control-t>', lambda e: self.new_tab())
         self.root.bind('<Control-o>', lambda e: self.load_session())
+        self.root.bind('<Control-O>', lambda e: self.open_session_in_new_tab())
         self.root.bind('<Control-s>', lambda e: self.save_session())
+        self.root.bind('<Control-i>', lambda e: self.import_prices())
+        self.root.bind('<Control-e>', lambda e: self.export_results())
+        self.root.bind('<Control-w>', lambda e: self.close_tab())
+        # Hidden performance overlay (Ctrl+Shift+P)
+        self.root.bind('<Control-P>', lambda e: self.toggle_perf_overlay())
+
+        # Write out any pending auto-save before the window closes
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
         # Store reference to file menu for enabling/disabling save option
         self.file_menu = file_menu
 
+        # --- Session tabs ---
+        # Only the tab strip: each page is an empty frame, and the widgets
+        # below are shared by every tab and re-bound to the active session
+        self.session_tabs = ttk.Notebook(self.root)
+        self.session_tabs.pack(fill=tk.X, padx=10, pady=(5, 0))
+        self.session_tabs.bind("<<NotebookTabChanged>>", self._on_tab_changed)
+
         # --- Session Title Frame ---
         title_frame = ttk.Frame(self.root, padding="10")
         title_frame.pack(fill=tk.X)
@@ -140,27 +362,70 @@ class UnitCostCalculatorApp:
             controls_frame, text="Reset All", command=self.reset_session)
         reset_button.pack(side=tk.LEFT, padx=5)
 
-        # --- Input Area (Scrollable) ---
+        # Summary of invalid rows; click to scroll to the first one
+        self.validation_label = ttk.Label(
+            controls_frame, text="", foreground=ERROR_FOREGROUND, cursor="hand2")
+        self.validation_label.pack(side=tk.LEFT, padx=10)
+        self.validation_label.bind(
+            "<Button-1>", lambda e: self.show_first_invalid_row())
+
+        # Session loading or import progress (only packed while one runs)
+        self.load_progress_frame = ttk.Frame(controls_frame)
+        self.load_progress_label = ttk.Label(self.load_progress_frame, text="Loading...")
+        self.load_progress_label.pack(side=tk.LEFT, padx=5)
+        self.load_progress = ttk.Progressbar(
+            self.load_progress_frame, length=150, maximum=100, mode="determinate")
+        self.load_progress.pack(side=tk.LEFT, padx=5)
+        ttk.Button(self.load_progress_frame, text="Cancel",
+                   command=self._on_progress_cancel).pack(side=tk.LEFT, padx=5)
+
+        # --- Input Area (Scrollable, virtualized) ---
         input_area_container = ttk.Frame(self.root, padding="5")
         input_area_container.pack(fill=tk.BOTH, expand=True)
 
-        self.canvas = tk.Canvas(input_area_container)
-        scrollbar = ttk.Scrollbar(
-            input_area_container, orient="vertical", command=self.canvas.yview)
-        self.scrollable_frame = ttk.Frame(self.canvas)
-
-        self.scrollable_frame.bind(
-            "<Configure>",
-            lambda e: self.canvas.configure(
-                scrollregion=self.canvas.bbox("all"))
-        )
-
-        self.canvas.create_window(
-            (0, 0), window=self.scrollable_frame, anchor="nw")
-        self.canvas.configure(yscrollcommand=scrollbar.set)
-
-        self.canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
+        self.input_grid = VirtualRowGrid(
+            input_area_container, self.input_rows_data, STORE_OPTIONS,
+            get_unit_type=lambda: self.session_unit_type,
+            on_field_change=self.loop_monitor.wrap("edit", self._on_row_field_change),
+            on_unit_type_selected=self._on_unit_type_selected,
+            on_remove=self.remove_input_row,
+            get_row_error=lambda row: self._row_errors.get(row.row_id))
+        self.input_grid.pack(fill=tk.BOTH, expand=True)
+
+        # --- Results paging controls ---
+        pager_frame = ttk.Frame(self.root, padding=(10, 0))
+        pager_frame.pack(fill=tk.X)
+        ttk.Label(pager_frame, text="Show:").pack(side=tk.LEFT, padx=2)
+        self.results_page_size_var = tk.StringVar(value="All")
+        self.page_size_combobox = ttk.Combobox(
+            pager_frame, textvariable=self.results_page_size_var,
+            values=list(RESULTS_PAGE_SIZES), width=8, state='readonly')
+        self.page_size_combobox.pack(side=tk.LEFT, padx=2)
+        self.page_size_combobox.bind(
+            "<<ComboboxSelected>>",
+            lambda e: self.set_results_page_size(
+                RESULTS_PAGE_SIZES[self.results_page_size_var.get()]))
+        self.prev_page_button = ttk.Button(
+            pager_frame, text="◀", width=3, state=tk.DISABLED,
+            command=lambda: self.change_results_page(-1))
+        self.prev_page_button.pack(side=tk.LEFT, padx=(10, 2))
+        self.next_page_button = ttk.Button(
+            pager_frame, text="▶", width=3, state=tk.DISABLED,
+            command=lambda: self.change_results_page(1))
+        self.next_page_button.pack(side=tk.LEFT, padx=2)
+        self.results_count_label = ttk.Label(
+            pager_frame, text="", foreground="gray")
+        self.results_count_label.pack(side=tk.LEFT, padx=5)
+        self.exact_ranking_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            pager_frame, text="Exact ranking", variable=self.exact_ranking_var,
+            command=lambda: self.set_exact_ranking(self.exact_ranking_var.get())
+        ).pack(side=tk.RIGHT, padx=2)
+        self.group_by_product_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            pager_frame, text="Group by product", variable=self.group_by_product_var,
+            command=lambda: self.set_group_by_product(self.group_by_product_var.get())
+        ).pack(side=tk.RIGHT, padx=2)
 
         # --- Results Area ---
         results_frame = ttk.Frame(self.root, padding="10")
@@ -186,22 +451,21 @@ class UnitCostCalculatorApp:
         # Bind click event for copying price values to clipboard
         self.results_tree.bind('<Button-1>', self.on_treeview_click)
 
-    def _on_unit_type_selected(self, row_idx, is_initial_call=False):
+    def _on_unit_type_selected(self, row_idx):
         row_data = self.input_rows_data[row_idx]
-        selected_type = row_data["unit_type_var"].get()
+        selected_type = row_data["unit_type"]
 
         if not selected_type:  # No selection yet
-            row_data["unit_combobox"].set('')
-            row_data["unit_combobox"].config(values=[], state=tk.DISABLED)
+            row_data["unit"] = ""
+            self.input_grid.refresh_row(row_idx)
             return
 
         if self.session_unit_type is None:  # First time a type is selected in this session
             self.session_unit_type = selected_type
+            self._invalidate_results()
             # Lock this type for all existing and future rows
-            for i, r_data in enumerate(self.input_rows_data):
-                r_data["unit_type_var"].set(self.session_unit_type)
-                r_data["unit_type_combobox"].config(
-                    state=tk.DISABLED if i > 0 or not is_initial_call else tk.NORMAL)
+            for r_data in self.input_rows_data:
+                r_data["unit_type"] = self.session_unit_type
             # Enable adding more rows
             self.add_row_button.config(state=tk.NORMAL)
 
@@ -209,131 +473,100 @@ class UnitCostCalculatorApp:
             # This case should ideally not happen if UI logic is correct
             messagebox.showerror(
                 "Type Mismatch", f"Session is locked to '{self.session_unit_type}'. Please reset if you want to change types.")
-            row_data["unit_type_var"].set(self.session_unit_type)  # Revert
+            row_data["unit_type"] = self.session_unit_type  # Revert
+            self.input_grid.refresh_row(row_idx)
             return
 
-        # Update unit options for the current row
-        if self.session_unit_type == "Dry":
-            row_data["unit_combobox"].config(values=list(
-                DRY_UNITS_TO_BASE.keys()), state='readonly')
-        elif self.session_unit_type == "Liquid":
-            row_data["unit_combobox"].config(values=list(
-                LIQUID_UNITS_TO_BASE.keys()), state='readonly')
+        # Clear a unit that doesn't belong to the session type
+        if row_data["unit"] not in units_to_base(self.session_unit_type):
+            row_data["unit"] = ""
+
+        # Shown rows pick up the locked type and its unit options
+        self._refresh_input_grid()
+
+    def _new_row(self, **fields):
+        """Create a row record, with empty strings for missing fields"""
+        # The position is kept up to date when rows are removed
+        return ProductRow(next(self._row_ids), len(self.input_rows_data), **fields)
+
+    def _on_row_field_change(self, row_data, field):
+        """Called by the input grid after the user edits a field of a row"""
+        if self.loading_session:
+            # Picked up once the load finishes
+            self._edited_while_loading = True
+        else:  # Don't mark unsaved during loading
+            self.mark_unsaved()  # Mark as unsaved first
+            # Only this row needs recomputing on the next auto-calculate
+            self._dirty_rows[row_data["row_id"]] = row_data
+            # Auto-save once edits pause, only if we have a saved file
+            if self.current_filename:
+                self.auto_save()
+            # Auto-calculate results when data changes
+            self._schedule_auto_calculate()
+
+    @contextmanager
+    def bulk_update(self):
+        """Group many model changes into one calculation, save and redraw.
+
+        While the block runs, field-change handling, auto-saves,
+        recalculations and input grid refreshes are only recorded. When the
+        outermost block exits, the grid is refreshed once, results are
+        recalculated once and at most one auto-save is requested. Session
+        loaders and importers should wrap their row changes in this.
+        """
+        self._bulk_depth += 1
+        try:
+            yield self
+        finally:
+            self._bulk_depth -= 1
+            if self._bulk_depth == 0:
+                self._commit_bulk_update()
+
+    def _commit_bulk_update(self):
+        pending = self._bulk_pending
+        self._bulk_pending = set()
+        if "refresh" in pending:
+            self.input_grid.refresh()
+        if "calculate" in pending:
+            # Rows changed wholesale, so recalculate every row exactly once
+            self._invalidate_results()
+            self.auto_calculate()
+        if "save" in pending:
+            self.auto_save()
+
+    def _schedule_auto_calculate(self):
+        """Queue an auto-calculate, or defer it to the end of a bulk update"""
+        if self._bulk_depth:
+            self._bulk_pending.add("calculate")
         else:
-            row_data["unit_combobox"].config(values=[], state=tk.DISABLED)
-
-        if not row_data["unit_var"].get() in row_data["unit_combobox"]["values"]:
-            row_data["unit_combobox"].set('')
+            # Many edits in one event-loop turn calculate only once
+            self.idle_tasks.schedule("auto_calculate", self.auto_calculate)
+
+    def _refresh_input_grid(self, scroll_to=None):
+        """Re-bind the input grid to the model, unless in a bulk update"""
+        if self._bulk_depth:
+            self._bulk_pending.add("refresh")
+        elif scroll_to is not None:
+            self.input_grid.scroll_to(scroll_to)
+        else:
+            self.input_grid.refresh()
 
+    @perf.instrument("add_input_row", rows=_input_row_count)
     def add_input_row(self, is_initial_row=False):
-        row_idx = len(self.input_row_frames)
-        row_frame = ttk.Frame(self.scrollable_frame, padding="5")
-        row_frame.pack(fill=tk.X, pady=2)
-        self.input_row_frames.append(row_frame)
-
-        row_data = {
-            "name_var": tk.StringVar(),
-            "price_var": tk.StringVar(),
-            "quantity_var": tk.StringVar(),
-            "unit_type_var": tk.StringVar(),
-            "unit_var": tk.StringVar(),
-            "store_var": tk.StringVar(),
-            "url_var": tk.StringVar(),
-        }
+        row_data = self._new_row()
 
         # Copy defaults from previous row if not the first row
         if not is_initial_row and self.input_rows_data:
             prev_row = self.input_rows_data[-1]
             # Copy product name for easy replacement
-            row_data["name_var"].set(prev_row["name_var"].get())
-            row_data["store_var"].set(prev_row["store_var"].get())
-            row_data["unit_type_var"].set(prev_row["unit_type_var"].get())
-            row_data["unit_var"].set(prev_row["unit_var"].get())
-
-        # Row number
-        ttk.Label(row_frame, text=f"{row_idx+1}.",
-                  width=3).pack(side=tk.LEFT, padx=2)
-
-        # Product name
-        ttk.Label(row_frame, text="Product:").pack(side=tk.LEFT, padx=2)
-        name_entry = ttk.Entry(
-            row_frame, textvariable=row_data["name_var"], width=35)
-        name_entry.pack(side=tk.LEFT, padx=2)
-
-        # Add focus event to select all text in product field for easy replacement
-        def on_product_focus(event):
-            name_entry.select_range(0, 'end')
-            name_entry.icursor('end')
-        name_entry.bind('<FocusIn>', on_product_focus)
-        name_entry.bind(
-            '<Button-1>', lambda e: name_entry.after(1, on_product_focus, e))
-
-        # Bind to StringVar changes for auto-save and auto-calculate
-        def on_field_change(*args):
-            if not self.loading_session:  # Don't mark unsaved during loading
-                self.mark_unsaved()  # Mark as unsaved first
-                # Auto-save after current event processing only if we have a saved file
-                if self.current_filename:
-                    self.root.after_idle(self.auto_save)
-                # Auto-calculate results when data changes
-                self.root.after_idle(self.auto_calculate)
-
-        row_data["name_var"].trace_add("write", on_field_change)
-        row_data["price_var"].trace_add("write", on_field_change)
-        row_data["quantity_var"].trace_add("write", on_field_change)
-        row_data["unit_type_var"].trace_add("write", on_field_change)
-        row_data["unit_var"].trace_add("write", on_field_change)
-        row_data["store_var"].trace_add("write", on_field_change)
-        row_data["url_var"].trace_add("write", on_field_change)
-
-        # Store selection
-        ttk.Label(row_frame, text="Store:").pack(side=tk.LEFT, padx=2)
-        store_cb = ttk.Combobox(row_frame, textvariable=row_data["store_var"],
-                                values=STORE_OPTIONS, width=8, state='readonly')
-        store_cb.pack(side=tk.LEFT, padx=2)
-        row_data["store_combobox"] = store_cb
-
-        # Price
-        ttk.Label(row_frame, text="Price ($):").pack(side=tk.LEFT, padx=2)
-        price_entry = ttk.Entry(
-            row_frame, textvariable=row_data["price_var"], width=7)
-        price_entry.pack(side=tk.LEFT, padx=2)
-
-        # Quantity
-        ttk.Label(row_frame, text="Quantity:").pack(side=tk.LEFT, padx=2)
-        qty_entry = ttk.Entry(
-            row_frame, textvariable=row_data["quantity_var"], width=7)
-        qty_entry.pack(side=tk.LEFT, padx=2)
-
-        # Unit Type Combobox
-        ttk.Label(row_frame, text="Type:").pack(side=tk.LEFT, padx=2)
-        unit_type_cb = ttk.Combobox(row_frame, textvariable=row_data["unit_type_var"],
-                                    values=["Dry", "Liquid"], width=6, state='readonly')
-        unit_type_cb.pack(side=tk.LEFT, padx=2)
-        row_data["unit_type_combobox"] = unit_type_cb
-        # The lambda needs default arg for row_idx, or it will use the loop's last value
-        unit_type_cb.bind("<<ComboboxSelected>>", lambda event, r_idx=row_idx: self._on_unit_type_selected(
-            r_idx, is_initial_call=is_initial_row))
-
-        # Unit Combobox
-        ttk.Label(row_frame, text="Unit:").pack(side=tk.LEFT, padx=2)
-        unit_cb = ttk.Combobox(
-            row_frame, textvariable=row_data["unit_var"], width=12, state=tk.DISABLED)
-        unit_cb.pack(side=tk.LEFT, padx=2)
-        row_data["unit_combobox"] = unit_cb
-
-        # URL field
-        ttk.Label(row_frame, text="URL:").pack(side=tk.LEFT, padx=2)
-        url_entry = ttk.Entry(
-            row_frame, textvariable=row_data["url_var"], width=30)
-        url_entry.pack(side=tk.LEFT, padx=2)
-
-        # Remove Button for the row (optional, but good UX)
-        remove_button = ttk.Button(
-            row_frame, text="-", command=lambda r_idx=row_idx: self.remove_input_row(r_idx), width=3)
-        remove_button.pack(side=tk.LEFT, padx=2)
-        # Store to potentially disable
-        row_data["remove_button"] = remove_button
+            row_data["name"] = prev_row["name"]
+            row_data["store"] = prev_row["store"]
+            row_data["unit_type"] = prev_row["unit_type"]
+            row_data["unit"] = prev_row["unit"]
+
+        # If session type already set (i.e., not the very first row action)
+        if self.session_unit_type:
+            row_data["unit_type"] = self.session_unit_type
 
         self.input_rows_data.append(row_data)
 
@@ -341,28 +574,13 @@ class UnitCostCalculatorApp:
         if not is_initial_row:  # Don't mark unsaved for the initial empty row
             self.mark_unsaved()
         if self.current_filename:  # Only auto-save if we have a saved file
-            self.root.after_idle(self.auto_save)
+            self.auto_save()
         # Auto-calculate when adding new rows
         if not is_initial_row:
-            self.root.after_idle(self.auto_calculate)
+            self._dirty_rows[row_data["row_id"]] = row_data
+            self._schedule_auto_calculate()
 
-        # If session type already set (i.e., not the very first row action)
-        if self.session_unit_type:
-            row_data["unit_type_var"].set(self.session_unit_type)
-            unit_type_cb.config(state=tk.DISABLED)
-            self._on_unit_type_selected(row_idx)  # Populate units
-        elif not is_initial_row:  # Adding subsequent rows before type is selected
-            # Keep disabled until first row sets type
-            unit_type_cb.config(state=tk.DISABLED)
-            # If we copied a unit type from previous row, apply it
-            if row_data["unit_type_var"].get():
-                self._on_unit_type_selected(row_idx, is_initial_call=False)
-
-        if len(self.input_rows_data) == 1:  # Only one row
-            remove_button.config(state=tk.DISABLED)
-        elif len(self.input_rows_data) > 1 and self.input_rows_data[0]["remove_button"]["state"] == tk.DISABLED:
-            # Enable remove for first row if another is added
-            self.input_rows_data[0]["remove_button"].config(state=tk.NORMAL)
+        self._refresh_input_grid(scroll_to=len(self.input_rows_data) - 1)
 
     def add_input_row_button_action(self):
         self.add_input_row(is_initial_row=False)
@@ -373,136 +591,426 @@ class UnitCostCalculatorApp:
                 "Info", "Cannot remove the last row. Use Reset All instead.")
             return
 
-        self.input_row_frames[row_idx_to_remove].destroy()
-        del self.input_row_frames[row_idx_to_remove]
         del self.input_rows_data[row_idx_to_remove]
 
-        # Re-label rows and update remove button commands and states
-        for i, frame in enumerate(self.input_row_frames):
-            # Update label (first child of frame is the index label)
-            label_widget = frame.winfo_children()[0]
-            label_widget.config(text=f"{i+1}.")
-            # Update remove button command
-            remove_button_widget = self.input_rows_data[i]["remove_button"]
-            remove_button_widget.config(
-                command=lambda r_idx=i: self.remove_input_row(r_idx))
+        # Renumber the rows after the removed one
+        for i in range(row_idx_to_remove, len(self.input_rows_data)):
+            self.input_rows_data[i]["position"] = i
+        self._refresh_input_grid()
 
-        if len(self.input_rows_data) == 1:  # If back to one row
-            self.input_rows_data[0]["remove_button"].config(state=tk.DISABLED)
-
-        # Update scrollregion
-        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+        # Default product names depend on row positions, so recompute all
+        self._invalidate_results()
 
         # Mark as unsaved and auto-save after removing row
         self.mark_unsaved()
         if self.current_filename:  # Only auto-save if we have a saved file
-            self.root.after_idle(self.auto_save)
+            self.auto_save()
         # Auto-calculate after removing rows
-        self.root.after_idle(self.auto_calculate)
+        self._schedule_auto_calculate()
 
+    @perf.instrument("calculate_costs", rows=_input_row_count)
     def calculate_costs(self):
         if not self.session_unit_type:
             messagebox.showerror(
                 "Error", "Please select a Unit Type for the first item.")
             return
 
-        products_data = []
-        valid_input_found = False
-
-        for i, row_data_vars in enumerate(self.input_rows_data):
-            name = row_data_vars["name_var"].get().strip()
-            price_str = row_data_vars["price_var"].get()
-            quantity_str = row_data_vars["quantity_var"].get()
-            unit = row_data_vars["unit_var"].get()
-            store = row_data_vars["store_var"].get()
-            url = row_data_vars["url_var"].get().strip()
-            # Should be self.session_unit_type
-            unit_type = row_data_vars["unit_type_var"].get()
-
-            if not name and not price_str and not quantity_str and not unit:  # Skip entirely empty rows silently
-                continue
-
-            if not name:
-                name = f"Product {i+1}"  # Default name
-
-            try:
-                price = float(price_str)
-                quantity = float(quantity_str)
-                if price < 0 or quantity <= 0:
-                    raise ValueError(
-                        "Price must be non-negative and quantity must be positive.")
-                if not unit:
-                    raise ValueError("Unit must be selected.")
-            except ValueError as e:
-                messagebox.showerror(
-                    "Input Error", f"Row {i+1}: Invalid input for price, quantity, or unit.\nDetails: {e}")
-                continue
-
-            valid_input_found = True
-            base_unit_conversion_map = DRY_UNITS_TO_BASE if unit_type == "Dry" else LIQUID_UNITS_TO_BASE
-
-            if unit not in base_unit_conversion_map:
-                messagebox.showerror(
-                    "Error", f"Row {i+1}: Unit '{unit}' is not recognized for type '{unit_type}'.")
-                continue
+        # A full calculation rebuilds the per-row cache from scratch
+        self._row_results.clear()
+        self._ranking.clear()
+        self._groups.clear()
+        self._dirty_rows.clear()
+        self._results_cache_valid = True
 
-            qty_in_base_unit = quantity * base_unit_conversion_map[unit]
-            price_per_base_unit = price / qty_in_base_unit
-
-            products_data.append({
-                "name": name,
-                "original_price": price,
-                "original_quantity": quantity,
-                "original_unit": unit,
-                "unit_type": unit_type,
-                "store": store,
-                "url": url,
-                "price_per_base_unit": price_per_base_unit
-            })
-
-        if not valid_input_found:
-            messagebox.showinfo(
-                "Info", "No valid product data entered to calculate.")
-            # Clear previous results if any
-            for item in self.results_tree.get_children():
-                self.results_tree.delete(item)
-            self.results_tree["columns"] = []
-            return
+        # One validation pass over every row. This runs while the user is
+        # still typing, so invalid rows are highlighted, never reported in
+        # modal dialogs.
+        validation = validate_rows(self.input_rows_data)
+        self._set_row_errors({error.row_id: error for error in validation.errors})
+        products_data = validation.products
 
-        if not products_data:  # Handles case where rows had partial data but failed validation
+        if not products_data:
+            # Nothing valid to show (rows with partial data failed validation)
+            self._clear_results()
             return
 
-        # Sort by price_per_base_unit (best value first)
-        products_data.sort(key=lambda p: p["price_per_base_unit"])
+        if self.group_by_product:
+            # One ranking of every row: each product's rows come out of it
+            # in order, so the groups are filled in a single pass
+            products_data = rank_products(
+                products_data, self.session_unit_type, exact=self.exact_ranking)
+            self._groups.reset(
+                (p["row_id"], product_group_key(p["name"]), self._rank_key(p))
+                for p in products_data)
+        elif self.results_page_size is None:
+            # Price every row in one batched pass and sort by
+            # price_per_base_unit (best value first)
+            products_data = rank_products(
+                products_data, self.session_unit_type, exact=self.exact_ranking)
+            self._ranking.reset(
+                (p["row_id"], self._rank_key(p)) for p in products_data)
+        else:
+            # Paged: price every row but leave ranking to the page selection
+            products_data = price_products(products_data, self.session_unit_type)
+        for product in products_data:
+            self._row_results[product["row_id"]] = product
 
         # Display results
-        self._display_results(products_data)
+        self._show_results()
+
+    def _set_row_errors(self, row_errors):
+        """Replace the validation errors and update highlights and summary"""
+        self._row_errors = row_errors
+        self.input_grid.refresh_errors()
+        self._update_validation_summary()
+
+    def _update_validation_summary(self):
+        errors = sorted(self._row_errors.values(), key=lambda error: error.index)
+        if not errors:
+            text = ""
+        elif len(errors) == 1:
+            text = "⚠ " + errors[0].message.replace("\n", " ")
+        else:
+            listed = ", ".join(f"{error.index+1} ({error.field})"
+                               for error in errors[:MAX_LISTED_ERRORS])
+            more = " …" if len(errors) > MAX_LISTED_ERRORS else ""
+            text = f"⚠ {len(errors)} rows need fixing: {listed}{more}"
+        self.validation_label.config(text=text)
+
+    def show_first_invalid_row(self):
+        """Scroll the input grid to the first row with a validation error"""
+        if not self._row_errors:
+            return
+        row_ids = self._row_errors.keys()
+        for index, row_data in enumerate(self.input_rows_data):
+            if row_data.row_id in row_ids:
+                self.input_grid.scroll_to(index)
+                return
 
-    def _display_results(self, products_data):
-        # Clear previous results
-        for item in self.results_tree.get_children():
-            self.results_tree.delete(item)
+    def _recalculate_dirty_rows(self):
+        """Recompute only the rows edited since the last calculation.
+
+        Each row is priced on its own and re-positioned in the ranking with
+        a binary search, instead of re-validating and re-sorting every row.
+        When grouped by product, only the row's own group is re-ranked.
+
+        Returns:
+            The keys of the product groups that changed.
+        """
+        dirty_rows = list(self._dirty_rows.values())
+        self._dirty_rows.clear()
+        errors_changed = False
+        changed_groups = set()
+        for row_data in dirty_rows:
+            row_id = row_data["row_id"]
+            product, error = validate_row(row_data, row_data["position"])
+            if error is not None:
+                errors_changed = errors_changed or self._row_errors.get(row_id) != error
+                self._row_errors[row_id] = error
+            elif self._row_errors.pop(row_id, None) is not None:
+                errors_changed = True
+            if product is not None and price_product(product, self.session_unit_type):
+                self._row_results[row_id] = product
+                if self.group_by_product:
+                    group_key = product_group_key(product["name"])
+                    changed_groups.add(group_key)
+                    changed_groups.add(
+                        self._groups.set(row_id, group_key, self._rank_key(product)))
+                elif self.results_page_size is None:
+                    self._ranking.set(row_id, self._rank_key(product))
+            else:
+                self._row_results.pop(row_id, None)
+                self._ranking.discard(row_id)
+                changed_groups.add(self._groups.discard(row_id))
+        if errors_changed:
+            self.input_grid.refresh_errors()
+            self._update_validation_summary()
+        changed_groups.discard(None)
+        return changed_groups
+
+    def _rank_key(self, product):
+        """The product's key in the ranking index"""
+        if self.exact_ranking:
+            return exact_price_key(product, self.session_unit_type)
+        return product["price_per_base_unit"]
+
+    def _invalidate_results(self):
+        """Drop cached results so the next auto-calculate recomputes every row"""
+        self._results_cache_valid = False
+        self._dirty_rows.clear()
+
+    def _show_results(self, changed_groups=None):
+        """Display the cached results: all of them, or the current page.
+
+        Args:
+            changed_groups: When grouped by product, the groups to redraw
+                (all when None).
+        """
+        if self.group_by_product:
+            self._display_grouped_results(changed_groups)
+            return
+        if self.results_page_size is None:
+            if self._ranking:
+                self._display_results(
+                    [self._row_results[row_id] for row_id in self._ranking])
+            else:
+                self._clear_results()
+            return
 
+        total = len(self._row_results)
+        if not total:
+            self._clear_results()
+            return
+        last_page = (total - 1) // self.results_page_size
+        self.results_page = min(self.results_page, last_page)
+        start = self.results_page * self.results_page_size
+        # Row ids break ties, matching the full ranking's order
+        page = best_products(
+            self._row_results.values(), self.results_page_size, start,
+            key=lambda p: (p["price_per_base_unit"], p["row_id"]),
+            exact_key=(lambda p: (exact_price_key(p, self.session_unit_type), p["row_id"]))
+            if self.exact_ranking else None)
+        for product in page:
+            fill_unit_prices(product, self.session_unit_type)
+        self._display_results(page, first_rank=start, total=total)
+
+    def set_results_page_size(self, page_size):
+        """Switch between showing all results (None) and pages of results"""
+        if page_size == self.results_page_size:
+            return
+        self.results_page_size = page_size
+        self.results_page = 0
+        label = next((name for name, size in RESULTS_PAGE_SIZES.items()
+                      if size == page_size), f"Top {page_size}")
+        if self.results_page_size_var.get() != label:
+            self.results_page_size_var.set(label)
+        # The full ranking index is only kept when showing everything
+        self._ranking.clear()
+        self._groups.clear()
+        self._invalidate_results()
+        self.auto_calculate()
+
+    def set_exact_ranking(self, enabled):
+        """Switch between the float ranking and the exact one"""
+        if self.exact_ranking_var.get() != enabled:
+            self.exact_ranking_var.set(enabled)
+        if enabled == self.exact_ranking:
+            return
+        self.exact_ranking = enabled
+        # Index keys differ between the two modes
+        self._ranking.clear()
+        self._groups.clear()
+        self._invalidate_results()
+        self.auto_calculate()
+
+    def set_group_by_product(self, enabled):
+        """Switch between one ranked list and a ranked group per product"""
+        if self.group_by_product_var.get() != enabled:
+            self.group_by_product_var.set(enabled)
+        if enabled == self.group_by_product:
+            return
+        self.group_by_product = enabled
+        # Every group is shown, so there are no pages while grouped
+        self.page_size_combobox.config(state=tk.DISABLED if enabled else 'readonly')
+        self._ranking.clear()
+        self._groups.clear()
+        self._invalidate_results()
+        self.auto_calculate()
+
+    def change_results_page(self, delta):
+        """Show the previous (-1) or next (+1) page of results"""
+        if self.results_page_size is None or self.group_by_product:
+            return
+        self.results_page = max(0, self.results_page + delta)
+        self._show_results()
+
+    def _update_results_pager(self, first_rank, shown, total):
+        if not total:
+            text = ""
+        elif shown == total:
+            text = f"{total} result{'s' if total != 1 else ''}"
+        else:
+            text = f"{first_rank + 1}–{first_rank + shown} of {total}"
+        self.results_count_label.config(text=text)
+        self.prev_page_button.config(
+            state=tk.NORMAL if first_rank > 0 else tk.DISABLED)
+        self.next_page_button.config(
+            state=tk.NORMAL if first_rank + shown < total else tk.DISABLED)
+
+    @perf.instrument("_display_results", rows=lambda self, products_data, *args, **kwargs: len(products_data))
+    def _display_results(self, products_data, first_rank=0, total=None):
+        """Show ranked products, updating only the rows that changed.
+
+        The tree is reconciled against what is already shown: stale items
+        are deleted, and existing items are only moved or rewritten when
+        their rank or values changed. Columns and tags are set up again only
+        when the session unit type changes.
+
+        Args:
+            products_data: Products to show, best first.
+            first_rank: Overall rank of the first product (when paging).
+            total: Number of ranked products in all pages (defaults to
+                len(products_data)).
+        """
         if not products_data:
-            self.results_tree["columns"] = []
+            self._clear_results()
             return
 
+        self._prepare_results_view()
+        self._update_results_pager(
+            first_rank, len(products_data),
+            len(products_data) if total is None else total)
+
+        new_order = [product["row_id"] for product in products_data]
+        new_row_ids = set(new_order)
+
+        # Delete items for products that are no longer shown
+        stale_iids = [self._result_items.pop(row_id)[0]
+                      for row_id in self._result_order if row_id not in new_row_ids]
+        if stale_iids:
+            self.results_tree.delete(*stale_iids)
+        shown_order = [row_id for row_id in self._result_order
+                       if row_id in self._result_items]
+
+        best_row_id = new_order[0] if first_rank == 0 else None
+        self._result_order = self._sync_result_items(
+            "", products_data, shown_order, best_row_id)
+        self._request_price_history(products_data)
+
+    @perf.instrument("_display_grouped_results",
+                     rows=lambda self, *args, **kwargs: self._groups.row_count())
+    def _display_grouped_results(self, changed_groups=None):
+        """Show one collapsible parent per product with its rows ranked under it.
+
+        Only the groups in ``changed_groups`` are reconciled (all of them
+        when None), so an edit redraws a single product. The best row of
+        each group is tagged as its best buy, and the parent repeats that
+        row's prices so they can be read with the group collapsed.
+        """
+        groups = self._groups
+        if not groups:
+            self._clear_results()
+            return
+        if self._prepare_results_view():
+            changed_groups = None  # The tree was reset
+        if changed_groups is None:
+            changed_groups = set(groups).union(self._group_items)
+
+        # Delete rows that left their group before any are inserted again:
+        # a renamed row moves to another group
+        for group_key in changed_groups:
+            shown = self._group_items.get(group_key)
+            if shown is None:
+                continue
+            if group_key not in groups:
+                self.results_tree.delete(shown[0])
+                for row_id in self._group_children.pop(group_key):
+                    del self._result_items[row_id]
+                del self._group_items[group_key]
+                continue
+            children = self._group_children[group_key]
+            stale_iids = [self._result_items.pop(row_id)[0] for row_id in children
+                          if groups.group_of(row_id) != group_key]
+            if stale_iids:
+                self.results_tree.delete(*stale_iids)
+                self._group_children[group_key] = [
+                    row_id for row_id in children if row_id in self._result_items]
+
+        # In key order, so each new parent goes in after the ones before it
+        redrawn = []
+        for group_key in sorted(changed_groups):
+            if group_key not in groups:
+                continue
+            products_data = [self._row_results[row_id]
+                             for row_id in groups.rows(group_key)]
+            best = products_data[0]
+            values = self._format_group_values(best, len(products_data))
+            shown = self._group_items.get(group_key)
+            if shown is None:
+                iid = self.results_tree.insert(
+                    "", groups.position(group_key), open=True, values=values,
+                    tags=("product_group",))
+                self._group_items[group_key] = (iid, values)
+                self._group_children[group_key] = []
+            else:
+                iid, shown_values = shown
+                if shown_values != values:
+                    self.results_tree.item(iid, values=values)
+                    self._group_items[group_key] = (iid, values)
+            self._group_children[group_key] = self._sync_result_items(
+                iid, products_data, self._group_children[group_key], best["row_id"])
+            redrawn.extend(products_data)
+        self._request_price_history(redrawn)
+
+        total = groups.row_count()
+        self._update_results_pager(0, total, total)
+        self.results_count_label.config(
+            text=f"{total} result{'s' if total != 1 else ''} in "
+                 f"{len(groups)} product{'s' if len(groups) != 1 else ''}")
+
+    def _sync_result_items(self, parent, products_data, shown_order, best_row_id):
+        """Insert, rewrite and move items so ``parent`` lists ``products_data``.
+
+        Args:
+            parent: Tree item the products are listed under ("" for the
+                top level).
+            products_data: Products to show there, in order.
+            shown_order: Row ids currently shown under ``parent``, in order.
+                Items of products that are no longer shown must already be
+                deleted.
+            best_row_id: Row id to tag as the best buy, or None.
+
+        Returns:
+            The row ids shown under ``parent``, in order.
+        """
+        for i, product in enumerate(products_data):
+            row_id = product["row_id"]
+            values = self._format_result_values(product)
+            tag = "best_buy" if row_id == best_row_id else "normal"
+
+            shown = self._result_items.get(row_id)
+            if shown is None:
+                iid = self.results_tree.insert(
+                    parent, i, values=values, tags=(tag,))
+                self._result_items[row_id] = (iid, values, tag)
+                shown_order.insert(i, row_id)
+                continue
+
+            iid, shown_values, shown_tag = shown
+            if shown_values != values or shown_tag != tag:
+                self.results_tree.item(iid, values=values, tags=(tag,))
+                self._result_items[row_id] = (iid, values, tag)
+            if shown_order[i] != row_id:
+                self.results_tree.move(iid, parent, i)
+                shown_order.remove(row_id)
+                shown_order.insert(i, row_id)
+        return shown_order
+
+    def _prepare_results_view(self):
+        """Set the tree up for the unit type and view; True if it was reset"""
+        if (self._results_unit_type == self.session_unit_type
+                and self._results_grouped == self.group_by_product):
+            return False
+        self._clear_results()
+        self._configure_results_columns()
+        return True
+
+    def _configure_results_columns(self):
+        """Set up result columns and tags for the session unit type"""
         # Define columns based on session type
         common_cols = ["Product", "Store",
                        "Orig. Price", "Orig. Qty", "Orig. Unit"]
-        if self.session_unit_type == "Dry":
-            output_unit_cols = list(DRY_OUTPUT_UNITS.keys())
-            price_format_precision = {"per g": 5,
-                                      "per oz (weight)": 4, "per lb": 2, "per kg": 2}
-            output_units_map = DRY_OUTPUT_UNITS
-        else:  # Liquid
-            output_unit_cols = list(LIQUID_OUTPUT_UNITS.keys())
-            price_format_precision = {"per ml": 5,
-                                      "per fl oz (US)": 4, "per L": 2}
-            output_units_map = LIQUID_OUTPUT_UNITS
+        table = unit_table(self.session_unit_type)
+        output_unit_cols = table.output_names
 
         all_cols = common_cols + \
             [f"$ {col_name}" for col_name in output_unit_cols]
+        if self.price_history is not None:
+            # The window's lowest price, in the first output unit
+            all_cols += [f"$ {self.price_history_days}-day low {output_unit_cols[0]}",
+                         "Trend"]
+            self._history_low_format = (
+                table.output_factors[0], f"${{:.{table.precision[0]}f}}")
         self.results_tree["columns"] = all_cols
 
         for col_name in all_cols:
@@ -513,47 +1021,208 @@ class UnitCostCalculatorApp:
                 self.results_tree.column(col_name, anchor=tk.W, width=80)
             elif "Orig." in col_name:
                 self.results_tree.column(col_name, anchor=tk.E, width=80)
+            elif "-day low" in col_name:
+                self.results_tree.column(col_name, anchor=tk.E, width=130)
             elif "$" in col_name:
                 self.results_tree.column(col_name, anchor=tk.E, width=100)
             else:
                 self.results_tree.column(col_name, anchor=tk.W, width=100)
 
-        for i, product in enumerate(products_data):
-            values = [
-                product["name"],
-                product["store"] if product["store"] else "",
-                f"${product['original_price']:.2f}",
-                f"{product['original_quantity']}",
-                product["original_unit"]
-            ]
-            for unit_name, factor_from_base in output_units_map.items():
-                # price_per_output_unit = price_per_base_unit * base_units_per_output_unit
-                price_val = product["price_per_base_unit"] * factor_from_base
-                precision = price_format_precision.get(unit_name, 2)
-                values.append(f"${price_val:.{precision}f}")
-
-            tag = "best_buy" if i == 0 else "normal"
-            self.results_tree.tag_configure(
-                "best_buy", background="lightgreen")
-            self.results_tree.insert("", tk.END, values=values, tags=(tag,))
+        self.results_tree.tag_configure("best_buy", background="lightgreen")
+        # Grouped results show the tree column, which holds the expand arrows
+        if self.group_by_product:
+            self.results_tree.configure(show='tree headings')
+            self.results_tree.column("#0", width=30, stretch=False)
+            self.results_tree.tag_configure("product_group", background="gray92")
+        else:
+            self.results_tree.configure(show='headings')
+        self._results_grouped = self.group_by_product
+
+        # (output unit, format string) pairs, one per price column; the
+        # precision comes from the unit registry
+        self._results_price_columns = [
+            (unit_name, f"${{:.{precision}f}}")
+            for unit_name, precision in zip(table.output_names, table.precision)]
+        self._results_unit_type = self.session_unit_type
+
+    def _format_result_values(self, product):
+        """Return the Treeview values tuple for a priced product"""
+        values = [
+            product["name"],
+            product["store"] if product["store"] else "",
+            f"${product['original_price']:.2f}",
+            f"{product['original_quantity']}",
+            product["original_unit"]
+        ]
+        unit_prices = product["unit_prices"]
+        for unit_name, price_format in self._results_price_columns:
+            # Computed by the pricing engine, one multiply per column
+            values.append(price_format.format(unit_prices[unit_name]))
+        if self.price_history is not None:
+            values.extend(self._format_history_values(product))
+        return tuple(values)
+
+    def _history_key(self, product):
+        """The product's price history key, computed once per product"""
+        key = product.get("history_key")
+        if key is None:
+            key = product["history_key"] = history_key(
+                self.session_unit_type, product["name"], product["store"])
+        return key
+
+    def _format_history_values(self, product):
+        """Values of the price history columns: the window's low and trend"""
+        stats = self._history_stats.get(self._history_key(product))
+        if stats is None:
+            return "", ""
+        factor, price_format = self._history_low_format
+        change = stats.change
+        if stats.count < 2:
+            trend = "–"
+        elif abs(change) < STEADY_PRICE_CHANGE:
+            trend = "→ steady"
+        else:
+            trend = f"{'▲' if change > 0 else '▼'} {abs(change):.0%}"
+        return price_format.format(stats.low * factor), trend
+
+    def _record_price_history(self, unit_type, products):
+        """Append saved rows to the price history (any thread)"""
+        if self.price_history is not None:
+            self.price_history.record_async(unit_type, products)
+
+    def _record_session_history(self, session):
+        """Record a saved session that is being closed in the price history.
+
+        History is recorded on explicit saves and on close only: auto-saves
+        run after short pauses in typing and would record half-typed prices,
+        which the append-only history could never drop.
+        """
+        if session.filename and not session.loading:
+            self._record_price_history(
+                session.unit_type, self._products_for_save(session.rows))
+
+    def _watch_price_history(self):
+        """Refresh shown history once the recordings queued so far are done"""
+        if self.price_history is None:
+            return
+        barrier = self.price_history.barrier()
+
+        def poll():
+            if not barrier.done():
+                self.root.after(HISTORY_POLL_INTERVAL_MS, poll)
+                return
+            keys = self.price_history.take_recorded()
+            if not keys:
+                return
+            # Lookups still running may have read the history before these
+            # observations; their results are discarded
+            self._history_generation += 1
+            for key in keys:
+                self._history_stats.pop(key, None)
+            self._request_shown_price_history(keys)
+        self.root.after(HISTORY_POLL_INTERVAL_MS, poll)
+
+    def _request_price_history(self, products_data):
+        """Look up the history of shown products not looked up yet"""
+        if self.price_history is None:
+            return
+        keys = {self._history_key(product) for product in products_data}
+        keys.difference_update(self._history_stats, self._history_pending)
+        if not keys:
+            return
+        self._history_pending.update(keys)
+        future = self.price_history.lookup_async(keys, self.price_history_days)
+        generation = self._history_generation
+        self.root.after(HISTORY_POLL_INTERVAL_MS,
+                        lambda: self._poll_price_history(future, keys, generation))
+
+    def _request_shown_price_history(self, keys):
+        """Look up ``keys`` again for the products shown with them"""
+        self._request_price_history([
+            product for product in map(self._row_results.get, self._result_items)
+            if product is not None and self._history_key(product) in keys])
+
+    def _poll_price_history(self, future, keys, generation):
+        if not future.done():
+            self.root.after(HISTORY_POLL_INTERVAL_MS,
+                            lambda: self._poll_price_history(future, keys, generation))
+            return
+        self._history_pending.difference_update(keys)
+        if generation != self._history_generation:
+            self._request_shown_price_history(keys)
+            return
+        stats = future.result()
+        # Keys the lookup couldn't read show no history rather than retrying
+        self._history_stats.update(dict.fromkeys(keys))
+        self._history_stats.update(stats)
+        self._refresh_history_columns(keys)
+
+    def _refresh_history_columns(self, keys):
+        """Rewrite the shown items whose history was just looked up"""
+        for row_id, (iid, values, tag) in self._result_items.items():
+            product = self._row_results.get(row_id)
+            if (product is None or "unit_prices" not in product
+                    or self._history_key(product) not in keys):
+                continue
+            new_values = self._format_result_values(product)
+            if new_values != values:
+                self.results_tree.item(iid, values=new_values)
+                self._result_items[row_id] = (iid, new_values, tag)
+        for group_key, (iid, values) in self._group_items.items():
+            if group_key not in self._groups:
+                continue
+            rows = self._groups.rows(group_key)
+            best = self._row_results[rows[0]]
+            if self._history_key(best) not in keys:
+                continue
+            new_values = self._format_group_values(best, len(rows))
+            if new_values != values:
+                self.results_tree.item(iid, values=new_values)
+                self._group_items[group_key] = (iid, new_values)
+
+    def _format_group_values(self, best, count):
+        """Values of a product's parent item: its name and best prices"""
+        values = list(self._format_result_values(best))
+        values[1] = f"{count} offer{'s' if count != 1 else ''}"
+        values[2:5] = ["", "", ""]  # Original price, quantity and unit
+        return tuple(values)
+
+    def _clear_results(self):
+        """Remove all results and columns from the results view"""
+        self.results_tree.delete(*self.results_tree.get_children())
+        self.results_tree["columns"] = []
+        self._result_items.clear()
+        self._result_order = []
+        self._group_items.clear()
+        self._group_children.clear()
+        self._results_unit_type = None
+        self._update_results_pager(0, 0, 0)
 
     def update_save_status(self, is_saved=True, from_loading=False):
         """Update the save status indicators"""
         self.is_saved = is_saved
+        if is_saved and self.current_filename and not from_loading:
+            # Only update timestamp for actual saves, not loading
+            self.last_save_time = datetime.now()
+        self._show_save_status()
+
+    def _show_save_status(self):
+        """Show the active session's save state in the labels and its tab"""
         if not self.current_filename:  # No filename means untitled session
             self.save_status_label.config(text="", foreground="gray")
             self.last_save_label.config(text="Untitled Session")
-        elif is_saved:
-            self.save_status_label.config(text="● Saved", foreground="green")
-            if not from_loading:  # Only update timestamp for actual saves, not loading
-                self.last_save_time = datetime.now()
+        else:
+            if self.is_saved:
+                self.save_status_label.config(text="● Saved", foreground="green")
+            else:
+                self.save_status_label.config(
+                    text="● Unsaved", foreground="orange")
+            if self.last_save_time is not None:
                 time_str = self.last_save_time.strftime("%H:%M:%S")
                 self.last_save_label.config(text=f"Last saved: {time_str}")
-            else:  # When loading, just show that it's loaded
+            else:  # Not saved since loading, just show that it's loaded
                 self.last_save_label.config(text="Loaded from file")
-        else:
-            self.save_status_label.config(
-                text="● Unsaved", foreground="orange")
+        self._update_tab_label(self.session)
 
     def mark_unsaved(self):
         """Mark the session as having unsaved changes"""
@@ -562,90 +1231,136 @@ class UnitCostCalculatorApp:
             # Re-enable manual save option since there are unsaved changes
             self.file_menu.entryconfig("Save Session...", state=tk.NORMAL)
 
+    @perf.instrument("auto_save")
     def auto_save(self):
-        """Auto-save the session if it has been previously saved"""
+        """Auto-save the session if it has been previously saved.
+
+        Saves are debounced: a burst of edits results in one background
+        write once the user pauses (see AutoSaveScheduler).
+        """
         if not self.current_filename:
             return  # No filename set, don't auto-save
+        if self.loading_session:
+            return  # Never write a partly loaded session over its file
+        if self._bulk_depth:
+            self._bulk_pending.add("save")
+            return
+        self.auto_saver.request()
+
+    @perf.instrument("_auto_save_snapshot",
+                     rows=lambda self, session: len(session.rows))
+    def _auto_save_snapshot(self, session):
+        """Capture a session for a background save (runs on the Tk thread).
+
+        The session's tab may have been hidden since the save was requested,
+        so this reads the Session rather than the active one.
+        """
+        if not session.filename or session.loading:
+            return None
+        return {
+            "filename": session.filename,
+            "title": session.title,
+            "unit_type": session.unit_type,
+            "products": self._products_for_save(session.rows),
+        }
 
-        try:
-            # Create XML structure (same as save_session but without dialog)
-            root_elem = ET.Element("session")
-
-            # Add session title
-            title_elem = ET.SubElement(root_elem, "title")
-            title_elem.text = self.session_title
-
-            # Add unit type
-            if self.session_unit_type:
-                unit_type_elem = ET.SubElement(root_elem, "unit_type")
-                unit_type_elem.text = self.session_unit_type
-
-            # Add products
-            products_elem = ET.SubElement(root_elem, "products")
-
-            for row_data in self.input_rows_data:
-                # Only save rows with some data
-                if (row_data["name_var"].get().strip() or
-                    row_data["price_var"].get().strip() or
-                    row_data["quantity_var"].get().strip() or
-                    row_data["store_var"].get().strip() or
-                        row_data["url_var"].get().strip()):
-
-                    product_elem = ET.SubElement(products_elem, "product")
-
-                    name_elem = ET.SubElement(product_elem, "name")
-                    name_elem.text = row_data["name_var"].get().strip()
-
-                    price_elem = ET.SubElement(product_elem, "price")
-                    price_elem.text = row_data["price_var"].get().strip()
-
-                    quantity_elem = ET.SubElement(product_elem, "quantity")
-                    quantity_elem.text = row_data["quantity_var"].get().strip()
-
-                    unit_type_elem = ET.SubElement(product_elem, "unit_type")
-                    unit_type_elem.text = row_data["unit_type_var"].get()
-
-                    unit_elem = ET.SubElement(product_elem, "unit")
-                    unit_elem.text = row_data["unit_var"].get()
-
-                    store_elem = ET.SubElement(product_elem, "store")
-                    store_elem.text = row_data["store_var"].get()
-
-                    url_elem = ET.SubElement(product_elem, "url")
-                    url_elem.text = row_data["url_var"].get().strip()
-
-            # Write to file
-            tree = ET.ElementTree(root_elem)
-            ET.indent(tree, space="  ", level=0)  # Pretty formatting
-            tree.write(self.current_filename,
-                       encoding="utf-8", xml_declaration=True)
-
-            # Update save status
-            self.update_save_status(True)
-
-            # Disable manual save option since auto-save just happened
-            self.file_menu.entryconfig("Save Session...", state=tk.DISABLED)
+    def _write_auto_save(self, filename, title, unit_type, products):
+        """Auto-save writer (worker thread): the session, then its snapshot"""
+        write_session(filename, title, unit_type, products)
+        # There is one snapshot slot, for the session reopened first
+        if same_file(filename, self.config.get("last_session_file")):
+            self.session_snapshots.refresh(filename, title, unit_type, products)
 
-        except Exception as e:
+    def _on_auto_save_done(self, session, error):
+        """Report a finished background auto-save of ``session``"""
+        if error is not None:
             # Silently fail auto-save to not interrupt user workflow
-            print(f"Auto-save failed: {e}")
+            print(f"Auto-save failed: {error}")
+            return
+
+        if session is not self.session:
+            # Hidden tab: its labels are shown again when it is selected
+            session.is_saved = True
+            session.last_save_time = datetime.now()
+            self._update_tab_label(session)
+            return
 
+        # Update save status
+        self.update_save_status(True)
+
+        # Disable manual save option since auto-save just happened
+        self.file_menu.entryconfig("Save Session...", state=tk.DISABLED)
+
+    def _products_for_save(self, rows=None):
+        """Return the rows with some data as plain product dicts for saving.
+
+        Args:
+            rows: Row records to save (defaults to the active session's).
+        """
+        products = []
+        for row_data in self.input_rows_data if rows is None else rows:
+            # Only save rows with some data (ProductRow attributes, no
+            # per-field lookups: this runs for every auto-save)
+            name = row_data.name.strip()
+            price = row_data.price.strip()
+            quantity = row_data.quantity.strip()
+            url = row_data.url.strip()
+            if name or price or quantity or row_data.store.strip() or url:
+                products.append({
+                    "name": name,
+                    "price": price,
+                    "quantity": quantity,
+                    "unit_type": row_data.unit_type,
+                    "unit": row_data.unit,
+                    "store": row_data.store,
+                    "url": url,
+                })
+        return products
+
+    def on_close(self):
+        """Flush pending auto-saves, then close the window"""
+        if not self._started:
+            self._started = True
+            self.root.after_cancel(self._first_frame_after_id)
+        self.loop_monitor.stop()
+        for session in self.sessions:
+            if session.load_reader is not None:
+                session.load_reader.close()
+            if session.importer is not None:
+                session.importer.cancel()
+            session.auto_saver.shutdown()
+            self._record_session_history(session)
+        self.session_snapshots.close()
+        if self.price_history is not None:
+            self.price_history.close()
+        self.config.close()
+        self.root.destroy()
+
+    @perf.instrument("auto_calculate", rows=_input_row_count)
     def auto_calculate(self):
         """Automatically calculate results if there's meaningful data"""
+        if self._bulk_depth:
+            # Already queued before a bulk update started; run once at its end
+            self._bulk_pending.add("calculate")
+            return
+
         if not self.session_unit_type:
             # Clear results if no session type set
-            for item in self.results_tree.get_children():
-                self.results_tree.delete(item)
-            self.results_tree["columns"] = []
+            self._clear_results()
+            return
+
+        if self._results_cache_valid:
+            if not self._dirty_rows:
+                return  # Nothing changed since the last calculation
+            self._show_results(self._recalculate_dirty_rows())
             return
 
         # Check if any row has meaningful data for calculation
         has_meaningful_data = False
         for row_data in self.input_rows_data:
-            name = row_data["name_var"].get().strip()
-            price_str = row_data["price_var"].get().strip()
-            quantity_str = row_data["quantity_var"].get().strip()
-            unit = row_data["unit_var"].get().strip()
+            price_str = row_data["price"].strip()
+            quantity_str = row_data["quantity"].strip()
+            unit = row_data["unit"].strip()
 
             # Need at least price, quantity, and unit for meaningful calculation
             if price_str and quantity_str and unit:
@@ -661,9 +1376,8 @@ class UnitCostCalculatorApp:
             self.calculate_costs()
         else:
             # Clear results if no meaningful data
-            for item in self.results_tree.get_children():
-                self.results_tree.delete(item)
-            self.results_tree["columns"] = []
+            self._clear_results()
+            self._set_row_errors({})
 
     def new_session(self):
         """Create a new session, checking for unsaved changes"""
@@ -684,11 +1398,11 @@ class UnitCostCalculatorApp:
 
         # Check if there's existing data (even if saved)
         elif self.input_rows_data and any(
-            row_data["name_var"].get().strip() or
-            row_data["price_var"].get().strip() or
-            row_data["quantity_var"].get().strip() or
-            row_data["store_var"].get().strip() or
-            row_data["url_var"].get().strip()
+            row_data["name"].strip() or
+            row_data["price"].strip() or
+            row_data["quantity"].strip() or
+            row_data["store"].strip() or
+            row_data["url"].strip()
             for row_data in self.input_rows_data
         ):
             result = messagebox.askyesno(
@@ -709,64 +1423,39 @@ class UnitCostCalculatorApp:
 
         filename = filedialog.asksaveasfilename(
             defaultextension=".xml",
-            filetypes=[("XML files", "*.xml"), ("All files", "*.*")],
+            filetypes=SESSION_FILETYPES,
             title="Save Session"
         )
 
         if not filename:
             return
 
-        try:
-            # Create XML structure
-            root_elem = ET.Element("session")
-
-            # Add session title (filename without path and extension)
-            title_elem = ET.SubElement(root_elem, "title")
-            title_elem.text = os.path.splitext(os.path.basename(filename))[0]
-
-            # Add unit type
-            if self.session_unit_type:
-                unit_type_elem = ET.SubElement(root_elem, "unit_type")
-                unit_type_elem.text = self.session_unit_type
-
-            # Add products
-            products_elem = ET.SubElement(root_elem, "products")
-
-            for row_data in self.input_rows_data:
-                # Only save rows with some data
-                if (row_data["name_var"].get().strip() or
-                    row_data["price_var"].get().strip() or
-                    row_data["quantity_var"].get().strip() or
-                    row_data["store_var"].get().strip() or
-                        row_data["url_var"].get().strip()):
-
-                    product_elem = ET.SubElement(products_elem, "product")
-
-                    name_elem = ET.SubElement(product_elem, "name")
-                    name_elem.text = row_data["name_var"].get().strip()
-
-                    price_elem = ET.SubElement(product_elem, "price")
-                    price_elem.text = row_data["price_var"].get().strip()
-
-                    quantity_elem = ET.SubElement(product_elem, "quantity")
-                    quantity_elem.text = row_data["quantity_var"].get().strip()
-
-                    unit_type_elem = ET.SubElement(product_elem, "unit_type")
-                    unit_type_elem.text = row_data["unit_type_var"].get()
-
-                    unit_elem = ET.SubElement(product_elem, "unit")
-                    unit_elem.text = row_data["unit_var"].get()
-
-                    store_elem = ET.SubElement(product_elem, "store")
-                    store_elem.text = row_data["store_var"].get()
-
-                    url_elem = ET.SubElement(product_elem, "url")
-                    url_elem.text = row_data["url_var"].get().strip()
+        other = self._find_session(filename)
+        if other is not None and other is not self.session:
+            # Two tabs auto-saving to one file would overwrite each other
+            messagebox.showerror(
+                "Error", f"'{other.title}' is open in another tab.\n"
+                "Close that tab first to save over its file.")
+            return
 
-            # Write to file
-            tree = ET.ElementTree(root_elem)
-            ET.indent(tree, space="  ", level=0)  # Pretty formatting
-            tree.write(filename, encoding="utf-8", xml_declaration=True)
+        try:
+            # Finish pending auto-saves first so they can't land after this save
+            self.auto_saver.flush()
+
+            # Session title is the filename without path and extension;
+            # the extension picks the format (.ucsb is the binary format)
+            products = self._products_for_save()
+            write_session(
+                filename,
+                os.path.splitext(os.path.basename(filename))[0],
+                self.session_unit_type,
+                products,
+            )
+            self.session_snapshots.refresh(
+                filename, os.path.splitext(os.path.basename(filename))[0],
+                self.session_unit_type, products)
+            self._record_price_history(self.session_unit_type, products)
+            self._watch_price_history()
 
             # Update session title and filename for auto-save
             self.session_title = os.path.splitext(
@@ -776,6 +1465,7 @@ class UnitCostCalculatorApp:
 
             # Save as last session for auto-loading
             self.save_last_session_path(filename)
+            self._remember_open_sessions()
 
             # Update save status
             self.update_save_status(True)
@@ -788,14 +1478,18 @@ class UnitCostCalculatorApp:
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save session:\n{str(e)}")
 
-    def load_session(self):
+    def load_session(self, filename=None):
+        """Load a session, asking for the file unless ``filename`` is given"""
+        if filename is not None and self._select_open_session(filename):
+            return
+
         # Warning dialog if there's existing data
         if self.input_rows_data and any(
-            row_data["name_var"].get().strip() or
-            row_data["price_var"].get().strip() or
-            row_data["quantity_var"].get().strip() or
-            row_data["store_var"].get().strip() or
-            row_data["url_var"].get().strip()
+            row_data["name"].strip() or
+            row_data["price"].strip() or
+            row_data["quantity"].strip() or
+            row_data["store"].strip() or
+            row_data["url"].strip()
             for row_data in self.input_rows_data
         ):
             result = messagebox.askyesnocancel(
@@ -806,105 +1500,146 @@ class UnitCostCalculatorApp:
             if result != True:  # User clicked No or Cancel
                 return
 
-        filename = filedialog.askopenfilename(
-            filetypes=[("XML files", "*.xml"), ("All files", "*.*")],
-            title="Load Session"
-        )
+        if filename is None:
+            filename = filedialog.askopenfilename(
+                filetypes=[("Session files", "*.xml *.ucsb")] + SESSION_FILETYPES,
+                title="Load Session"
+            )
 
-        if not filename:
+        if not filename or self._select_open_session(filename):
             return
 
+        # Pending edits may be for the file being opened
+        self.auto_saver.flush()
+
+        self._start_session_load(filename, is_interactive=True)
+
+    def open_session_in_new_tab(self, filename=None):
+        """Open a session in its own tab, keeping the current one open"""
+        if filename is None:
+            filename = filedialog.askopenfilename(
+                filetypes=[("Session files", "*.xml *.ucsb")] + SESSION_FILETYPES,
+                title="Open Session in New Tab"
+            )
+        if not filename:
+            return
+        session = self._find_session(filename)
+        if session is not None:
+            self.select_session(session)
+            return
+        # An empty untitled tab is reused rather than left behind
+        if (self.current_filename or self.loading_session
+                or self.session.importer is not None or self.session.has_data()):
+            self.new_tab()
+        self._start_session_load(filename, is_interactive=True)
+
+    @perf.instrument("load_session.start")
+    def _start_session_load(self, filename, is_interactive):
+        """Load a session file without blocking the window.
+
+        Shared by load_session and load_last_session. The file is streamed
+        with open_session (XML or binary, by extension) and rows are added LOAD_CHUNK_SIZE at a time from
+        root.after callbacks, with a progress bar and a Cancel button.
+        Results are calculated once, when the last row is in.
+        """
+        self._abort_session_load()
+        reader = fingerprint = None
+        if is_snapshot_candidate(filename):
+            # A valid snapshot skips parsing the XML
+            reader, fingerprint = self.session_snapshots.open(filename)
         try:
-            # Parse XML
-            tree = ET.parse(filename)
-            root_elem = tree.getroot()
+            if reader is None:
+                reader = open_session(filename)
+            else:
+                fingerprint = None  # Already snapshotted
+        except (ET.ParseError, SessionFormatError, OSError) as e:
+            self._report_load_error(e, is_interactive)
+            return
 
-            if root_elem.tag != "session":
-                messagebox.showerror("Error", "Invalid session file format.")
-                return
+        # Clear current session
+        self._clear_session(add_initial_row=False)
 
-            # Set loading flag to prevent auto-save during loading
-            self.loading_session = True
+        # Set loading flag to prevent auto-save during loading
+        self.loading_session = True
+        self._edited_while_loading = False
+        self._load_reader = reader
+        self._load_products = iter(reader)
+        self._load_is_interactive = is_interactive
+        self._load_fingerprint = fingerprint
 
-            # Clear current session
-            self.reset_session()
+        # Load session title
+        self.session_title = reader.title or os.path.splitext(
+            os.path.basename(filename))[0]
+        self.session_title_label.config(text=self.session_title)
 
-            # Load session title
-            title_elem = root_elem.find("title")
-            if title_elem is not None and title_elem.text:
-                self.session_title = title_elem.text
-            else:
-                self.session_title = os.path.splitext(
-                    os.path.basename(filename))[0]
-            self.session_title_label.config(text=self.session_title)
+        # Set current filename for auto-save
+        self.current_filename = filename
+        self.is_saved = True
+        self._update_tab_label(self.session)
+        self._remember_open_sessions()
+
+        # Load unit type
+        if reader.unit_type:
+            self.session_unit_type = reader.unit_type
+
+        self.load_progress_label.config(text="Loading...")
+        self.load_progress["value"] = 0
+        self.load_progress_frame.pack(side=tk.LEFT, padx=5)
+        self._load_after_id = self.root.after(
+            1, self.loop_monitor.wrap("load_session.chunk", self._load_next_chunk))
+
+    @perf.instrument("load_session.chunk", rows=_input_row_count)
+    def _load_next_chunk(self):
+        """Add the next chunk of streamed products to the session"""
+        self._load_after_id = None
+        rows_before = len(self.input_rows_data)
+        try:
+            for product in itertools.islice(self._load_products, LOAD_CHUNK_SIZE):
+                self.input_rows_data.append(self._new_row(**product))
+        except (ET.ParseError, ValueError, OSError) as e:
+            # ValueError includes SessionFormatError from a binary session
+            is_interactive = self._load_is_interactive
+            self._abort_session_load()
+            # Don't leave a partial session that auto-save could write back
+            self._clear_session()
+            self._report_load_error(e, is_interactive)
+            return
+
+        # Shown rows pick up the loaded data
+        self.input_grid.refresh()
 
-            # Set current filename for auto-save
-            self.current_filename = filename
-
-            # Load unit type
-            unit_type_elem = root_elem.find("unit_type")
-            if unit_type_elem is not None and unit_type_elem.text:
-                self.session_unit_type = unit_type_elem.text
-
-            # Load products
-            products_elem = root_elem.find("products")
-            if products_elem is not None:
-                products = products_elem.findall("product")
-
-                if not products:
-                    # No products, keep the initial empty row
-                    if self.session_unit_type:
-                        # Set the unit type for the initial row
-                        self.input_rows_data[0]["unit_type_var"].set(
-                            self.session_unit_type)
-                        self._on_unit_type_selected(0, is_initial_call=True)
-                        self.add_row_button.config(state=tk.NORMAL)
-                else:
-                    # Remove the initial empty row first
-                    if self.input_rows_data:
-                        self.input_row_frames[0].destroy()
-                        del self.input_row_frames[0]
-                        del self.input_rows_data[0]
-
-                    # Add rows for each product
-                    for i, product_elem in enumerate(products):
-                        is_first = (i == 0)
-                        self.add_input_row(is_initial_row=is_first)
-                        row_data = self.input_rows_data[-1]
-
-                        # Load product data
-                        name_elem = product_elem.find("name")
-                        if name_elem is not None and name_elem.text:
-                            row_data["name_var"].set(name_elem.text)
-
-                        price_elem = product_elem.find("price")
-                        if price_elem is not None and price_elem.text:
-                            row_data["price_var"].set(price_elem.text)
-
-                        quantity_elem = product_elem.find("quantity")
-                        if quantity_elem is not None and quantity_elem.text:
-                            row_data["quantity_var"].set(quantity_elem.text)
-
-                        unit_type_elem = product_elem.find("unit_type")
-                        if unit_type_elem is not None and unit_type_elem.text:
-                            row_data["unit_type_var"].set(unit_type_elem.text)
-
-                        unit_elem = product_elem.find("unit")
-                        if unit_elem is not None and unit_elem.text:
-                            row_data["unit_var"].set(unit_elem.text)
-
-                        store_elem = product_elem.find("store")
-                        if store_elem is not None and store_elem.text:
-                            row_data["store_var"].set(store_elem.text)
-
-                        url_elem = product_elem.find("url")
-                        if url_elem is not None and url_elem.text:
-                            row_data["url_var"].set(url_elem.text)
-
-                        # Trigger unit type selection to set up the units dropdown
-                        if is_first and self.session_unit_type:
-                            self._on_unit_type_selected(
-                                len(self.input_rows_data) - 1, is_initial_call=True)
+        if len(self.input_rows_data) - rows_before < LOAD_CHUNK_SIZE:
+            self._finish_session_load()
+            return
+
+        self.load_progress["value"] = self._load_reader.progress * 100
+        self._load_after_id = self.root.after(
+            1, self.loop_monitor.wrap("load_session.chunk", self._load_next_chunk))
+
+    @perf.instrument("load_session.finish", rows=_input_row_count)
+    def _finish_session_load(self):
+        is_interactive = self._load_is_interactive
+        fingerprint = self._load_fingerprint
+        self._abort_session_load()
+        if fingerprint is not None and not self._edited_while_loading:
+            # The rows are exactly the parsed file: snapshot them for next
+            # time, once the first calculation is done (the write competes
+            # with it for the GIL)
+            snapshot_args = (
+                fingerprint, self.session_title, self.session_unit_type,
+                [row_data.fields() for row_data in self.input_rows_data])
+        else:
+            snapshot_args = None
+
+        # Defer grid refresh, calculation and saves until all rows are in
+        with self.bulk_update():
+            if not self.input_rows_data:
+                # No products, add initial empty row
+                self.add_input_row(is_initial_row=True)
+                if self.session_unit_type:
+                    # Set the unit type for the initial row
+                    self.input_rows_data[0]["unit_type"] = self.session_unit_type
+                self._refresh_input_grid()
 
             # Enable buttons if we have a session type
             if self.session_unit_type:
@@ -912,26 +1647,306 @@ class UnitCostCalculatorApp:
 
             # Auto-calculate if we have valid data (check if any row has meaningful data)
             has_data = any(
-                row_data["name_var"].get().strip() or
-                row_data["price_var"].get().strip() or
-                row_data["quantity_var"].get().strip()
+                row_data["name"].strip() or
+                row_data["price"].strip() or
+                row_data["quantity"].strip()
                 for row_data in self.input_rows_data
             )
             if has_data and self.session_unit_type:
-                self.calculate_costs()
+                self._schedule_auto_calculate()
 
-            # Clear loading flag and update save status
-            self.loading_session = False
-            self.update_save_status(True, from_loading=True)
+        # Clear loading flag and update save status
+        self.loading_session = False
+        self.update_save_status(True, from_loading=True)
 
+        # Edits made while rows were still arriving need saving now
+        if self._edited_while_loading:
+            self.mark_unsaved()
+            self.auto_save()
+
+        if snapshot_args is not None:
+            self.idle_tasks.schedule(
+                "session_snapshot",
+                lambda: self.session_snapshots.store_async(*snapshot_args))
+        if not is_interactive:
+            self._on_startup_ready()
+        else:
+            # Opened by the user: auto-load it next time and list it as recent
+            self.save_last_session_path(self.current_filename)
             messagebox.showinfo(
                 "Success", f"Session '{self.session_title}' loaded successfully!")
 
-        except ET.ParseError as e:
+    def cancel_session_load(self):
+        """Stop a running session load and go back to an empty session"""
+        if self._load_reader is None:
+            return
+        is_interactive = self._load_is_interactive
+        self._abort_session_load()
+        self._clear_session()
+        if not is_interactive:
+            self._on_startup_ready()
+
+    def _abort_session_load(self):
+        """Stop reading the session file and hide the progress bar"""
+        if self._load_after_id is not None:
+            self.root.after_cancel(self._load_after_id)
+            self._load_after_id = None
+        if self._load_reader is not None:
+            self._load_reader.close()
+            self._load_reader = None
+            self._load_products = None
+            self._load_fingerprint = None
+            self.load_progress_frame.pack_forget()
+
+    def _report_load_error(self, error, is_interactive):
+        if not is_interactive:
+            print(f"Failed to auto-load session: {error}")
+            self._on_startup_ready()
+        elif isinstance(error, SessionFormatError):
+            messagebox.showerror("Error", "Invalid session file format.")
+        elif isinstance(error, ET.ParseError):
             messagebox.showerror(
-                "Error", f"Failed to parse XML file:\n{str(e)}")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load session:\n{str(e)}")
+                "Error", f"Failed to parse XML file:\n{str(error)}")
+        else:
+            messagebox.showerror(
+                "Error", f"Failed to load session:\n{str(error)}")
+
+    def import_prices(self, filename=None, mapping=None):
+        """Append the products of a CSV or JSON-lines price list.
+
+        The file is read and validated on a worker thread (see
+        price_import) and finished chunks of rows are appended as they
+        arrive. Lines that can't be used are listed at the end instead of
+        stopping the import. Asks for the file and the column mapping
+        unless they are given.
+        """
+        if self.loading_session:
+            messagebox.showinfo("Info", "Please wait until the session has loaded.")
+            return
+        if self.session.importer is not None:
+            messagebox.showinfo("Info", "An import is already running in this tab.")
+            return
+
+        if filename is None:
+            filename = filedialog.askopenfilename(
+                filetypes=IMPORT_FILETYPES, title="Import Prices")
+        if not filename:
+            return
+
+        if mapping is None:
+            try:
+                columns = read_columns(filename)
+            except (ImportFormatError, OSError) as e:
+                messagebox.showerror(
+                    "Error", f"Failed to read price list:\n{str(e)}")
+                return
+            from import_dialog import ColumnMappingDialog
+            mapping = ColumnMappingDialog(
+                self.root, filename, columns, guess_mapping(columns)).result
+            if mapping is None:  # Cancelled
+                return
+
+        try:
+            importer = PriceImport(filename, mapping, self.session_unit_type)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        self.session.importer = importer
+        importer.start()
+        self.load_progress_label.config(text="Importing...")
+        self.load_progress["value"] = 0
+        self.load_progress_frame.pack(side=tk.LEFT, padx=5)
+        self._schedule_import_poll()
+
+    def _schedule_import_poll(self):
+        self._import_after_id = self.root.after(
+            IMPORT_POLL_INTERVAL_MS,
+            self.loop_monitor.wrap("import.chunk", self._poll_import))
+
+    @perf.instrument("import.chunk", rows=_input_row_count)
+    def _poll_import(self):
+        """Append the chunks the import worker has finished"""
+        self._import_after_id = None
+        importer = self.session.importer
+        chunks = importer.take_chunks(MAX_IMPORT_CHUNKS_PER_POLL)
+        if chunks:
+            self._append_imported_rows(chunks)
+            self.load_progress["value"] = chunks[-1].progress * 100
+        if importer.done:
+            self._finish_import()
+        else:
+            self._schedule_import_poll()
+
+    def _append_imported_rows(self, chunks):
+        """Add already validated rows; results are calculated at the end"""
+        unit_type = chunks[-1].unit_type
+        with self.bulk_update():
+            if not self.session_unit_type and unit_type:
+                # The first line with a known unit decided the session type
+                self.session_unit_type = unit_type
+                for row_data in self.input_rows_data:
+                    row_data["unit_type"] = unit_type
+                self.add_row_button.config(state=tk.NORMAL)
+            if (any(chunk.rows for chunk in chunks)
+                    and len(self.input_rows_data) == 1 and not self.session.has_data()):
+                # Imported rows replace the initial empty row
+                self.input_rows_data.clear()
+            for chunk in chunks:
+                for fields in chunk.rows:
+                    self.input_rows_data.append(self._new_row(**fields))
+            self._refresh_input_grid()
+
+    def cancel_import(self):
+        """Stop a running import, keeping the rows imported so far"""
+        if self.session.importer is not None:
+            self._finish_import(report=False)
+
+    def _finish_import(self, report=True):
+        importer = self._abort_import()
+        # Calculate and save once, for every imported row
+        with self.bulk_update():
+            if not self.input_rows_data:
+                self.add_input_row(is_initial_row=True)
+            if importer.imported:
+                self._schedule_auto_calculate()
+                self.mark_unsaved()
+                self.auto_save()
+        if report:
+            self._report_import(importer)
+
+    def _abort_import(self):
+        """Stop the active session's import worker; returns the import"""
+        importer = self.session.importer
+        if importer is None:
+            return None
+        importer.cancel()
+        self.session.importer = None
+        if self._import_after_id is not None:
+            self.root.after_cancel(self._import_after_id)
+            self._import_after_id = None
+        self.load_progress_frame.pack_forget()
+        return importer
+
+    def _report_import(self, importer):
+        """Summarize a finished import, offering to save the rejected lines"""
+        count = importer.imported
+        summary = (f"Imported {count} product{'s' if count != 1 else ''} "
+                   f"from '{os.path.basename(importer.filename)}'.")
+        if importer.error is not None:
+            messagebox.showerror(
+                "Import Stopped",
+                f"{summary}\n\nThe rest of the file couldn't be read:\n{importer.error}")
+            return
+        rejected = importer.rejected
+        if not rejected:
+            messagebox.showinfo("Import Finished", summary)
+            return
+
+        listed = "\n".join(f"Line {rejection.line}: {rejection.reason}"
+                           for rejection in rejected[:MAX_LISTED_ERRORS])
+        more = "\n…" if len(rejected) > MAX_LISTED_ERRORS else ""
+        if not messagebox.askyesno(
+                "Import Finished",
+                f"{summary}\n\n{len(rejected)} line{'s were' if len(rejected) != 1 else ' was'} "
+                f"rejected:\n{listed}{more}\n\nSave the list of rejected lines?"):
+            return
+        report_file = filedialog.asksaveasfilename(
+            defaultextension=".csv",
+            initialfile=session_title_for(importer.filename) + "_rejected.csv",
+            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
+            title="Save Rejected Lines")
+        if not report_file:
+            return
+        try:
+            write_rejections(report_file, rejected)
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to save rejected lines:\n{str(e)}")
+
+    def _on_progress_cancel(self):
+        if self.session.importer is not None:
+            self.cancel_import()
+        else:
+            self.cancel_session_load()
+
+    def export_results(self, filename=None):
+        """Write every ranked result to a CSV, JSON-lines or JSON file.
+
+        Exports the calculated results, not the results view, so every
+        result is included when only a page is shown, with a price column
+        for each output unit. The file is written on a worker thread.
+        Asks for the file unless it is given.
+        """
+        if self.loading_session or self.session.importer is not None:
+            messagebox.showinfo("Info", "Please wait until all rows have loaded.")
+            return
+        # Bring the results up to date with the latest edits
+        self.auto_calculate()
+        products, sort_key = self._export_snapshot()
+        if not products:
+            messagebox.showinfo("Info", "No results to export.")
+            return
+
+        if filename is None:
+            filename = filedialog.asksaveasfilename(
+                defaultextension=".csv",
+                initialfile=f"{self.session_title} results.csv",
+                filetypes=EXPORT_FILETYPES, title="Export Results")
+        if not filename:
+            return
+
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="export")
+        # The list only holds references to the cached results; any sorting
+        # happens on the worker, and rows are formatted one at a time as
+        # they are written
+        future = executor.submit(write_results_file, filename, products,
+                                 self.session_unit_type, sort_key)
+        executor.shutdown(wait=False)
+        self.root.after(EXPORT_POLL_INTERVAL_MS,
+                        lambda: self._poll_export(future, filename))
+
+    def _export_snapshot(self):
+        """The cached results of the active session and their sort key.
+
+        The key is None when the results are already best value first.
+        Only references are copied here, on the Tk thread; sorting is left
+        to the export worker.
+        """
+        if self.results_page_size is None and not self.group_by_product:
+            return [self._row_results[row_id] for row_id in self._ranking], None
+        # Paged and grouped results keep no full ranking; order them like
+        # the pages do
+        if self.exact_ranking:
+            unit_type = self.session_unit_type
+            key = lambda p: (exact_price_key(p, unit_type), p["row_id"])
+        else:
+            key = lambda p: (p["price_per_base_unit"], p["row_id"])
+        return list(self._row_results.values()), key
+
+    def _poll_export(self, future, filename):
+        if not future.done():
+            self.root.after(EXPORT_POLL_INTERVAL_MS,
+                            lambda: self._poll_export(future, filename))
+            return
+        error = future.exception()
+        if error is not None:
+            messagebox.showerror("Error", f"Failed to export results:\n{str(error)}")
+            return
+        count = future.result()
+        messagebox.showinfo(
+            "Success", f"Exported {count} result{'s' if count != 1 else ''} "
+                       f"to '{os.path.basename(filename)}'")
+
+    def toggle_perf_overlay(self):
+        """Show or hide the performance overlay; showing it starts recording"""
+        if self.perf_overlay is not None:
+            self.perf_overlay.close()
+            return
+        from perf_overlay import PerfOverlay
+        perf.set_enabled(True)
+        self.perf_overlay = PerfOverlay(self.root, on_close=self._on_perf_overlay_closed)
+
+    def _on_perf_overlay_closed(self):
+        self.perf_overlay = None
 
     def reset_session(self):
         """Reset the session with proper warnings about auto-save"""
@@ -958,16 +1973,26 @@ class UnitCostCalculatorApp:
         if not result:
             return  # User cancelled
 
+        self._clear_session()
+
+    def _clear_session(self, add_initial_row=True):
+        """Clear all rows, results and session state without asking"""
+        self._abort_session_load()
+        self._abort_import()
+
+        # Write out pending edits for the old file before it is detached
+        self.auto_saver.flush()
+
         # Clear input rows
-        for frame in self.input_row_frames:
-            frame.destroy()
-        self.input_row_frames.clear()
         self.input_rows_data.clear()
 
         # Clear results
-        for item in self.results_tree.get_children():
-            self.results_tree.delete(item)
-        self.results_tree["columns"] = []
+        self._clear_results()
+        self._row_results.clear()
+        self._ranking.clear()
+        self._groups.clear()
+        self._invalidate_results()
+        self._set_row_errors({})
 
         # Reset session state
         self.session_unit_type = None
@@ -977,196 +2002,247 @@ class UnitCostCalculatorApp:
         self.is_saved = False  # New session is considered saved
         self.last_save_time = None
         self.loading_session = False  # Reset loading session flag
+        self.session.pending = False
         self.update_save_status(False)
         self.add_row_button.config(state=tk.DISABLED)
+        self._remember_open_sessions()
 
         # Add one initial blank row
-        self.add_input_row(is_initial_row=True)
+        if add_initial_row:
+            self.add_input_row(is_initial_row=True)
+        else:
+            self.input_grid.refresh()
+
+    # --- Workspace tabs ---
+
+    def _create_session(self, filename=None):
+        """A new Session model with its own auto-save stream"""
+        session = Session(filename)
+        # Coalesces the session's auto-saves and writes them on a worker thread
+        session.auto_saver = AutoSaveScheduler(
+            self.root,
+            self.loop_monitor.wrap(
+                "auto_save.snapshot", lambda: self._auto_save_snapshot(session)),
+            lambda error: self._on_auto_save_done(session, error),
+            delay_ms=self.auto_save_delay_ms,
+            writer=self._write_auto_save)
+        return session
+
+    def _add_session_tab(self, session):
+        """Append a tab for ``session`` (an empty page; nothing is built)"""
+        session.tab = ttk.Frame(self.session_tabs, height=0)
+        self.sessions.append(session)
+        self.session_tabs.add(session.tab, text=session.tab_text())
+
+    def _update_tab_label(self, session):
+        if session.tab is not None:
+            self.session_tabs.tab(session.tab, text=session.tab_text())
+
+    def _on_tab_changed(self, event):
+        selected = str(self.session_tabs.select())
+        for session in self.sessions:
+            if str(session.tab) == selected:
+                self.select_session(session)
+                return
 
-    def save_config(self):
-        """Save configuration to file"""
-        config_data = {
-            "last_session_file": self.current_filename,
-            "version": "1.0"
-        }
+    def _find_session(self, filename):
+        """The open session of ``filename``, or None"""
+        return next((session for session in self.sessions
+                     if same_file(session.filename, filename)), None)
+
+    def _select_open_session(self, filename):
+        """Switch to another tab that has ``filename`` open; False if none"""
+        session = self._find_session(filename)
+        if session is None or session is self.session:
+            return False
+        self.select_session(session)
+        return True
+
+    def _remember_open_sessions(self):
+        """Record the tabs' files, so the workspace is restored on start"""
+        self.config.set("open_sessions", [
+            session.filename for session in self.sessions if session.filename])
+
+    def new_tab(self):
+        """Open an empty untitled session in a new tab"""
+        session = self._create_session()
+        self._add_session_tab(session)
+        self.select_session(session)
+        self.add_input_row(is_initial_row=True)
 
-        try:
-            with open(self.config_file, 'w') as f:
-                if HAS_YAML:
-                    yaml.dump(config_data, f, default_flow_style=False)
-                else:
-                    json.dump(config_data, f, indent=2)
-        except Exception as e:
-            print(f"Failed to save config: {e}")
+    @perf.instrument("select_session", rows=lambda self, session: len(session.rows))
+    def select_session(self, session):
+        """Show ``session`` in the shared widgets and hide the active one.
 
-    def load_config(self):
-        """Load configuration from file, create default if doesn't exist"""
-        default_config = {
-            "last_session_file": None,
-            "version": "1.0"
-        }
+        The hidden session keeps only its rows: a running load pauses and
+        calculated results are dropped. The shown session's results are
+        recalculated, and a restored tab's file is read now.
+        """
+        previous = self.session
+        if session is previous:
+            return
+        if previous.load_after_id is not None:
+            # Resumed when the tab is shown again
+            self.root.after_cancel(previous.load_after_id)
+            previous.load_after_id = None
+        if self._import_after_id is not None:
+            # The worker waits once its queue is full
+            self.root.after_cancel(self._import_after_id)
+            self._import_after_id = None
+        self.load_progress_frame.pack_forget()
+        previous.release_results()
+
+        self.session = session
+        if str(self.session_tabs.select()) != str(session.tab):
+            self.session_tabs.select(session.tab)
+        self.results_page = 0
+        self._clear_results()
+        self.input_grid.set_rows(session.rows)
+        self._set_row_errors(session.row_errors)
+        self.session_title_label.config(text=session.title)
+        self._show_save_status()
+        self.file_menu.entryconfig(
+            "Save Session...",
+            state=tk.DISABLED if session.filename and session.is_saved else tk.NORMAL)
+        self.add_row_button.config(
+            state=tk.NORMAL if session.unit_type else tk.DISABLED)
+        if session.filename:
+            self.config.set("last_session_file", session.filename)
+
+        if session.pending:
+            self._load_pending_session()
+        elif session.load_reader is not None:
+            self.load_progress_label.config(text="Loading...")
+            self.load_progress["value"] = session.load_reader.progress * 100
+            self.load_progress_frame.pack(side=tk.LEFT, padx=5)
+            self._load_after_id = self.root.after(
+                1, self.loop_monitor.wrap("load_session.chunk", self._load_next_chunk))
+        else:
+            if session.importer is not None:
+                self.load_progress_label.config(text="Importing...")
+                self.load_progress_frame.pack(side=tk.LEFT, padx=5)
+                self._schedule_import_poll()
+            self.auto_calculate()
+
+    def _load_pending_session(self):
+        """Read the file of a restored tab, now that it is shown"""
+        filename = self.current_filename
+        self.session.pending = False
+        self._start_session_load(filename, is_interactive=False)
+        if not self.loading_session:
+            # Couldn't be read (already reported): leave an empty tab
+            self._clear_session()
+
+    def close_tab(self, session=None):
+        """Close a tab (the active one by default), writing pending saves"""
+        session = session or self.session
+        if not session.filename and session.has_data():
+            if not messagebox.askyesno(
+                    "Close Tab",
+                    f"'{session.title}' has not been saved.\n\n"
+                    "Close it and discard its data?",
+                    icon=messagebox.WARNING):
+                return
 
-        try:
-            if os.path.exists(self.config_file):
-                with open(self.config_file, 'r') as f:
-                    if HAS_YAML:
-                        config_data = yaml.safe_load(f)
-                    else:
-                        config_data = json.load(f)
-                return config_data if config_data else default_config
+        if session is self.session:
+            if len(self.sessions) == 1:
+                # The workspace always has a tab
+                self.new_tab()
             else:
-                # Create default config file
-                self.save_config_data(default_config)
-                return default_config
-        except Exception as e:
-            print(f"Failed to load config: {e}")
-            return default_config
+                index = self.sessions.index(session)
+                self.select_session(
+                    self.sessions[index + 1 if index + 1 < len(self.sessions)
+                                  else index - 1])
+
+        if session.load_reader is not None:
+            session.load_reader.close()
+            session.load_reader = session.load_products = None
+        if session.importer is not None:
+            session.importer.cancel()
+            session.importer = None
+        session.auto_saver.shutdown()
+        self._record_session_history(session)
+        self._watch_price_history()
+        self.sessions.remove(session)
+        self.session_tabs.forget(session.tab)
+        session.tab.destroy()
+        self._remember_open_sessions()
+
+    def save_config(self):
+        """Save configuration to file (in the background)"""
+        self.config.set("last_session_file", self.current_filename)
+
+    def load_config(self):
+        """Return a copy of the configuration (read from disk only once)"""
+        return self.config.as_dict()
 
     def save_config_data(self, config_data):
-        """Save given config data to file"""
-        try:
-            with open(self.config_file, 'w') as f:
-                if HAS_YAML:
-                    yaml.dump(config_data, f, default_flow_style=False)
-                else:
-                    json.dump(config_data, f, indent=2)
-        except Exception as e:
-            print(f"Failed to save config data: {e}")
+        """Replace the configuration; written in the background"""
+        self.config.replace(config_data)
 
     def get_last_session_path(self):
         """Get the last session filename from config"""
-        config = self.load_config()
-        return config.get("last_session_file")
+        return self.config.get("last_session_file")
 
     def save_last_session_path(self, filename):
-        """Save the last session filename to config"""
-        config = self.load_config()
-        config["last_session_file"] = filename
-        self.save_config_data(config)
+        """Remember a session for auto-loading and the recent sessions menu"""
+        self.config.set("last_session_file", filename)
+        self.config.add_recent_session(filename)
+
+    def _populate_recent_menu(self):
+        """Rebuild the Open Recent submenu from the config"""
+        self.recent_menu.delete(0, tk.END)
+        recent = self.config.recent_sessions
+        if not recent:
+            self.recent_menu.add_command(label="(No recent sessions)", state=tk.DISABLED)
+            return
+        for i, filename in enumerate(recent, start=1):
+            self.recent_menu.add_command(
+                label=f"{i}. {os.path.basename(filename)}  ({os.path.dirname(filename)})",
+                command=lambda f=filename: self.open_recent_session(f))
+        self.recent_menu.add_separator()
+        self.recent_menu.add_command(
+            label="Clear Recent Sessions", command=self.config.clear_recent_sessions)
+
+    def open_recent_session(self, filename):
+        """Load a session picked from the Open Recent menu"""
+        if not os.path.exists(filename):
+            messagebox.showerror(
+                "Error", f"Session file not found:\n{filename}")
+            self.config.remove_recent_session(filename)
+            return
+        self.load_session(filename)
 
     def load_last_session(self):
-        """Automatically load the last session if it exists"""
-        last_file = self.get_last_session_path()
-        if last_file and os.path.exists(last_file):
-            try:
-                # Use the existing load logic but without user dialogs
-                tree = ET.parse(last_file)
-                root_elem = tree.getroot()
-
-                if root_elem.tag != "session":
-                    return  # Invalid format, skip silently
-
-                # Set loading flag to prevent auto-save during loading
-                self.loading_session = True
-
-                # Clear current session
-                for frame in self.input_row_frames:
-                    frame.destroy()
-                self.input_row_frames.clear()
-                self.input_rows_data.clear()
-
-                # Clear results
-                for item in self.results_tree.get_children():
-                    self.results_tree.delete(item)
-                self.results_tree["columns"] = []
-
-                # Load session title
-                title_elem = root_elem.find("title")
-                if title_elem is not None and title_elem.text:
-                    self.session_title = title_elem.text
-                else:
-                    self.session_title = os.path.splitext(
-                        os.path.basename(last_file))[0]
-                self.session_title_label.config(text=self.session_title)
-
-                # Set current filename for auto-save
-                self.current_filename = last_file
-
-                # Load unit type
-                unit_type_elem = root_elem.find("unit_type")
-                if unit_type_elem is not None and unit_type_elem.text:
-                    self.session_unit_type = unit_type_elem.text
-
-                # Load products
-                products_elem = root_elem.find("products")
-                if products_elem is not None:
-                    products = products_elem.findall("product")
-
-                    if not products:
-                        # No products, add initial empty row
-                        self.add_input_row(is_initial_row=True)
-                        if self.session_unit_type:
-                            # Set the unit type for the initial row
-                            self.input_rows_data[0]["unit_type_var"].set(
-                                self.session_unit_type)
-                            self._on_unit_type_selected(
-                                0, is_initial_call=True)
-                            self.add_row_button.config(state=tk.NORMAL)
-                    else:
-                        # Add rows for each product
-                        for i, product_elem in enumerate(products):
-                            is_first = (i == 0)
-                            self.add_input_row(is_initial_row=is_first)
-                            row_data = self.input_rows_data[-1]
-
-                            # Load product data
-                            name_elem = product_elem.find("name")
-                            if name_elem is not None and name_elem.text:
-                                row_data["name_var"].set(name_elem.text)
-
-                            price_elem = product_elem.find("price")
-                            if price_elem is not None and price_elem.text:
-                                row_data["price_var"].set(price_elem.text)
-
-                            quantity_elem = product_elem.find("quantity")
-                            if quantity_elem is not None and quantity_elem.text:
-                                row_data["quantity_var"].set(
-                                    quantity_elem.text)
-
-                            unit_type_elem = product_elem.find("unit_type")
-                            if unit_type_elem is not None and unit_type_elem.text:
-                                row_data["unit_type_var"].set(
-                                    unit_type_elem.text)
-
-                            unit_elem = product_elem.find("unit")
-                            if unit_elem is not None and unit_elem.text:
-                                row_data["unit_var"].set(unit_elem.text)
-
-                            store_elem = product_elem.find("store")
-                            if store_elem is not None and store_elem.text:
-                                row_data["store_var"].set(store_elem.text)
-
-                            url_elem = product_elem.find("url")
-                            if url_elem is not None and url_elem.text:
-                                row_data["url_var"].set(url_elem.text)
-
-                            # Trigger unit type selection to set up the units dropdown
-                            if is_first and self.session_unit_type:
-                                self._on_unit_type_selected(
-                                    len(self.input_rows_data) - 1, is_initial_call=True)
-
-                # Enable buttons if we have a session type
-                if self.session_unit_type:
-                    self.add_row_button.config(state=tk.NORMAL)
-
-                # Auto-calculate if we have valid data (check if any row has meaningful data)
-                has_data = any(
-                    row_data["name_var"].get().strip() or
-                    row_data["price_var"].get().strip() or
-                    row_data["quantity_var"].get().strip()
-                    for row_data in self.input_rows_data
-                )
-                if has_data and self.session_unit_type:
-                    self.calculate_costs()
+        """Reopen the last workspace's tabs and load the last session.
 
-                # Clear loading flag and update save status
-                self.loading_session = False
-                self.update_save_status(True, from_loading=True)
-
-            except Exception as e:
-                print(f"Failed to auto-load last session: {e}")
+        Only the last session is read now; the other tabs are read when
+        they are first shown.
+        """
+        last_file = self.get_last_session_path()
+        if not (last_file and os.path.exists(last_file)):
+            last_file = None
+        filenames = [filename for filename in self.config.get("open_sessions") or []
+                     if isinstance(filename, str) and os.path.exists(filename)]
+        if last_file and not any(same_file(last_file, f) for f in filenames):
+            filenames.insert(0, last_file)
+        if not filenames:
+            return
 
-                # If loading fails, just start with default empty session
+        # The initial empty tab becomes the first restored one
+        first = self.session
+        first.filename = filenames[0]
+        first.title = session_title_for(filenames[0])
+        first.is_saved = first.pending = True
+        self._update_tab_label(first)
+        for filename in filenames[1:]:
+            self._add_session_tab(self._create_session(filename))
+        last = (self._find_session(last_file) if last_file else None) or first
+        if last is first:
+            # If loading fails, just start with default empty session
+            self._load_pending_session()
+        else:
+            self.select_session(last)
 
     def on_treeview_click(self, event):
         """Handle clicks on treeview to copy price values to clipboard"""
@@ -1237,5 +2313,5 @@ class UnitCostCalculatorApp:
 
 if __name__ == "__main__":
     main_root = tk.Tk()
-    app = UnitCostCalculatorApp(main_root)
+    app = UnitCostCalculatorApp(main_root, started_at=STARTED_AT)
     main_root.mainloop()
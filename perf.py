@@ -0,0 +1,168 @@
+"""Lightweight hot-path instrumentation.
+
+Decorate a function with :func:`instrument` (or wrap a block in
+:func:`span`) to record its duration, call count and the number of rows
+it handled into a fixed-size ring buffer. Recording is off by default;
+while off, an instrumented call costs one attribute check. The samples
+can be summarized (p50/p95) for the in-app overlay or exported as a
+Chrome trace-event JSON file (open it in chrome://tracing or Perfetto).
+
+No tkinter import here, so headless modules can be instrumented too.
+"""
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Samples kept in the ring buffer; the oldest are dropped first
+DEFAULT_CAPACITY = 20_000
+# Set to 1 to record from startup (otherwise toggled from the overlay)
+ENV_VAR = "UCC_PERF"
+
+
+class Recorder:
+    """Ring buffer of ``(name, start_ns, duration_ns, rows, thread_id)`` samples.
+
+    Worker threads can record too: ``deque.append`` is atomic, and the
+    call counts (a read-modify-write) are updated under a lock.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.enabled = False
+        self.samples = deque(maxlen=capacity)
+        self.call_counts = Counter()  # Lifetime counts, not limited by capacity
+        self._counts_lock = threading.Lock()
+        self._epoch_ns = time.perf_counter_ns()
+
+    def record(self, name, start_ns, duration_ns, rows=None):
+        self.samples.append(
+            (name, start_ns, duration_ns, rows, threading.get_ident()))
+        with self._counts_lock:
+            self.call_counts[name] += 1
+
+    def clear(self):
+        with self._counts_lock:
+            self.samples.clear()
+            self.call_counts.clear()
+
+    def stats(self):
+        """Summarize the buffered samples per name.
+
+        Returns:
+            Dict of name to a dict with "count" (lifetime calls), "samples",
+            "p50_ms", "p95_ms", "max_ms" and "rows" (last row count seen).
+        """
+        with self._counts_lock:
+            counts = dict(self.call_counts)
+        durations = {}
+        last_rows = {}
+        for name, _, duration_ns, rows, _ in list(self.samples):
+            durations.setdefault(name, []).append(duration_ns)
+            if rows is not None:
+                last_rows[name] = rows
+        summary = {}
+        for name, values in durations.items():
+            values.sort()
+            summary[name] = {
+                "count": counts.get(name, 0),
+                "samples": len(values),
+                "p50_ms": _percentile(values, 50) / 1e6,
+                "p95_ms": _percentile(values, 95) / 1e6,
+                "max_ms": values[-1] / 1e6,
+                "rows": last_rows.get(name),
+            }
+        return summary
+
+    def chrome_trace(self):
+        """Return the samples as a Chrome trace-event document (a dict)"""
+        pid = os.getpid()
+        events = []
+        for name, start_ns, duration_ns, rows, thread_id in list(self.samples):
+            event = {
+                "name": name,
+                "cat": "app",
+                "ph": "X",  # Complete event: start plus duration
+                "ts": (start_ns - self._epoch_ns) / 1000,
+                "dur": duration_ns / 1000,
+                "pid": pid,
+                "tid": thread_id,
+            }
+            if rows is not None:
+                event["args"] = {"rows": rows}
+            events.append(event)
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, filename):
+        with open(filename, "w") as f:
+            json.dump(self.chrome_trace(), f)
+
+
+# Process-wide recorder used by instrument() and span()
+recorder = Recorder()
+recorder.enabled = os.environ.get(ENV_VAR) == "1"
+
+
+def set_enabled(enabled):
+    recorder.enabled = bool(enabled)
+
+
+def is_enabled():
+    return recorder.enabled
+
+
+def instrument(name=None, rows=None):
+    """Decorator recording each call of the function while enabled.
+
+    Args:
+        name: Name shown in stats and traces (defaults to the qualified
+            function name).
+        rows: Optional callable taking the same arguments as the function
+            (``self`` included) and returning the number of rows handled.
+            Evaluated after the call.
+    """
+    def decorator(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not recorder.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                duration = time.perf_counter_ns() - start
+                row_count = None
+                if rows is not None:
+                    try:
+                        row_count = rows(*args, **kwargs)
+                    except Exception as e:  # Never let stats break the app
+                        logger.debug("Row count for %s failed: %s", label, e)
+                recorder.record(label, start, duration, row_count)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def span(name, rows=None):
+    """Record the duration of a ``with`` block while enabled"""
+    if not recorder.enabled:
+        yield
+        return
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        recorder.record(name, start, time.perf_counter_ns() - start, rows)
+
+
+def _percentile(sorted_values, percent):
+    """Nearest-rank percentile of an already sorted, non-empty list"""
+    index = max(0, -(-len(sorted_values) * percent // 100) - 1)
+    return sorted_values[min(index, len(sorted_values) - 1)]
@@ -0,0 +1,93 @@
+"""Debug panel showing live latencies from :mod:`perf`.
+
+Opened and closed with Ctrl+Shift+P. Lists every instrumented hot path
+with its call count, p50/p95/max latency and last row count, refreshed
+twice a second, and can export the samples as a Chrome trace.
+"""
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+
+import perf
+
+# How often the table is refreshed while the panel is open
+REFRESH_INTERVAL_MS = 500
+COLUMNS = ("Calls", "p50 (ms)", "p95 (ms)", "Max (ms)", "Rows")
+
+
+class PerfOverlay(tk.Toplevel):
+    """Small always-on-top window with live instrumentation stats."""
+
+    def __init__(self, parent, on_close=None):
+        super().__init__(parent)
+        self.title("Performance")
+        self.geometry("560x300")
+        self.attributes("-topmost", True)
+        self.on_close = on_close
+        self._refresh_id = None
+
+        self.record_var = tk.BooleanVar(value=perf.is_enabled())
+        controls = ttk.Frame(self, padding="5")
+        controls.pack(fill=tk.X)
+        ttk.Checkbutton(controls, text="Record", variable=self.record_var,
+                        command=self._on_record_toggled).pack(side=tk.LEFT)
+        ttk.Button(controls, text="Clear",
+                   command=self._clear).pack(side=tk.LEFT, padx=5)
+        ttk.Button(controls, text="Export Trace...",
+                   command=self._export_trace).pack(side=tk.LEFT)
+
+        self.tree = ttk.Treeview(self, columns=COLUMNS, show="tree headings")
+        self.tree.heading("#0", text="Path")
+        self.tree.column("#0", width=200, anchor=tk.W)
+        for col_name in COLUMNS:
+            self.tree.heading(col_name, text=col_name)
+            self.tree.column(col_name, width=65, anchor=tk.E)
+        self.tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=(0, 5))
+
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.bind("<Control-P>", lambda e: self.close())
+        self._refresh()
+
+    def close(self):
+        if self._refresh_id is not None:
+            self.after_cancel(self._refresh_id)
+            self._refresh_id = None
+        self.destroy()
+        if self.on_close:
+            self.on_close()
+
+    def _refresh(self):
+        stats = perf.recorder.stats()
+        shown = set(self.tree.get_children())
+        for name in sorted(stats):
+            entry = stats[name]
+            values = (entry["count"], f"{entry['p50_ms']:.2f}",
+                      f"{entry['p95_ms']:.2f}", f"{entry['max_ms']:.2f}",
+                      "" if entry["rows"] is None else entry["rows"])
+            if name in shown:
+                self.tree.item(name, values=values)
+                shown.discard(name)
+            else:
+                self.tree.insert("", tk.END, iid=name, text=name, values=values)
+        if shown:
+            self.tree.delete(*shown)
+        self._refresh_id = self.after(REFRESH_INTERVAL_MS, self._refresh)
+
+    def _on_record_toggled(self):
+        perf.set_enabled(self.record_var.get())
+
+    def _clear(self):
+        perf.recorder.clear()
+
+    def _export_trace(self):
+        filename = filedialog.asksaveasfilename(
+            parent=self,
+            defaultextension=".json",
+            filetypes=[("Chrome trace files", "*.json"), ("All files", "*.*")],
+            title="Export Chrome Trace"
+        )
+        if not filename:
+            return
+        try:
+            perf.recorder.export_chrome_trace(filename)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to export trace:\n{str(e)}", parent=self)
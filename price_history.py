@@ -0,0 +1,245 @@
+"""Append-only history of observed prices, in a local SQLite file.
+
+When a session is saved from the menu, or a saved session is closed, its
+valid rows are appended as price observations (name, store, price,
+quantity, unit and the time). Auto-saves are not recorded: they follow
+pauses in typing, and a half-typed price must never become history. Rows
+are never updated or deleted, and triggers refuse both, so last month's
+price at a store survives the session file being overwritten. A row that hasn't
+changed is recorded again at most once a day. That keeps the file small,
+and every time window still has data for it.
+
+Observations are indexed by (product, store, observed_at), where product
+and store are normalized names (see pricing_engine.product_group_key). A
+time-window query such as the 90-day low reads one contiguous range of
+that index, however many observations the file holds.
+
+The database is only touched on one worker thread, which owns the
+connection. The app submits work with the ``*_async`` methods and polls
+the returned futures.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from lazy_imports import lazy_import
+from pricing_engine import price_products, product_group_key, validate_rows
+
+# Part of the standard library, but optional in some Python builds; loaded
+# on first use, which keeps it out of the app's startup time
+sqlite3 = lazy_import("sqlite3")
+HAS_SQLITE = sqlite3 is not None
+
+logger = logging.getLogger(__name__)
+
+HISTORY_BASENAME = ".unit_cost_calculator_history.sqlite3"
+# Default window of the low and trend shown next to results
+HISTORY_WINDOW_DAYS = 90
+# An unchanged observation is recorded again after this long
+REPEAT_INTERVAL_SECONDS = 24 * 60 * 60
+
+SCHEMA = """
+PRAGMA journal_mode = WAL;
+PRAGMA synchronous = NORMAL;
+CREATE TABLE IF NOT EXISTS observations (
+    product TEXT NOT NULL,
+    store TEXT NOT NULL,
+    observed_at REAL NOT NULL,
+    unit_type TEXT NOT NULL,
+    name TEXT NOT NULL,
+    price REAL NOT NULL,
+    quantity REAL NOT NULL,
+    unit TEXT NOT NULL,
+    price_per_base_unit REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS observations_by_product
+    ON observations (product, store, observed_at);
+CREATE TRIGGER IF NOT EXISTS observations_append_only_update
+    BEFORE UPDATE ON observations
+    BEGIN SELECT RAISE(ABORT, 'price history is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS observations_append_only_delete
+    BEFORE DELETE ON observations
+    BEGIN SELECT RAISE(ABORT, 'price history is append-only'); END;
+"""
+INSERT_OBSERVATION = """
+INSERT INTO observations (product, store, observed_at, unit_type, name,
+                          price, quantity, unit, price_per_base_unit)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+LAST_RECORDED = """
+SELECT MAX(observed_at) FROM observations
+WHERE product = ? AND store = ? AND observed_at >= ?
+  AND unit_type = ? AND price = ? AND quantity = ? AND unit = ?
+"""
+WINDOW_PRICES = """
+SELECT price_per_base_unit FROM observations
+WHERE product = ? AND store = ? AND observed_at >= ? AND unit_type = ?
+ORDER BY observed_at
+"""
+
+
+def history_key(unit_type, name, store):
+    """(unit_type, product, store) key of a product's history"""
+    return unit_type, product_group_key(name), product_group_key(store)
+
+
+@dataclass(frozen=True)
+class PriceStats:
+    """Prices per base unit observed for one product at one store in a window"""
+    low: float
+    first: float  # Oldest observation in the window
+    latest: float
+    count: int
+
+    @property
+    def change(self):
+        """Relative change from the oldest observation to the latest"""
+        return (self.latest - self.first) / self.first if self.first else 0.0
+
+
+class PriceHistory:
+    """The history file and its worker thread.
+
+    Args:
+        path: SQLite file, created on first use (normally next to the
+            config file).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        # One worker owns the connection and keeps work in submission order
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="history")
+        self._connection = None
+        # Worker only: observation -> when it was last recorded
+        self._recent = {}
+        # History keys recorded since the last take_recorded()
+        self._recorded = set()
+        self._recorded_lock = threading.Lock()
+
+    def record(self, unit_type, products, observed_at=None):
+        """Append the valid rows of a saved session.
+
+        Runs on the calling thread; the app uses :meth:`record_async`. Any
+        error is logged: a gap in the history must never fail a save.
+
+        Args:
+            unit_type: The session unit type.
+            products: Product dicts of field strings, as saved (see
+                session_io.write_session).
+            observed_at: Unix time of the observations (defaults to now).
+
+        Returns:
+            The number of observations appended.
+        """
+        if not unit_type:
+            return 0
+        observed_at = time.time() if observed_at is None else observed_at
+        rows = []
+        observations = []
+        try:
+            db = self._db()
+            for product in price_products(validate_rows(products).products, unit_type):
+                key = history_key(unit_type, product["name"], product["store"])
+                observation = key + (product["original_price"],
+                                     product["original_quantity"],
+                                     product["original_unit"])
+                last = self._recent.get(observation)
+                if last is None:
+                    last = self._last_recorded(db, observation, observed_at)
+                if last is not None and observed_at - last < REPEAT_INTERVAL_SECONDS:
+                    continue
+                # Also skips the same row appearing twice in the session
+                self._recent[observation] = observed_at
+                observations.append(observation)
+                rows.append((key[1], key[2], observed_at, unit_type, product["name"],
+                             product["original_price"], product["original_quantity"],
+                             product["original_unit"], product["price_per_base_unit"]))
+            if rows:
+                with db:
+                    db.executemany(INSERT_OBSERVATION, rows)
+        except (sqlite3.Error, OSError) as e:
+            logger.warning("Failed to record price history: %s", e)
+            for observation in observations:
+                self._recent.pop(observation, None)
+            return 0
+        with self._recorded_lock:
+            self._recorded.update(observation[:3] for observation in observations)
+        return len(rows)
+
+    def record_async(self, unit_type, products, observed_at=None):
+        """Like :meth:`record`, on the history worker thread"""
+        return self._executor.submit(self.record, unit_type, products, observed_at)
+
+    def lookup(self, keys, days=HISTORY_WINDOW_DAYS, now=None):
+        """Price statistics of the last ``days`` days.
+
+        Runs on the calling thread; the app uses :meth:`lookup_async`. Any
+        error is logged and ends the lookup early.
+
+        Args:
+            keys: :func:`history_key` tuples.
+            days: Length of the window.
+            now: End of the window as Unix time (defaults to now).
+
+        Returns:
+            A dict of key to PriceStats, or to None when nothing was
+            observed in the window. Keys are missing if the lookup failed.
+        """
+        since = (time.time() if now is None else now) - days * 24 * 60 * 60
+        stats = {}
+        try:
+            db = self._db()
+            for key in keys:
+                unit_type, product, store = key
+                # The index range (product, store, observed_at >= since), in
+                # time order
+                prices = [row[0] for row in db.execute(
+                    WINDOW_PRICES, (product, store, since, unit_type))]
+                stats[key] = (PriceStats(min(prices), prices[0], prices[-1], len(prices))
+                              if prices else None)
+        except (sqlite3.Error, OSError) as e:
+            logger.warning("Failed to read price history: %s", e)
+        return stats
+
+    def lookup_async(self, keys, days=HISTORY_WINDOW_DAYS, now=None):
+        """Like :meth:`lookup`, on the history worker thread"""
+        return self._executor.submit(self.lookup, keys, days, now)
+
+    def barrier(self):
+        """Future that is done once all work submitted so far has finished"""
+        return self._executor.submit(lambda: None)
+
+    def take_recorded(self):
+        """History keys with new observations since the last call"""
+        with self._recorded_lock:
+            keys = self._recorded
+            self._recorded = set()
+        return keys
+
+    def close(self):
+        """Finish pending work and close the file; call on exit"""
+        self._executor.submit(self._close)
+        self._executor.shutdown(wait=True)
+
+    def _db(self):
+        if self._connection is None:
+            connection = sqlite3.connect(self.path)
+            connection.executescript(SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def _close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    @staticmethod
+    def _last_recorded(db, observation, observed_at):
+        """When ``observation`` was last recorded within the repeat interval"""
+        unit_type, product, store, price, quantity, unit = observation
+        return db.execute(LAST_RECORDED, (
+            product, store, observed_at - REPEAT_INTERVAL_SECONDS,
+            unit_type, price, quantity, unit)).fetchone()[0]
@@ -0,0 +1,418 @@
+"""Bulk import of store price lists from CSV or JSON-lines files.
+
+Weekly store dumps have tens of thousands of lines, so a file is streamed
+on a worker thread (see :class:`PriceImport`). Each line is mapped to
+product fields through a column mapping, parsed, and checked against the
+unit tables, IMPORT_CHUNK_SIZE lines at a time. Finished chunks are queued
+for the Tk thread, which only has to append the rows. A line that can't be
+used is recorded as a :class:`RejectedLine` and the import carries on.
+
+Never imports tkinter, so it runs headless too.
+"""
+import csv
+import io
+import json
+import math
+import os
+import queue
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from pricing_engine import parse_number
+from units import UNIT_TYPES, unit_table
+
+# Product fields a file column can be mapped to
+IMPORT_FIELDS = ("name", "store", "price", "quantity", "unit", "url")
+# Fields that must be mapped; the unit may be part of the quantity ("12 oz")
+REQUIRED_FIELDS = ("price", "quantity")
+# Column names recognized for each field when guessing a mapping
+# (compared lowercase, without spaces or punctuation)
+COLUMN_ALIASES = {
+    "name": ("name", "product", "productname", "item", "itemname",
+             "description", "title"),
+    "store": ("store", "storename", "retailer", "shop", "seller"),
+    "price": ("price", "cost", "saleprice", "regularprice"),
+    "quantity": ("quantity", "qty", "size", "packagesize", "netweight",
+                 "weight", "volume", "count"),
+    "unit": ("unit", "units", "uom", "unitofmeasure", "sizeunit"),
+    "url": ("url", "link", "producturl", "href"),
+}
+# Spellings found in store data, by the unit name they stand for
+UNIT_ALIASES = {
+    "g": ("gram", "grams", "gr"),
+    "kg": ("kilogram", "kilograms", "kgs"),
+    "oz": ("ounce", "ounces", "oz."),
+    "lb": ("lbs", "pound", "pounds", "lb."),
+    "ml": ("milliliter", "milliliters", "millilitre", "millilitres", "mls"),
+    "l": ("liter", "liters", "litre", "litres", "ltr"),
+    "fl oz": ("floz", "fl. oz", "fl.oz", "fl oz.", "fluid ounce", "fluid ounces"),
+    "cup": ("cups",),
+    "pint": ("pints", "pt"),
+    "quart": ("quarts", "qt"),
+    "gallon": ("gallons", "gal"),
+    "each": ("ea", "ct", "count", "item", "items", "unit", "units"),
+    "pair": ("pairs", "pr"),
+    "dozen": ("doz", "dz"),
+}
+# File formats by extension; anything else is read as CSV
+IMPORT_FORMATS = {".csv": "csv", ".txt": "csv", ".tsv": "tsv",
+                  ".jsonl": "jsonl", ".ndjson": "jsonl", ".json": "jsonl"}
+# Lines parsed per chunk handed to the Tk thread
+IMPORT_CHUNK_SIZE = 1000
+# Finished chunks waiting for the Tk thread before the worker pauses
+MAX_QUEUED_CHUNKS = 8
+# How long the worker waits for queue space before checking for cancel
+QUEUE_WAIT_SECONDS = 0.1
+
+# A quantity with its unit, e.g. "12 oz" or "1.5L"
+QUANTITY_WITH_UNIT_PATTERN = re.compile(r"^\s*(\d+(?:\.\d*)?|\.\d+)\s*([^\d\s.].*?)\s*$")
+
+
+class ImportFormatError(ValueError):
+    """Raised when a file can't be imported at all (no header, not JSON)"""
+
+
+class _LineRejected(ValueError):
+    """Raised by _LineParser.parse with the reason a line is unusable"""
+
+
+@dataclass(frozen=True)
+class RejectedLine:
+    """A line of the imported file that was left out.
+
+    Attributes:
+        line: 1-based line number in the file.
+        reason: Why it was rejected.
+    """
+    line: int
+    reason: str
+
+
+@dataclass
+class ImportChunk:
+    """Parsed lines handed to the Tk thread.
+
+    Attributes:
+        rows: Product dicts of PRODUCT_FIELDS strings, ready for
+            row_model.ProductRow. Units are the unit table's names.
+        unit_type: The import's unit type (None until a unit decided it).
+        progress: Fraction of the file read so far.
+    """
+    rows: list
+    unit_type: str
+    progress: float
+
+
+def import_format(filename):
+    """"csv", "tsv" or "jsonl", from the file's extension"""
+    return IMPORT_FORMATS.get(os.path.splitext(filename)[1].lower(), "csv")
+
+
+def _open_text(filename):
+    # Undecodable bytes become U+FFFD, so one bad line can't stop the import
+    return open(filename, "r", encoding="utf-8-sig", errors="replace", newline="")
+
+
+def read_columns(filename):
+    """The column names of a file: its CSV header or first JSON object's keys.
+
+    Raises:
+        ImportFormatError: If the file has no header or its first line is
+            not a JSON object.
+        OSError: If the file can't be read.
+    """
+    file_format = import_format(filename)
+    with _open_text(filename) as f:
+        if file_format == "jsonl":
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    raise ImportFormatError(f"The first line is not JSON: {e}") from None
+                if not isinstance(record, dict):
+                    raise ImportFormatError("Each line must be a JSON object.")
+                return list(record)
+            raise ImportFormatError("The file is empty.")
+        delimiter = "\t" if file_format == "tsv" else ","
+        header = next(csv.reader(f, delimiter=delimiter), None)
+        if not header:
+            raise ImportFormatError("The file has no header line.")
+        return [column.strip() for column in header]
+
+
+def _normalize_column(name):
+    return re.sub(r"[^a-z0-9]", "", name.lower())
+
+
+def guess_mapping(columns):
+    """Map each of IMPORT_FIELDS to the column that looks like it (or None)"""
+    normalized = [(_normalize_column(column), column) for column in columns]
+    mapping = {}
+    used = set()
+    for field in IMPORT_FIELDS:
+        mapping[field] = next(
+            (column for key, column in normalized
+             if key in COLUMN_ALIASES[field] and column not in used), None)
+        used.add(mapping[field])
+    return mapping
+
+
+def _normalize_unit(text):
+    return " ".join(text.lower().split())
+
+
+class _LineParser:
+    """Turns mapped records into product field dicts (worker thread).
+
+    Args:
+        mapping: Field name to column name (None or missing: not mapped).
+        unit_type: Unit type every line must use, or None to take it from
+            the first line whose unit is known.
+    """
+
+    def __init__(self, mapping, unit_type=None):
+        self.columns = [(field, mapping.get(field)) for field in IMPORT_FIELDS]
+        self.unit_type = unit_type
+        self._units = {}  # unit type -> {normalized spelling: unit name}
+
+    def _unit_names(self, unit_type):
+        names = self._units.get(unit_type)
+        if names is None:
+            codes = unit_table(unit_type).codes
+            names = {}
+            for canonical, spellings in UNIT_ALIASES.items():
+                code = next((code for code in codes
+                             if _normalize_unit(code) == canonical), None)
+                if code is not None:
+                    names.update(dict.fromkeys(spellings, code))
+            # The table's own names win over aliases (custom units included)
+            names.update((_normalize_unit(code), code) for code in codes)
+            self._units[unit_type] = names
+        return names
+
+    def _resolve_unit(self, text):
+        key = _normalize_unit(text)
+        if self.unit_type is None:
+            unit_type = next((unit_type for unit_type in UNIT_TYPES
+                              if key in self._unit_names(unit_type)), None)
+            if unit_type is None:
+                raise _LineRejected(f"unknown unit '{text}'")
+            self.unit_type = unit_type
+        code = self._unit_names(self.unit_type).get(key)
+        if code is None:
+            raise _LineRejected(f"'{text}' is not a {self.unit_type} unit")
+        return code
+
+    def parse(self, record):
+        """The product fields of one record.
+
+        Raises:
+            _LineRejected: If the line can't be used.
+        """
+        fields = {}
+        for field, column in self.columns:
+            value = record.get(column) if column else None
+            fields[field] = "" if value is None else str(value).strip()
+
+        price_text = fields["price"].lstrip("$").strip()
+        if not price_text:
+            raise _LineRejected("no price")
+        price = parse_number(price_text)
+        if not math.isfinite(price):
+            raise _LineRejected(f"price '{fields['price']}' is not a number")
+        if price < 0:
+            raise _LineRejected("price is negative")
+
+        quantity_text = fields["quantity"]
+        unit_text = fields["unit"]
+        if not quantity_text:
+            raise _LineRejected("no quantity")
+        quantity = parse_number(quantity_text)
+        if math.isnan(quantity) and not unit_text:
+            # Sizes like "12 oz" carry their unit
+            match = QUANTITY_WITH_UNIT_PATTERN.match(quantity_text)
+            if match:
+                quantity_text, unit_text = match.groups()
+                quantity = float(quantity_text)
+        if not math.isfinite(quantity):
+            raise _LineRejected(f"quantity '{fields['quantity']}' is not a number")
+        if quantity <= 0:
+            raise _LineRejected("quantity must be positive")
+        if not unit_text:
+            raise _LineRejected("no unit")
+
+        fields["price"] = price_text
+        fields["quantity"] = quantity_text
+        fields["unit"] = self._resolve_unit(unit_text)
+        fields["unit_type"] = self.unit_type
+        return fields
+
+
+class PriceImport:
+    """Streams a CSV or JSON-lines price file into validated chunks.
+
+    Call :meth:`start` to read the file on a worker thread and collect
+    the chunks on the Tk thread with :meth:`take_chunks`, or iterate
+    :meth:`iter_chunks` to read it on the calling thread. The worker stays
+    at most MAX_QUEUED_CHUNKS ahead of the chunks taken.
+
+    Args:
+        filename: The price file; the format follows its extension.
+        mapping: Field name (IMPORT_FIELDS) to column name, e.g. from
+            :func:`guess_mapping`. Unmapped fields are left empty.
+        unit_type: Session unit type the lines must use, or None to take
+            it from the first line with a known unit.
+        chunk_size: Lines per chunk.
+
+    Raises:
+        ValueError: If a REQUIRED_FIELDS field has no column.
+    """
+
+    def __init__(self, filename, mapping, unit_type=None,
+                 chunk_size=IMPORT_CHUNK_SIZE):
+        missing = [field for field in REQUIRED_FIELDS if not mapping.get(field)]
+        if missing:
+            raise ValueError(f"No column is chosen for {' and '.join(missing)}.")
+        self.filename = filename
+        self.format = import_format(filename)
+        self.chunk_size = chunk_size
+        self.rejected = []  # RejectedLine per unusable line, in file order
+        self.lines_read = 0
+        self.imported = 0  # Rows handed over by take_chunks
+        self._parser = _LineParser(mapping, unit_type)
+        self._chunks = queue.Queue(maxsize=MAX_QUEUED_CHUNKS)
+        self._cancelled = threading.Event()
+        self._future = None
+
+    @property
+    def unit_type(self):
+        return self._parser.unit_type
+
+    @property
+    def done(self):
+        """True once the worker stopped and every chunk has been taken"""
+        return (self._future is not None and self._future.done()
+                and (self._cancelled.is_set() or self._chunks.empty()))
+
+    @property
+    def error(self):
+        """The exception that stopped the worker early, or None"""
+        if self._future is None or not self._future.done():
+            return None
+        return self._future.exception()
+
+    def start(self):
+        """Start reading on a worker thread"""
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="import")
+        self._future = executor.submit(self._run)
+        executor.shutdown(wait=False)  # The thread exits after this import
+
+    def take_chunks(self, limit=None):
+        """Finished chunks, without waiting (at most ``limit``)"""
+        chunks = []
+        while limit is None or len(chunks) < limit:
+            try:
+                chunk = self._chunks.get_nowait()
+            except queue.Empty:
+                break
+            self.imported += len(chunk.rows)
+            chunks.append(chunk)
+        return chunks
+
+    def cancel(self):
+        """Stop reading; chunks not taken yet are dropped"""
+        self._cancelled.set()
+        while True:
+            try:
+                self._chunks.get_nowait()
+            except queue.Empty:
+                break
+
+    def iter_chunks(self):
+        """Read and parse the whole file on the calling thread.
+
+        Yields:
+            An ImportChunk per ``chunk_size`` lines (the last one may be
+            smaller).
+
+        Raises:
+            ImportFormatError: If the file has no header.
+            OSError: If the file can't be read.
+        """
+        with open(self.filename, "rb") as raw:
+            size = os.fstat(raw.fileno()).st_size or 1
+            text = io.TextIOWrapper(raw, encoding="utf-8-sig", errors="replace",
+                                    newline="")
+            rows = []
+            lines = 0
+            for line, record, problem in self._records(text):
+                if self._cancelled.is_set():
+                    return
+                lines += 1
+                if problem is None:
+                    try:
+                        rows.append(self._parser.parse(record))
+                    except _LineRejected as e:
+                        problem = str(e)
+                if problem is not None:
+                    self.rejected.append(RejectedLine(line, problem))
+                if lines == self.chunk_size:
+                    self.lines_read += lines
+                    yield ImportChunk(rows, self.unit_type, min(raw.tell() / size, 1.0))
+                    rows = []
+                    lines = 0
+            self.lines_read += lines
+            yield ImportChunk(rows, self.unit_type, 1.0)
+
+    def _records(self, text):
+        """(line number, record dict, problem) per line; problem is None if readable"""
+        if self.format == "jsonl":
+            for number, line in enumerate(text, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    yield number, None, f"not valid JSON ({e})"
+                    continue
+                if not isinstance(record, dict):
+                    yield number, None, "not a JSON object"
+                    continue
+                yield number, record, None
+            return
+
+        reader = csv.DictReader(text, delimiter="\t" if self.format == "tsv" else ",")
+        if not reader.fieldnames:
+            raise ImportFormatError("The file has no header line.")
+        # Matches the stripped names from read_columns
+        reader.fieldnames = [column.strip() for column in reader.fieldnames]
+        while True:
+            try:
+                record = next(reader)
+            except StopIteration:
+                return
+            except csv.Error as e:
+                yield reader.line_num, None, f"unreadable line ({e})"
+                continue
+            yield reader.line_num, record, None
+
+    def _run(self):
+        for chunk in self.iter_chunks():
+            while not self._cancelled.is_set():
+                try:
+                    self._chunks.put(chunk, timeout=QUEUE_WAIT_SECONDS)
+                    break
+                except queue.Full:
+                    continue
+
+
+def write_rejections(filename, rejected):
+    """Write the rejected lines of an import as a CSV report"""
+    with open(filename, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(("line", "reason"))
+        writer.writerows((rejection.line, rejection.reason) for rejection in rejected)
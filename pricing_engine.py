@@ -0,0 +1,666 @@
+"""Headless, batched pricing engine.
+
+Takes whole columns of products (prices, quantities, unit codes) and
+computes the price per base unit plus every output-unit column in one pass.
+Conversion factors come precompiled from the unit registry (see
+:class:`units.UnitTable`), so each output cell is a single multiply.
+Rankings can optionally be made exact (``exact=True``, see
+:mod:`exact_pricing`).
+There is no tkinter import here, so the same code path serves the GUI,
+scripts and batch jobs. NumPy is used when it is installed; otherwise the
+engine falls back to plain Python lists with identical results.
+"""
+import bisect
+import heapq
+import math
+import re
+from dataclasses import dataclass, replace
+
+from exact_pricing import (AMBIGUOUS_RELATIVE_GAP, ExactPrice, ambiguous_runs,
+                           exact_unit_price, refine_order)
+from lazy_imports import lazy_import
+from units import unit_table
+
+# Use numpy if it is installed, fallback to pure Python if not. It is
+# loaded on first use, which keeps it out of the app's startup time.
+np = lazy_import("numpy")
+HAS_NUMPY = np is not None
+
+# Code used for units that are missing or not valid for the unit type
+UNKNOWN_UNIT_CODE = -1
+# Runs of characters ignored when grouping rows by product name
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+@dataclass(frozen=True)
+class PricingResult:
+    """Column-wise output of :func:`compute_unit_prices`.
+
+    Attributes:
+        unit_type: "Dry", "Liquid" or "Count".
+        price_per_base_unit: Price per gram / ml / item for every input row
+            (NaN for invalid rows).
+        is_valid: Whether each input row could be priced.
+        output_prices: Output column name (e.g. "per oz") to the price per
+            that unit for every input row.
+        order: Indices of the valid rows, best value first. Ties keep their
+            input order (exact ties, with ``exact=True``).
+    """
+    unit_type: str
+    price_per_base_unit: object
+    is_valid: object
+    output_prices: dict
+    order: object
+
+    def __len__(self):
+        return len(self.price_per_base_unit)
+
+
+def unit_names(unit_type):
+    """Return the input unit names for a unit type, indexed by unit code."""
+    return list(unit_table(unit_type).input_units)
+
+
+def encode_units(units, unit_type):
+    """Convert unit names to integer unit codes for :func:`compute_unit_prices`.
+
+    Unknown or empty units become ``UNKNOWN_UNIT_CODE``.
+    """
+    code_by_name = unit_table(unit_type).codes
+    codes = [code_by_name.get(unit, UNKNOWN_UNIT_CODE) for unit in units]
+    if HAS_NUMPY:
+        return np.asarray(codes, dtype=np.intp)
+    return codes
+
+
+def parse_number(text):
+    """Parse a user-entered number, returning NaN when it isn't one."""
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+class ProductInputError(ValueError):
+    """Raised by :func:`read_product` for a row that can't be priced.
+
+    Attributes:
+        has_valid_numbers: True when price and quantity parsed and only the
+            unit is wrong.
+        field: The field to fix ("price", "quantity" or "unit"), if known.
+    """
+
+    def __init__(self, message, has_valid_numbers=False, field=None):
+        super().__init__(message)
+        self.has_valid_numbers = has_valid_numbers
+        self.field = field
+
+
+@dataclass(frozen=True)
+class RowError:
+    """A filled-in row that can't be priced, as found by :func:`validate_rows`.
+
+    Attributes:
+        index: 0-based row position.
+        row_id: The row's row_id (its index if it has none).
+        field: The field to fix: "price", "quantity" or "unit".
+        message: The ProductInputError message.
+        has_valid_numbers: True when price and quantity parsed.
+    """
+    index: int
+    row_id: object
+    field: str
+    message: str
+    has_valid_numbers: bool = False
+
+
+@dataclass
+class ValidationResult:
+    """Output of :func:`validate_rows`.
+
+    Attributes:
+        products: Unpriced product dicts of the valid rows, in row order,
+            each with the row's "row_id".
+        errors: A RowError per invalid row, in row order.
+        has_valid_numbers: True if any row's price and quantity parsed.
+    """
+    products: list
+    errors: list
+    has_valid_numbers: bool
+
+
+def read_product(row, index):
+    """Validate one row of user-entered strings and build its product dict.
+
+    The same rules apply in the GUI and in batch ranking: entirely empty
+    rows are skipped, unnamed rows get a default name, and price, quantity
+    and unit must be usable.
+
+    Args:
+        row: Mapping with the PRODUCT_FIELDS strings ("name", "price", ...),
+            such as a product dict or a row_model.ProductRow.
+        index: 0-based row position, used for default names and messages.
+
+    Returns:
+        The unpriced product dict (ready for :func:`rank_products`), or None
+        for an empty row.
+
+    Raises:
+        ProductInputError: If the row is filled in but invalid.
+    """
+    if isinstance(row, dict):
+        name = row["name"].strip()
+        price_str = row["price"]
+        quantity_str = row["quantity"]
+        unit = row["unit"]
+        unit_type = row["unit_type"]
+        store = row["store"]
+        url = row["url"]
+        price = quantity = None
+    else:
+        # Attribute access is much cheaper than __getitem__ on a ProductRow
+        name = row.name.strip()
+        price_str = row.price
+        quantity_str = row.quantity
+        unit = row.unit
+        unit_type = row.unit_type
+        store = row.store
+        url = row.url
+        # Parsed when the fields were set
+        price = row.price_value
+        quantity = row.quantity_value
+
+    if not name and not price_str and not quantity_str and not unit:  # Skip entirely empty rows silently
+        return None
+
+    if not name:
+        name = f"Product {index+1}"  # Default name
+
+    field = "price"  # The field being checked, for error highlighting
+    try:
+        # Not parsed yet, or not a number: float() raises the usual error
+        if price is None:
+            price = float(price_str)
+        field = "quantity"
+        if quantity is None:
+            quantity = float(quantity_str)
+        # float() accepts "nan" and "inf", which can't be priced
+        if not math.isfinite(price) or not math.isfinite(quantity):
+            field = "price" if not math.isfinite(price) else "quantity"
+            raise ValueError("Price and quantity must be finite numbers.")
+        if price < 0 or quantity <= 0:
+            field = "price" if price < 0 else "quantity"
+            raise ValueError(
+                "Price must be non-negative and quantity must be positive.")
+        field = "unit"
+        if not unit:
+            raise ValueError("Unit must be selected.")
+    except ValueError as e:
+        raise ProductInputError(
+            f"Row {index+1}: Invalid input for price, quantity, or unit.\nDetails: {e}",
+            field=field)
+
+    if unit not in unit_table(unit_type).codes:
+        raise ProductInputError(
+            f"Row {index+1}: Unit '{unit}' is not recognized for type '{unit_type}'.",
+            has_valid_numbers=True, field="unit")
+
+    return {
+        "name": name,
+        "original_price": price,
+        "original_quantity": quantity,
+        "original_unit": unit,
+        "unit_type": unit_type,
+        "store": store,
+        "url": url.strip(),
+    }
+
+
+def validate_row(row, index):
+    """Validate one row without raising.
+
+    Returns:
+        (product, error): the unpriced product dict with the row's
+        "row_id" (None for empty or invalid rows), and a RowError (None
+        unless the row is invalid).
+    """
+    row_id = row.get("row_id", index) if isinstance(row, dict) else row.row_id
+    try:
+        product = read_product(row, index)
+    except ProductInputError as e:
+        return None, RowError(index, row_id, e.field, str(e), e.has_valid_numbers)
+    if product is not None:
+        product["row_id"] = row_id
+    return product, None
+
+
+def validate_rows(rows):
+    """Validate every row in one pass, collecting errors instead of stopping.
+
+    Args:
+        rows: Product dicts or row_model.ProductRow records, in order.
+
+    Returns:
+        A ValidationResult.
+    """
+    products = []
+    errors = []
+    has_valid_numbers = False
+    for index, row in enumerate(rows):
+        product, error = validate_row(row, index)
+        if product is not None:
+            products.append(product)
+            has_valid_numbers = True
+        elif error is not None:
+            errors.append(error)
+            has_valid_numbers = has_valid_numbers or error.has_valid_numbers
+    return ValidationResult(products, errors, has_valid_numbers)
+
+
+def compute_unit_prices(prices, quantities, unit_codes, unit_type, exact=False):
+    """Compute base-unit and output-unit prices for whole columns at once.
+
+    Args:
+        prices: Price of each product.
+        quantities: Package quantity of each product, in its own unit.
+        unit_codes: Unit code of each product (see :func:`encode_units`).
+        unit_type: "Dry", "Liquid" or "Count".
+        exact: Order rows whose float prices are too close to call by their
+            exact values (see :mod:`exact_pricing`).
+
+    Returns:
+        A PricingResult. Rows with a negative price, non-positive quantity
+        or unknown unit are marked invalid and left out of ``order``.
+    """
+    if HAS_NUMPY:
+        result = _compute_numpy(prices, quantities, unit_codes, unit_type)
+    else:
+        result = _compute_python(prices, quantities, unit_codes, unit_type)
+    if exact:
+        result = _refine_exact(result, prices, quantities, unit_codes)
+    return result
+
+
+def rank_products(products, unit_type, exact=False):
+    """Price and rank a list of product dicts in one batched pass.
+
+    Each product needs "original_price", "original_quantity" and
+    "original_unit". The matching ``price_per_base_unit`` and
+    ``unit_prices`` (output column name to price) are filled in.
+
+    Args:
+        exact: Use the exact ranking (see :func:`compute_unit_prices`).
+
+    Returns:
+        The priced products, best value first. Invalid products are dropped.
+    """
+    result = compute_unit_prices(
+        [p["original_price"] for p in products],
+        [p["original_quantity"] for p in products],
+        encode_units([p["original_unit"] for p in products], unit_type),
+        unit_type,
+        exact,
+    )
+    column_items = list(result.output_prices.items())
+    ranked = []
+    for i in result.order:
+        i = int(i)
+        product = products[i]
+        product["price_per_base_unit"] = float(result.price_per_base_unit[i])
+        product["unit_prices"] = {
+            name: float(column[i]) for name, column in column_items}
+        ranked.append(product)
+    return ranked
+
+
+def price_products(products, unit_type):
+    """Price product dicts in one batched pass without ranking them.
+
+    Only ``price_per_base_unit`` is filled in; output-unit prices are left
+    to :func:`fill_unit_prices`, so large sessions don't build a dict per
+    product that will never be shown. Pair with :func:`best_products`.
+
+    Returns:
+        The valid products, in input order.
+    """
+    result = compute_unit_prices(
+        [p["original_price"] for p in products],
+        [p["original_quantity"] for p in products],
+        encode_units([p["original_unit"] for p in products], unit_type),
+        unit_type,
+    )
+    valid = []
+    for product, is_valid, base in zip(
+            products, result.is_valid, result.price_per_base_unit):
+        if is_valid:
+            product["price_per_base_unit"] = float(base)
+            product.pop("unit_prices", None)  # Stale from an earlier pass
+            valid.append(product)
+    return valid
+
+
+def best_products(products, count, start=0, key=None, exact_key=None):
+    """Return ranks ``start`` to ``start + count - 1`` of priced products.
+
+    Uses a bounded heap, so memory and work grow with ``start + count``
+    rather than with the number of products, and nothing else is sorted.
+    Ties keep iteration order, exactly like the full ranking.
+
+    Args:
+        products: Collection of priced product dicts (iterated twice when
+            ``exact_key`` is given).
+        count: Page size.
+        start: Rank of the first product to return (0 is the best).
+        key: Sort key; defaults to ``price_per_base_unit``.
+        exact_key: For the exact ranking, a key starting with the product's
+            :func:`exact_price_key`. The page is picked with ``key`` as
+            usual, then products the cut-off is too close to call for are
+            added and the lot is ordered with this key.
+    """
+    if key is None:
+        key = _price_key
+    limit = start + count
+    best = heapq.nsmallest(limit, products, key=key)
+    if exact_key is not None and best:
+        cutoff = max(product["price_per_base_unit"] for product in best)
+        bound = cutoff * (1 + 2 * AMBIGUOUS_RELATIVE_GAP)
+        chosen = set(map(id, best))
+        best.extend(product for product in products
+                    if cutoff <= product["price_per_base_unit"] <= bound
+                    and id(product) not in chosen)
+        best.sort(key=exact_key)
+    return best[start:limit]
+
+
+def fill_unit_prices(product, unit_type):
+    """Add ``unit_prices`` to a product priced by :func:`price_products`"""
+    if "unit_prices" not in product:
+        table = unit_table(unit_type)
+        base = product["price_per_base_unit"]
+        product["unit_prices"] = dict(zip(
+            table.output_names, [base * factor for factor in table.output_factors]))
+    return product
+
+
+def price_product(product, unit_type):
+    """Price a single product dict in place, like :func:`rank_products`.
+
+    Used for incremental updates, where only one row changed and a batched
+    pass would be wasted work. The arithmetic matches the batched path
+    exactly, so results are interchangeable.
+
+    Returns:
+        True when the product is valid and was priced, False otherwise.
+    """
+    table = unit_table(unit_type)
+    code = table.codes.get(product["original_unit"])
+    price = product["original_price"]
+    quantity = product["original_quantity"]
+    if (code is None or not math.isfinite(price)
+            or not math.isfinite(quantity) or price < 0 or quantity <= 0):
+        return False
+    base = price / (quantity * table.to_base_factors[code])
+    product["price_per_base_unit"] = base
+    product["unit_prices"] = dict(zip(
+        table.output_names, [base * factor for factor in table.output_factors]))
+    return True
+
+
+def exact_price_key(product, unit_type):
+    """ExactPrice sort key of a priced product dict, for the exact ranking"""
+    table = unit_table(unit_type)
+    return ExactPrice(product["price_per_base_unit"], product["original_price"],
+                      product["original_quantity"],
+                      table.exact_factors[table.codes[product["original_unit"]]])
+
+
+class RankedIndex:
+    """Row ids kept in best-value-first order under single-row updates.
+
+    Entries are ``(price_per_base_unit, row_id)`` keys in a sorted list, so
+    placing, moving or removing one row is a binary search instead of a full
+    re-sort. Row ids break ties, which keeps equal prices in the order the
+    rows were added (the same order a stable sort gives). For the exact
+    ranking, pass :func:`exact_price_key` keys instead of float prices.
+    """
+
+    def __init__(self):
+        self._keys = []
+        self._key_by_row = {}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __iter__(self):
+        return (row_id for _, row_id in self._keys)
+
+    def __contains__(self, row_id):
+        return row_id in self._key_by_row
+
+    def set(self, row_id, price_per_base_unit):
+        """Insert a row, or move it to its new rank if already present."""
+        key = (price_per_base_unit, row_id)
+        old_key = self._key_by_row.get(row_id)
+        if old_key == key:
+            return
+        if old_key is not None:
+            del self._keys[bisect.bisect_left(self._keys, old_key)]
+        bisect.insort(self._keys, key)
+        self._key_by_row[row_id] = key
+
+    def discard(self, row_id):
+        """Remove a row if it is ranked."""
+        old_key = self._key_by_row.pop(row_id, None)
+        if old_key is not None:
+            del self._keys[bisect.bisect_left(self._keys, old_key)]
+
+    def clear(self):
+        self._keys.clear()
+        self._key_by_row.clear()
+
+    def reset(self, ranked_items):
+        """Replace the contents with ``(row_id, price_per_base_unit)`` pairs.
+
+        The pairs must already be in ranked order (e.g. the output of
+        :func:`rank_products`), so no sorting is needed.
+        """
+        self._keys = [(price, row_id) for row_id, price in ranked_items]
+        self._key_by_row = {key[1]: key for key in self._keys}
+
+    def rank_of(self, row_id):
+        """Return the 0-based rank of a row (0 is the best value)."""
+        return bisect.bisect_left(self._keys, self._key_by_row[row_id])
+
+
+def product_group_key(name):
+    """Key that puts rows of the same product in one group.
+
+    Case, punctuation and spacing are ignored, so "Rolled Oats",
+    "rolled  oats" and "Rolled-Oats." share a group.
+    """
+    return " ".join(_NON_WORD.sub(" ", name).casefold().split())
+
+
+class ProductGroups:
+    """Ranked rows grouped by product, for the grouped results view.
+
+    A hash index maps each group key (see :func:`product_group_key`) to
+    that product's ``(price_per_base_unit, row_id)`` keys, kept sorted like
+    :class:`RankedIndex` keeps them. Placing, moving or removing a row is a
+    binary search in its own group only, so an edit re-ranks one product
+    instead of the whole session. Groups are kept sorted by key.
+    """
+
+    def __init__(self):
+        self._groups = {}  # group key -> sorted rank keys of its rows
+        self._group_by_row = {}  # row_id -> group key
+        self._key_by_row = {}  # row_id -> rank key
+        self._keys = []  # Group keys, sorted
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __contains__(self, group_key):
+        return group_key in self._groups
+
+    def rows(self, group_key):
+        """Row ids of a group, best value first"""
+        return [row_id for _, row_id in self._groups[group_key]]
+
+    def group_of(self, row_id):
+        """Group key of a ranked row, or None"""
+        return self._group_by_row.get(row_id)
+
+    def position(self, group_key):
+        """0-based position of a group in key order"""
+        return bisect.bisect_left(self._keys, group_key)
+
+    def row_count(self):
+        return len(self._group_by_row)
+
+    def set(self, row_id, group_key, price_per_base_unit):
+        """Insert a row, or move it within or between groups.
+
+        Returns:
+            The row's previous group key (None if it wasn't ranked).
+        """
+        key = (price_per_base_unit, row_id)
+        old_group = self._group_by_row.get(row_id)
+        if old_group is not None:
+            if old_group == group_key and self._key_by_row[row_id] == key:
+                return old_group
+            self._remove(row_id, old_group)
+        keys = self._groups.get(group_key)
+        if keys is None:
+            keys = self._groups[group_key] = []
+            bisect.insort(self._keys, group_key)
+        bisect.insort(keys, key)
+        self._group_by_row[row_id] = group_key
+        self._key_by_row[row_id] = key
+        return old_group
+
+    def discard(self, row_id):
+        """Remove a row if it is ranked; returns its group key or None"""
+        group_key = self._group_by_row.pop(row_id, None)
+        if group_key is not None:
+            self._remove(row_id, group_key)
+            del self._key_by_row[row_id]
+        return group_key
+
+    def _remove(self, row_id, group_key):
+        keys = self._groups[group_key]
+        del keys[bisect.bisect_left(keys, self._key_by_row[row_id])]
+        if not keys:
+            del self._groups[group_key]
+            del self._keys[bisect.bisect_left(self._keys, group_key)]
+
+    def clear(self):
+        self._groups.clear()
+        self._group_by_row.clear()
+        self._key_by_row.clear()
+        self._keys.clear()
+
+    def reset(self, ranked_items):
+        """Replace the contents with ``(row_id, group_key, price_per_base_unit)``.
+
+        The items must already be in ranked order (e.g. the output of
+        :func:`rank_products`). Every group's rows then come out in order
+        too, so the groups are filled in one pass without sorting any of
+        them.
+        """
+        groups = {}
+        group_by_row = {}
+        key_by_row = {}
+        for row_id, group_key, price in ranked_items:
+            key = (price, row_id)
+            keys = groups.get(group_key)
+            if keys is None:
+                groups[group_key] = [key]
+            else:
+                keys.append(key)
+            group_by_row[row_id] = group_key
+            key_by_row[row_id] = key
+        self._groups = groups
+        self._group_by_row = group_by_row
+        self._key_by_row = key_by_row
+        self._keys = sorted(groups)
+
+
+def _price_key(product):
+    return product["price_per_base_unit"]
+
+
+def _refine_exact(result, prices, quantities, unit_codes):
+    """Re-sort the runs of ``result.order`` whose floats are ambiguous"""
+    base = result.price_per_base_unit
+    if HAS_NUMPY:
+        ranked = base[result.order]
+        close = (np.abs(np.diff(ranked))
+                 <= AMBIGUOUS_RELATIVE_GAP * np.maximum(ranked[:-1], ranked[1:]))
+        if not close.any():
+            return result
+        # Runs of close neighbour pairs, as slices of the order
+        edges = np.flatnonzero(np.diff(np.concatenate(([False], close, [False]))))
+        runs = [(int(start), int(stop) + 1) for start, stop in zip(edges[::2], edges[1::2])]
+    else:
+        runs = ambiguous_runs([base[i] for i in result.order])
+        if not runs:
+            return result
+
+    factors = unit_table(result.unit_type).exact_factors
+    order = refine_order(result.order, runs, lambda i: exact_unit_price(
+        prices[i], quantities[i], factors[int(unit_codes[i])]))
+    if HAS_NUMPY:
+        order = np.asarray(order, dtype=np.intp)
+    return replace(result, order=order)
+
+
+def _compute_numpy(prices, quantities, unit_codes, unit_type):
+    table = unit_table(unit_type)
+
+    prices = np.asarray(prices, dtype=np.float64)
+    quantities = np.asarray(quantities, dtype=np.float64)
+    codes = np.asarray(unit_codes, dtype=np.intp)
+
+    to_base = np.asarray(table.to_base_factors, dtype=np.float64)
+    has_unit = (codes >= 0) & (codes < len(to_base))
+    safe_codes = np.where(has_unit, codes, 0)
+
+    with np.errstate(invalid="ignore"):
+        is_valid = (has_unit & np.isfinite(prices) & np.isfinite(quantities)
+                    & (prices >= 0) & (quantities > 0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        base = np.where(is_valid, prices / (quantities * to_base[safe_codes]),
+                        np.nan)
+
+    output_prices = {name: base * factor
+                     for name, factor in zip(table.output_names, table.output_factors)}
+
+    valid_idx = np.flatnonzero(is_valid)
+    order = valid_idx[np.argsort(base[valid_idx], kind="stable")]
+
+    return PricingResult(unit_type, base, is_valid, output_prices, order)
+
+
+def _compute_python(prices, quantities, unit_codes, unit_type):
+    table = unit_table(unit_type)
+    to_base = table.to_base_factors
+
+    base = []
+    is_valid = []
+    for price, quantity, code in zip(prices, quantities, unit_codes):
+        valid = (0 <= code < len(to_base)
+                 and math.isfinite(price) and math.isfinite(quantity)
+                 and price >= 0 and quantity > 0)
+        is_valid.append(valid)
+        base.append(price / (quantity * to_base[code]) if valid else math.nan)
+
+    output_prices = {name: [value * factor for value in base]
+                     for name, factor in zip(table.output_names, table.output_factors)}
+    order = sorted((i for i, valid in enumerate(is_valid) if valid),
+                   key=base.__getitem__)
+
+    return PricingResult(unit_type, base, is_valid, output_prices, order)
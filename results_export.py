@@ -0,0 +1,144 @@
+"""Streaming export of ranked results to CSV, JSON lines or JSON.
+
+Rows are written straight from the pricing engine's numbers, at full
+float precision rather than the rounded strings of the results view. Each
+output-unit price is worked out while its row is written (one multiply,
+as pricing_engine.fill_unit_prices does it), and rows go to disk one at a
+time. Memory use doesn't grow with the output, however many results
+there are.
+
+Never imports tkinter, so it runs headless too.
+"""
+import csv
+import io
+import json
+import os
+import re
+
+from session_io import atomic_write
+from units import base_unit, unit_table
+
+# File formats by extension; anything else is written as CSV
+EXPORT_FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl",
+                  ".json": "json"}
+# Columns before the output-unit prices, and after them
+LEADING_FIELDS = ("rank", "name", "store", "price", "quantity", "unit",
+                  "unit_type", "price_per_base_unit", "base_unit")
+TRAILING_FIELDS = ("url",)
+
+
+def export_format(filename):
+    """"csv", "jsonl" or "json", from the file's extension"""
+    return EXPORT_FORMATS.get(os.path.splitext(filename)[1].lower(), "csv")
+
+
+def price_column(output_name):
+    """Export column of an output unit: "per fl oz" -> "price_per_fl_oz" """
+    return "price_" + re.sub(r"\W+", "_", output_name).strip("_")
+
+
+def export_columns(unit_type):
+    """Every column exported for results of ``unit_type``, in order"""
+    return (LEADING_FIELDS
+            + tuple(price_column(name) for name in unit_table(unit_type).output_names)
+            + TRAILING_FIELDS)
+
+
+def iter_records(products, unit_type):
+    """One export record (a dict keyed by :func:`export_columns`) per product.
+
+    Args:
+        products: Priced product dicts (with "price_per_base_unit"), best
+            first. May be any iterable; it is only read once.
+        unit_type: The session unit type.
+    """
+    table = unit_table(unit_type)
+    unit = base_unit(unit_type)
+    outputs = [(price_column(name), factor)
+               for name, factor in zip(table.output_names, table.output_factors)]
+    for rank, product in enumerate(products, start=1):
+        base = product["price_per_base_unit"]
+        record = {
+            "rank": rank,
+            "name": product["name"],
+            "store": product["store"],
+            "price": product["original_price"],
+            "quantity": product["original_quantity"],
+            "unit": product["original_unit"],
+            "unit_type": unit_type,
+            "price_per_base_unit": base,
+            "base_unit": unit,
+        }
+        for column, factor in outputs:
+            record[column] = base * factor
+        record["url"] = product["url"]
+        yield record
+
+
+def write_results(stream, products, unit_type, output_format="csv"):
+    """Stream ranked products to a text stream.
+
+    Args:
+        stream: Text file object (open CSV files with ``newline=""``).
+        products: Priced product dicts, best first.
+        unit_type: The session unit type.
+        output_format: "csv" (with a header line), "jsonl" or "json" (one
+            array of records, still written a record at a time).
+
+    Returns:
+        The number of products written.
+    """
+    count = 0
+    records = iter_records(products, unit_type)
+    if output_format == "jsonl":
+        for record in records:
+            stream.write(json.dumps(record) + "\n")
+            count += 1
+        return count
+    if output_format == "json":
+        stream.write("[")
+        for record in records:
+            stream.write((",\n" if count else "\n") + json.dumps(record))
+            count += 1
+        stream.write("\n]\n" if count else "]\n")
+        return count
+    writer = csv.DictWriter(stream, fieldnames=export_columns(unit_type),
+                            lineterminator="\n")
+    writer.writeheader()
+    for record in records:
+        writer.writerow(record)
+        count += 1
+    return count
+
+
+def write_results_file(filename, products, unit_type, sort_key=None):
+    """Write ranked products to ``filename`` (format from its extension).
+
+    The file is replaced atomically, so a failed export never leaves half
+    a file behind.
+
+    Args:
+        filename: Output file.
+        products: Priced product dicts, best first unless ``sort_key`` is
+            given.
+        unit_type: The session unit type.
+        sort_key: If given, ``products`` are ranked by it first (on the
+            calling thread, which is the export worker in the app).
+
+    Returns:
+        The number of products written.
+    """
+    if sort_key is not None:
+        products = sorted(products, key=sort_key)
+    count = 0
+
+    def write(f):
+        nonlocal count
+        stream = io.TextIOWrapper(f, encoding="utf-8", newline="")
+        try:
+            count = write_results(stream, products, unit_type, export_format(filename))
+            stream.flush()
+        finally:
+            stream.detach()  # atomic_write still has to sync and close f
+    atomic_write(filename, write)
+    return count
@@ -0,0 +1,77 @@
+"""Plain-Python row model behind the product input grid.
+
+Each product row is a :class:`ProductRow`, a ``__slots__`` record holding
+the strings the user typed. Tk variables only exist for the rows on
+screen (see virtual_grid), so calculation, validation and saving read
+these records directly and never go through Tcl.
+
+Price and quantity are parsed once, when they are set, and kept as
+floats next to their text (``price_value``/``quantity_value``, None when
+the text isn't a number). Validation reuses them instead of parsing the
+strings on every calculation. Always change fields with ``row[field] =
+value`` (or :meth:`ProductRow.set`) so the parsed numbers stay in sync.
+"""
+from session_io import PRODUCT_FIELDS
+
+
+def _to_float(text):
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return None
+
+
+class ProductRow:
+    """One product row; fields can also be read and set as ``row["price"]``.
+
+    Args:
+        row_id: Stable id, in creation order.
+        position: Index of the row in the model (kept up to date by the app).
+        **fields: Initial PRODUCT_FIELDS strings; missing ones are empty.
+    """
+
+    __slots__ = ("row_id", "position", "name", "store", "price", "quantity",
+                 "unit_type", "unit", "url", "price_value", "quantity_value")
+
+    def __init__(self, row_id, position, name="", price="", quantity="",
+                 unit_type="", unit="", store="", url=""):
+        self.row_id = row_id
+        self.position = position
+        self.name = name
+        self.store = store
+        self.price = price
+        self.quantity = quantity
+        self.unit_type = unit_type
+        self.unit = unit
+        self.url = url
+        self.price_value = _to_float(price)
+        self.quantity_value = _to_float(quantity)
+
+    def set(self, field, value):
+        """Change one field, re-parsing price and quantity"""
+        if field not in _SETTABLE:
+            raise KeyError(field)
+        setattr(self, field, value)
+        if field == "price":
+            self.price_value = _to_float(value)
+        elif field == "quantity":
+            self.quantity_value = _to_float(value)
+
+    # Mapping-style access, so code written for row dicts keeps working
+    def __getitem__(self, field):
+        try:
+            return getattr(self, field)
+        except AttributeError:
+            raise KeyError(field) from None
+
+    __setitem__ = set
+
+    def fields(self):
+        """The row's PRODUCT_FIELDS strings as a plain dict (for saving)"""
+        return {field: getattr(self, field) for field in PRODUCT_FIELDS}
+
+    def __repr__(self):
+        return f"ProductRow({self.row_id}, {self.position}, {self.fields()!r})"
+
+
+_SETTABLE = frozenset(PRODUCT_FIELDS) | {"row_id", "position"}
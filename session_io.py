@@ -0,0 +1,219 @@
+"""Reading and writing session files.
+
+No tkinter import here, so sessions can be written from worker threads and
+headless tools. Products are plain dicts of the strings the user entered,
+keyed by ``PRODUCT_FIELDS``. XML is the default format; files ending in
+``.ucsb`` use the compact binary format from :mod:`binary_session`.
+"""
+import os
+import stat
+import tempfile
+# Imported eagerly: sessions are written from worker threads, and a lazy
+# module's first use isn't thread-safe (see lazy_imports.load_now)
+import xml.etree.ElementTree as ET
+
+import perf
+
+# Child elements of <product>, in the order they are written
+PRODUCT_FIELDS = ("name", "price", "quantity",
+                  "unit_type", "unit", "store", "url")
+
+
+class SessionFormatError(ValueError):
+    """Raised when a file is not a session file"""
+
+
+class SessionReader:
+    """Streams a session XML file one product at a time.
+
+    The title and unit type are read on construction. Iterating yields one
+    product dict (keyed by PRODUCT_FIELDS, "" for missing fields) per
+    <product> directly under <products>, clearing each element once read so
+    the whole DOM is never held in memory. Other elements are skipped.
+
+    Raises:
+        SessionFormatError: If the root element is not <session>.
+        xml.etree.ElementTree.ParseError: If the XML is malformed.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.title = None
+        self.unit_type = None
+        self._file = open(filename, "rb")
+        self._size = os.fstat(self._file.fileno()).st_size
+        self._events = ET.iterparse(self._file, events=("start", "end"))
+        self._products_elem = None
+        self._has_products = False
+        try:
+            self._read_header()
+        except BaseException:
+            self.close()
+            raise
+
+    @property
+    def progress(self):
+        """Fraction of the file read so far (0.0 to 1.0)"""
+        if self._file.closed or not self._size:
+            return 1.0
+        return min(1.0, self._file.tell() / self._size)
+
+    def __iter__(self):
+        if not self._has_products:
+            return
+        # Depth below <products>; 0 between its children
+        depth = 0
+        for event, elem in self._events:
+            if event == "start":
+                depth += 1
+                continue
+            depth -= 1
+            if depth < 0:
+                break  # </products>
+            if depth:
+                continue  # Part of a child that hasn't ended yet
+            product = None
+            if elem.tag == "product":
+                product = {field: "" for field in PRODUCT_FIELDS}
+                for child in elem:
+                    if child.tag in product and child.text:
+                        product[child.tag] = child.text
+            # Drop the parsed element so memory stays flat
+            elem.clear()
+            self._products_elem.remove(elem)
+            if product is not None:
+                yield product
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _read_header(self):
+        event, root_elem = next(self._events)
+        if root_elem.tag != "session":
+            raise SessionFormatError("Invalid session file format.")
+        for event, elem in self._events:
+            if event == "start" and elem.tag == "products":
+                self._products_elem = elem
+                self._has_products = True
+                return
+            if event != "end":
+                continue
+            if elem.tag == "title":
+                self.title = elem.text
+            elif elem.tag == "unit_type":
+                self.unit_type = elem.text
+            elif elem.tag == "session":
+                return
+
+
+def build_session_tree(title, unit_type, products):
+    """Build the ElementTree for a session.
+
+    Args:
+        title: Session title.
+        unit_type: one of units.UNIT_TYPES, or None if not chosen yet.
+        products: Iterable of product dicts keyed by PRODUCT_FIELDS.
+    """
+    root_elem = ET.Element("session")
+
+    # Add session title
+    title_elem = ET.SubElement(root_elem, "title")
+    title_elem.text = title
+
+    # Add unit type
+    if unit_type:
+        unit_type_elem = ET.SubElement(root_elem, "unit_type")
+        unit_type_elem.text = unit_type
+
+    # Add products
+    products_elem = ET.SubElement(root_elem, "products")
+    for product in products:
+        product_elem = ET.SubElement(products_elem, "product")
+        for field in PRODUCT_FIELDS:
+            ET.SubElement(product_elem, field).text = product.get(field, "")
+
+    tree = ET.ElementTree(root_elem)
+    ET.indent(tree, space="  ", level=0)  # Pretty formatting
+    return tree
+
+
+def write_session_xml(filename, title, unit_type, products):
+    """Serialize a session and atomically replace ``filename`` with it.
+
+    Safe to call from a worker thread.
+    """
+    tree = build_session_tree(title, unit_type, products)
+    atomic_write(filename, lambda f: tree.write(
+        f, encoding="utf-8", xml_declaration=True))
+
+
+def open_session(filename):
+    """Open a session file for streaming, picking the reader by extension.
+
+    Returns:
+        A SessionReader or binary_session.BinarySessionReader.
+    """
+    # Imported here: binary_session builds on this module
+    from binary_session import BinarySessionReader, is_binary_session_file
+    if is_binary_session_file(filename):
+        return BinarySessionReader(filename)
+    return SessionReader(filename)
+
+
+@perf.instrument("write_session", rows=lambda filename, title, unit_type, products: len(products))
+def write_session(filename, title, unit_type, products):
+    """Write a session in the format chosen by the file extension.
+
+    Safe to call from a worker thread.
+    """
+    from binary_session import is_binary_session_file, write_binary_session
+    if is_binary_session_file(filename):
+        write_binary_session(filename, title, unit_type, products)
+    else:
+        write_session_xml(filename, title, unit_type, products)
+
+
+def convert_session(source, destination):
+    """Convert a session between formats (e.g. XML to ``.ucsb`` and back).
+
+    The conversion is lossless: products keep the exact text entered.
+    """
+    with open_session(source) as reader:
+        products = list(reader)
+        write_session(destination, reader.title, reader.unit_type, products)
+
+
+def atomic_write(filename, write_func):
+    """Write a file through a temp file and rename, so readers (and crashes)
+    never see a half-written file.
+
+    Args:
+        filename: Destination path.
+        write_func: Called with a binary file object to write the contents.
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, tmp_path = tempfile.mkstemp(
+        prefix=f".{os.path.basename(filename)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write_func(f)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates files as 0600; keep the permissions of the file we replace
+        if os.path.exists(filename):
+            os.chmod(tmp_path, stat.S_IMODE(os.stat(filename).st_mode))
+        else:
+            os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, filename)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,181 @@
+"""Pre-parsed snapshot of the last session, kept next to the config file.
+
+Parsing a large session XML is the slowest part of startup. After a
+session is loaded or saved, its rows are also written in the binary
+format (see :mod:`binary_session`), together with a small JSON record of
+the XML file it came from: path, mtime, size and a SHA-256 of the content.
+On the next start the snapshot is used only if the XML still matches that
+record, and only if the snapshot's own hash still matches; otherwise the
+XML is parsed as usual and the snapshot is rewritten afterwards.
+
+Writes happen on a background thread. A fingerprint is always taken right
+after the XML it describes is written or read, so a snapshot can only go
+stale (and be ignored), never be paired with content it doesn't hold.
+"""
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import perf
+from binary_session import (BinarySessionReader, is_binary_session_file,
+                            write_binary_session)
+from session_io import SessionFormatError, atomic_write
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_BASENAME = ".unit_cost_calculator_snapshot"
+SNAPSHOT_VERSION = 1
+# Read size used when hashing files
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(filename):
+    digest = hashlib.sha256()
+    with open(filename, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@perf.instrument("snapshot.fingerprint")
+def source_fingerprint(filename):
+    """Identify the current content of a session file.
+
+    Returns:
+        A dict with source (absolute path), mtime_ns, size and sha256, or
+        None if the file can't be read or changed while it was hashed.
+    """
+    try:
+        before = os.stat(filename)
+        sha256 = file_sha256(filename)
+        after = os.stat(filename)
+    except OSError:
+        return None
+    if (before.st_mtime_ns, before.st_size) != (after.st_mtime_ns, after.st_size):
+        return None
+    return {
+        "source": os.path.abspath(filename),
+        "mtime_ns": after.st_mtime_ns,
+        "size": after.st_size,
+        "sha256": sha256,
+    }
+
+
+def is_snapshot_candidate(filename):
+    """Only XML sessions are snapshotted; binary files already load fast"""
+    return bool(filename) and not is_binary_session_file(filename)
+
+
+class SessionSnapshotCache:
+    """One snapshot slot (the last session) in ``directory``.
+
+    Args:
+        directory: Where the snapshot files live, normally the config
+            file's directory.
+    """
+
+    def __init__(self, directory):
+        base = os.path.join(directory, SNAPSHOT_BASENAME)
+        self.path = base + ".ucsb"
+        self.meta_path = base + ".json"
+        # One worker keeps snapshot writes in submission order
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="snapshot")
+
+    @perf.instrument("snapshot.open")
+    def open(self, filename):
+        """Open the snapshot of ``filename`` if it is still valid.
+
+        Returns:
+            (reader, fingerprint): a BinarySessionReader over the snapshot,
+            or None when there is no usable snapshot, and the file's current
+            fingerprint (None if the file can't be fingerprinted). Pass the
+            fingerprint to :meth:`store_async` after parsing the file.
+        """
+        fingerprint = source_fingerprint(filename)
+        if fingerprint is None:
+            return None, None
+        # A write still queued (e.g. for another tab's session) would
+        # change the snapshot under us; read it once it is complete
+        self._executor.submit(lambda: None).result()
+        meta = self._read_meta()
+        if meta is None or not self._matches(meta, fingerprint):
+            return None, fingerprint
+
+        try:
+            if (os.path.getsize(self.path) != meta.get("snapshot_size")
+                    or file_sha256(self.path) != meta.get("snapshot_sha256")):
+                raise SessionFormatError("Snapshot doesn't match its checksum.")
+            return BinarySessionReader(self.path), fingerprint
+        except (SessionFormatError, OSError) as e:
+            logger.warning("Discarding corrupt session snapshot: %s", e)
+            self.invalidate()
+            return None, fingerprint
+
+    def store(self, fingerprint, title, unit_type, products):
+        """Write the snapshot of the file described by ``fingerprint``.
+
+        ``products`` must be the rows of exactly that content. Any error is
+        logged; a missing snapshot only costs a slower start.
+        """
+        try:
+            write_binary_session(self.path, title, unit_type, products)
+            meta = dict(fingerprint,
+                        version=SNAPSHOT_VERSION,
+                        snapshot_size=os.path.getsize(self.path),
+                        snapshot_sha256=file_sha256(self.path))
+            text = json.dumps(meta, indent=2)
+            atomic_write(self.meta_path, lambda f: f.write(text.encode("utf-8")))
+        except Exception as e:
+            logger.warning("Failed to write session snapshot: %s", e)
+
+    def store_async(self, fingerprint, title, unit_type, products):
+        """Like :meth:`store`, on the snapshot worker thread"""
+        return self._executor.submit(
+            self.store, fingerprint, title, unit_type, products)
+
+    def refresh(self, filename, title, unit_type, products):
+        """Snapshot a session file that was just written with ``products``.
+
+        Call on the thread that wrote the file, straight after writing.
+        """
+        if not is_snapshot_candidate(filename):
+            return
+        fingerprint = source_fingerprint(filename)
+        if fingerprint is not None:
+            self.store_async(fingerprint, title, unit_type, products)
+
+    def invalidate(self):
+        for path in (self.meta_path, self.path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning("Failed to remove session snapshot: %s", e)
+
+    def close(self):
+        """Wait for pending snapshot writes; call on exit"""
+        self._executor.shutdown(wait=True)
+
+    def _read_meta(self):
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable session snapshot record: %s", e)
+            return None
+        return meta if isinstance(meta, dict) else None
+
+    @staticmethod
+    def _matches(meta, fingerprint):
+        return (meta.get("version") == SNAPSHOT_VERSION
+                and os.path.normcase(str(meta.get("source")))
+                == os.path.normcase(fingerprint["source"])
+                and meta.get("mtime_ns") == fingerprint["mtime_ns"]
+                and meta.get("size") == fingerprint["size"]
+                and meta.get("sha256") == fingerprint["sha256"])
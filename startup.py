@@ -0,0 +1,64 @@
+"""Cold-start milestones: time to first frame and time to interactive.
+
+main.py notes when its module started executing and marks two milestones:
+
+- ``first_frame``: the window has been drawn (config, the stall monitor and
+  the last session are only set up after this).
+- ``interactive``: the last session is loaded and its results calculated,
+  or startup found nothing to load.
+
+``python -m benchmarks.startup`` launches the app with
+``UCC_STARTUP_REPORT`` set, reads the report it writes and checks it
+against :data:`STARTUP_BUDGET_MS`.
+"""
+import json
+import logging
+import time
+
+import perf
+
+logger = logging.getLogger(__name__)
+
+# Budget per milestone, in milliseconds from process launch
+STARTUP_BUDGET_MS = {"first_frame": 500, "interactive": 1500}
+# When set, the app writes its milestones to this file and exits once
+# interactive
+REPORT_ENV_VAR = "UCC_STARTUP_REPORT"
+
+
+class StartupTimer:
+    """Records startup milestones once each.
+
+    Args:
+        started_at: ``time.perf_counter()`` value startup is measured from
+            (defaults to now).
+    """
+
+    def __init__(self, started_at=None):
+        now = time.perf_counter()
+        self.started_at = now if started_at is None else started_at
+        # Wall-clock equivalent, so a parent process can add its launch time
+        self.started_at_wall = time.time() - (now - self.started_at)
+        self.milestones = {}  # name -> ms since started_at
+
+    def mark(self, name):
+        """Record milestone ``name`` now; later marks of it are ignored"""
+        if name in self.milestones:
+            return
+        now = time.perf_counter()
+        elapsed_ms = (now - self.started_at) * 1000
+        self.milestones[name] = elapsed_ms
+        if perf.recorder.enabled:
+            duration_ns = int((now - self.started_at) * 1e9)
+            perf.recorder.record(f"startup.{name}",
+                                 time.perf_counter_ns() - duration_ns, duration_ns)
+        logger.info("Startup %s after %.0f ms", name, elapsed_ms)
+
+    def report(self):
+        """Milestones in ms since started_at, and when startup began (epoch s)"""
+        return {"started_at": self.started_at_wall,
+                "milestones_ms": dict(self.milestones)}
+
+    def write_report(self, filename):
+        with open(filename, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
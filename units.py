@@ -0,0 +1,268 @@
+"""Unit conversion tables shared by the GUI, the pricing engine and tools.
+
+This module has no GUI dependencies so it can be imported on headless
+machines.
+
+The built-in tables below are compiled into a :class:`UnitRegistry`, which
+adds user-defined units (the ``custom_units`` config entry) and precomputes,
+per unit type, the conversion factors from every input unit to every output
+column plus the display precision of each column. Pricing then costs one
+multiply per output cell. Use the module functions (``units_to_base``,
+``unit_table``, ...) to read the active registry.
+"""
+import functools
+import logging
+import math
+import re
+
+from exact_pricing import to_scaled_int
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+# Conversion factors to base units
+# Base unit for Dry is gram (g)
+DRY_UNITS_TO_BASE = {
+    "g": 1.0,
+    "oz": 28.3495,
+    "lb": 453.592,
+    "kg": 1000.0,
+}
+# Base unit for Liquid is milliliter (ml)
+LIQUID_UNITS_TO_BASE = {
+    "ml": 1.0,
+    "fl oz": 29.5735,
+    "L": 1000.0,
+    "cup": 236.588,
+    "pint": 473.176,
+    "quart": 946.353,
+    "gallon": 3785.41,
+}
+
+# Units to display in output columns (and their conversion factor from the base unit)
+# For Dry (base: g)
+DRY_OUTPUT_UNITS = {
+    "per g": 1.0,
+    "per oz": DRY_UNITS_TO_BASE["oz"],  # grams per oz
+    "per lb": DRY_UNITS_TO_BASE["lb"],          # grams per lb
+    "per kg": DRY_UNITS_TO_BASE["kg"],          # grams per kg
+}
+# For Liquid (base: ml)
+LIQUID_OUTPUT_UNITS = {
+    "per ml": 1.0,
+    "per fl oz": LIQUID_UNITS_TO_BASE["fl oz"],  # ml per fl oz
+    "per L": LIQUID_UNITS_TO_BASE["L"],              # ml per L
+}
+
+# Count-based products (base: one item); "pack of N" holds N items
+COUNT_PACK_SIZES = (4, 6, 8, 10, 12, 18, 24, 30, 36, 48)
+COUNT_UNITS_TO_BASE = {
+    "each": 1.0,
+    "pair": 2.0,
+    "dozen": 12.0,
+    **{f"pack of {size}": float(size) for size in COUNT_PACK_SIZES},
+}
+COUNT_OUTPUT_UNITS = {
+    "per each": 1.0,
+    "per dozen": 12.0,
+}
+
+# Lookup by session unit type
+UNITS_TO_BASE_BY_TYPE = {
+    "Dry": DRY_UNITS_TO_BASE,
+    "Liquid": LIQUID_UNITS_TO_BASE,
+    "Count": COUNT_UNITS_TO_BASE,
+}
+OUTPUT_UNITS_BY_TYPE = {
+    "Dry": DRY_OUTPUT_UNITS,
+    "Liquid": LIQUID_OUTPUT_UNITS,
+    "Count": COUNT_OUTPUT_UNITS,
+}
+# Unit that price_per_base_unit is expressed in
+BASE_UNIT_BY_TYPE = {
+    "Dry": "g",
+    "Liquid": "ml",
+    "Count": "each",
+}
+# Session unit types, in the order they are offered
+UNIT_TYPES = tuple(UNITS_TO_BASE_BY_TYPE)
+# Decimal places shown for the built-in output columns; other columns get
+# default_precision()
+OUTPUT_PRECISION_BY_TYPE = {
+    "Dry": {"per g": 5, "per oz": 4, "per lb": 2, "per kg": 2},
+    "Liquid": {"per ml": 5, "per fl oz": 4, "per L": 2},
+    "Count": {"per each": 2, "per dozen": 2},
+}
+# A custom "pack of N" count unit needs no factor
+PACK_OF_PATTERN = re.compile(r"^pack of (\d+)$")
+
+
+def default_precision(unit_type, output_factor):
+    """Decimal places for a price per ``output_factor`` base units.
+
+    Small units give small prices, so they get more decimals (per g: 5,
+    per oz: 4, per kg: 2). Count units are whole items and always get 2.
+    """
+    if unit_type == "Count" or output_factor <= 0:
+        return 2
+    return max(2, min(5, 5 - math.floor(math.log10(output_factor))))
+
+
+class UnitTable:
+    """Compiled units of one unit type.
+
+    Attributes:
+        unit_type: "Dry", "Liquid" or "Count".
+        base_unit: Unit that prices per base unit are expressed in.
+        to_base: Input unit name -> base units per input unit.
+        input_units: Input unit names, indexed by unit code.
+        codes: Input unit name -> unit code.
+        outputs: Output column name -> base units per output unit.
+        output_names: Output column names, in display order.
+        output_factors: Factors of ``output_names``, in the same order.
+        precision: Decimal places for each column of ``output_names``.
+        to_base_factors: ``to_base`` by unit code, so the price per base
+            unit is ``price / (quantity * to_base_factors[code])``.
+
+    The price per base unit is divided exactly as above, so equivalent
+    packs (1 kg and 1000 g at the same price) tie. Output columns are then
+    ``base * output_factors[column]``: the conversion matrix is kept in that
+    factored form, so a whole column is priced with one multiply per cell
+    and no per-row lookups.
+    """
+
+    def __init__(self, unit_type, base_unit, to_base, outputs, precision):
+        self.unit_type = unit_type
+        self.base_unit = base_unit
+        self.to_base = dict(to_base)
+        self.input_units = tuple(self.to_base)
+        self.codes = {name: code for code, name in enumerate(self.input_units)}
+        self.outputs = dict(outputs)
+        self.output_names = tuple(self.outputs)
+        self.output_factors = tuple(self.outputs.values())
+        self.precision = tuple(
+            precision.get(name, default_precision(unit_type, factor))
+            for name, factor in self.outputs.items())
+        self.to_base_factors = tuple(self.to_base.values())
+
+    @functools.cached_property
+    def exact_factors(self):
+        """Per unit code, to_base as ``(mantissa, scale)`` for exact ranking"""
+        return tuple(to_scaled_int(factor) for factor in self.to_base.values())
+
+
+class UnitRegistry:
+    """Every unit type's UnitTable, built-in units plus custom ones.
+
+    Args:
+        custom_units: Iterable of dicts with "type" (an existing unit type),
+            "name", "factor" (base units per unit; optional for
+            "pack of N" Count units) and optionally "output" (also add a
+            "per <name>" results column) and "precision". Invalid entries,
+            and names that are already taken, are logged and skipped.
+    """
+
+    def __init__(self, custom_units=()):
+        to_base = {unit_type: dict(table) for unit_type, table in UNITS_TO_BASE_BY_TYPE.items()}
+        outputs = {unit_type: dict(table) for unit_type, table in OUTPUT_UNITS_BY_TYPE.items()}
+        precision = {unit_type: dict(table) for unit_type, table in OUTPUT_PRECISION_BY_TYPE.items()}
+        self.custom_units = list(custom_units or ())
+        for entry in self.custom_units:
+            try:
+                unit_type, name, factor, digits = self._parse_custom_unit(entry)
+                if name in to_base[unit_type]:
+                    raise ValueError(f"'{name}' is already a {unit_type} unit")
+            except ValueError as e:
+                logger.warning("Ignoring custom unit %r: %s", entry, e)
+                continue
+            to_base[unit_type][name] = factor
+            if entry.get("output"):
+                column = f"per {name}"
+                outputs[unit_type][column] = factor
+                if digits is not None:
+                    precision[unit_type][column] = digits
+
+        self.tables = {
+            unit_type: UnitTable(unit_type, BASE_UNIT_BY_TYPE[unit_type],
+                                 to_base[unit_type], outputs[unit_type], precision[unit_type])
+            for unit_type in UNIT_TYPES}
+
+    def table(self, unit_type):
+        """Return the UnitTable of a unit type.
+
+        Anything that isn't a known type is treated as Liquid, matching the
+        way the app has always picked the table.
+        """
+        return self.tables.get(unit_type) or self.tables["Liquid"]
+
+    @staticmethod
+    def _parse_custom_unit(entry):
+        if not isinstance(entry, dict):
+            raise ValueError("expected a mapping")
+        unit_type = entry.get("type")
+        if not isinstance(unit_type, str) or unit_type not in UNITS_TO_BASE_BY_TYPE:
+            raise ValueError(f"unit type must be one of {', '.join(UNIT_TYPES)}")
+        name = str(entry.get("name") or "").strip()
+        if not name:
+            raise ValueError("missing name")
+        factor = entry.get("factor")
+        match = PACK_OF_PATTERN.match(name)
+        if factor is None and unit_type == "Count" and match:
+            factor = int(match.group(1))
+        try:
+            factor = float(factor)
+        except (TypeError, ValueError):
+            raise ValueError("factor must be a number") from None
+        if not math.isfinite(factor) or factor <= 0:
+            raise ValueError("factor must be positive")
+        digits = entry.get("precision")
+        if digits is not None and (not isinstance(digits, int) or not 0 <= digits <= 10):
+            raise ValueError("precision must be a whole number from 0 to 10")
+        return unit_type, name, factor, digits
+
+
+# The registry used by units_to_base() and friends
+_registry = UnitRegistry()
+
+
+def set_custom_units(custom_units):
+    """Rebuild the active registry with user-defined units (from config).
+
+    Anything but a list of entries (see UnitRegistry) is logged and treated
+    as no custom units.
+
+    Returns:
+        The new UnitRegistry (the current one if nothing changed).
+    """
+    global _registry
+    if custom_units is not None and not isinstance(custom_units, (list, tuple)):
+        logger.warning("Ignoring custom_units %r: expected a list of units", custom_units)
+        custom_units = None
+    custom_units = list(custom_units or ())
+    if custom_units != _registry.custom_units:
+        _registry = UnitRegistry(custom_units)
+    return _registry
+
+
+def unit_table(unit_type):
+    """Return the compiled UnitTable for a unit type."""
+    return _registry.table(unit_type)
+
+
+def units_to_base(unit_type):
+    """Return the input-unit conversion table for a unit type.
+
+    Anything that isn't a known type is treated as Liquid, matching the
+    way the app has always picked the table.
+    """
+    return _registry.table(unit_type).to_base
+
+
+def output_units(unit_type):
+    """Return the output-column conversion table for a unit type."""
+    return _registry.table(unit_type).outputs
+
+
+def base_unit(unit_type):
+    """Return the base unit name ("g", "ml" or "each") for a unit type."""
+    return _registry.table(unit_type).base_unit
@@ -0,0 +1,337 @@
+"""Virtualized product input grid.
+
+Only the rows that fit in the window (plus a small buffer) get widgets.
+The widgets are reused as the user scrolls and are bound to the plain row
+records of the app's row model (row_model.ProductRow), so a session with
+thousands of products still has a few dozen widgets and opens in constant
+time.
+"""
+import tkinter as tk
+from tkinter import ttk
+
+from units import UNIT_TYPES, units_to_base
+
+# Extra widget rows beyond what fits, so partly visible rows are covered
+BUFFER_ROWS = 2
+# Height estimate for one input row until a real row has been measured
+DEFAULT_ROW_HEIGHT = 34
+# Row model fields mirrored by each widget row, in the order they are shown
+ROW_FIELDS = ("name", "store", "price", "quantity", "unit_type", "unit", "url")
+# Background of a field that failed validation, and the row number color
+ERROR_BACKGROUND = "#ffd6d6"
+ERROR_FOREGROUND = "#b00020"
+# Not bound to anything yet (None is a valid bound value)
+_UNSET = object()
+
+
+class VirtualRowGrid(ttk.Frame):
+    """Scrollable editor for a list of product rows.
+
+    Args:
+        parent: Parent widget.
+        rows: The row model, a list of records indexable by ROW_FIELDS
+            (ProductRow or dict).
+        store_options: Values for the store combobox.
+        get_unit_type: Returns the session unit type (one of units.UNIT_TYPES, or None).
+        on_field_change: Called as ``on_field_change(row, field)`` after the
+            user edits a field; the row is already updated.
+        on_unit_type_selected: Called with the row index when a unit type
+            is picked.
+        on_remove: Called with the row index when its remove button is used.
+        get_row_error: Optional; returns the validation error of a row
+            (anything with a ``field`` attribute) or None. The field is
+            highlighted inline.
+    """
+
+    def __init__(self, parent, rows, store_options, get_unit_type,
+                 on_field_change, on_unit_type_selected, on_remove,
+                 get_row_error=None, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.rows = rows
+        self.store_options = store_options
+        self.get_unit_type = get_unit_type
+        self.on_field_change = on_field_change
+        self.on_unit_type_selected = on_unit_type_selected
+        self.on_remove = on_remove
+        self.get_row_error = get_row_error or (lambda row: None)
+
+        style = ttk.Style(self)
+        style.configure("Error.TEntry", fieldbackground=ERROR_BACKGROUND)
+        style.map("Error.TCombobox",
+                  fieldbackground=[("readonly", ERROR_BACKGROUND),
+                                   ("disabled", ERROR_BACKGROUND)])
+
+        self.top_index = 0  # Model index shown in the first widget row
+        self.row_height = DEFAULT_ROW_HEIGHT
+        self._slots = []  # Reusable widget rows
+
+        self.body = ttk.Frame(self)
+        self.body.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar = ttk.Scrollbar(
+            self, orient="vertical", command=self.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.body.bind("<Configure>", self._on_configure)
+        self._bind_mousewheel(self.body)
+        self._ensure_slots(1)
+
+    # --- Public API ---
+
+    def set_rows(self, rows):
+        """Show a different row model list"""
+        self.rows = rows
+        self.top_index = 0
+        self.refresh()
+
+    def refresh(self):
+        """Re-bind the widget rows after the model changed"""
+        max_top = max(0, len(self.rows) - self._visible_count())
+        self.top_index = min(self.top_index, max_top)
+        for offset, slot in enumerate(self._slots):
+            index = self.top_index + offset
+            if index < len(self.rows) and offset < self._visible_count() + BUFFER_ROWS:
+                slot.bind_row(index, self.rows[index], len(self.rows))
+                if not slot.is_shown:
+                    slot.frame.pack(fill=tk.X, pady=2)
+                    slot.is_shown = True
+            else:
+                slot.unbind_row()
+                if slot.is_shown:
+                    slot.frame.pack_forget()
+                    slot.is_shown = False
+        self._update_scrollbar()
+
+    def refresh_errors(self):
+        """Update the error highlights of the shown rows (after validation)"""
+        for slot in self._slots:
+            if slot.row is not None:
+                slot.show_error(self.get_row_error(slot.row))
+
+    def refresh_row(self, index):
+        """Re-bind a single row if it is currently shown"""
+        offset = index - self.top_index
+        if 0 <= offset < len(self._slots) and self._slots[offset].index == index:
+            self._slots[offset].bind_row(index, self.rows[index], len(self.rows))
+
+    def scroll_to(self, index):
+        """Scroll so that the row at ``index`` is visible"""
+        visible = self._visible_count()
+        if index < self.top_index:
+            self.top_index = index
+        elif index >= self.top_index + visible:
+            self.top_index = index - visible + 1
+        self.refresh()
+
+    def yview(self, *args):
+        """Scrollbar command: ``moveto fraction`` or ``scroll n units|pages``"""
+        if not args:
+            return
+        if args[0] == "moveto":
+            self.top_index = int(float(args[1]) * len(self.rows))
+        elif args[0] == "scroll":
+            step = int(args[1])
+            if args[2] == "pages":
+                step *= max(1, self._visible_count() - 1)
+            self.top_index += step
+        self.top_index = max(0, self.top_index)
+        self.refresh()
+
+    # --- Internals ---
+
+    def _visible_count(self):
+        height = self.body.winfo_height()
+        if height <= 1:  # Not laid out yet
+            return len(self._slots)
+        return max(1, height // self.row_height)
+
+    def _on_configure(self, event):
+        self._ensure_slots(event.height // self.row_height + BUFFER_ROWS)
+        self.refresh()
+
+    def _ensure_slots(self, count):
+        while len(self._slots) < count:
+            slot = _RowSlot(self)
+            self._slots.append(slot)
+            if len(self._slots) == 1:
+                # Measure a real row so the visible count is accurate
+                self.body.update_idletasks()
+                measured = slot.frame.winfo_reqheight() + 4  # pady=2 each side
+                if measured > 4:
+                    self.row_height = measured
+
+    def _update_scrollbar(self):
+        total = len(self.rows)
+        if total == 0:
+            self.scrollbar.set(0.0, 1.0)
+            return
+        first = self.top_index / total
+        last = min(1.0, (self.top_index + self._visible_count()) / total)
+        self.scrollbar.set(first, last)
+
+    def _bind_mousewheel(self, widget):
+        widget.bind("<MouseWheel>", self._on_mousewheel, add="+")
+        widget.bind("<Button-4>", lambda e: self.yview("scroll", -1, "units"), add="+")
+        widget.bind("<Button-5>", lambda e: self.yview("scroll", 1, "units"), add="+")
+
+    def _on_mousewheel(self, event):
+        self.yview("scroll", -1 if event.delta > 0 else 1, "units")
+
+
+class _RowSlot:
+    """One reusable row of input widgets, bound to at most one model row."""
+
+    def __init__(self, grid):
+        self.grid = grid
+        self.row = None  # Bound model row
+        self.index = None  # Index of the bound row in the model
+        self.is_shown = False
+        self._is_binding = False  # Suppresses write-back while filling vars
+        self._error_field = None  # Field currently highlighted as invalid
+        # Unit table (units_to_base) the unit choices were last set from;
+        # a new table is built only when the units change
+        self._units = _UNSET
+
+        self.frame = ttk.Frame(grid.body, padding="5")
+        self.vars = {field: tk.StringVar() for field in ROW_FIELDS}
+        for field, var in self.vars.items():
+            var.trace_add(
+                "write", lambda *args, f=field: self._on_var_write(f))
+
+        # Row number
+        self.index_label = ttk.Label(self.frame, text="", width=3)
+        self.index_label.pack(side=tk.LEFT, padx=2)
+
+        # Product name
+        ttk.Label(self.frame, text="Product:").pack(side=tk.LEFT, padx=2)
+        self.name_entry = ttk.Entry(
+            self.frame, textvariable=self.vars["name"], width=35)
+        self.name_entry.pack(side=tk.LEFT, padx=2)
+
+        # Select all text in the product field for easy replacement
+        def on_product_focus(event):
+            self.name_entry.select_range(0, 'end')
+            self.name_entry.icursor('end')
+        self.name_entry.bind('<FocusIn>', on_product_focus)
+        self.name_entry.bind(
+            '<Button-1>', lambda e: self.name_entry.after(1, on_product_focus, e))
+
+        # Store selection
+        ttk.Label(self.frame, text="Store:").pack(side=tk.LEFT, padx=2)
+        self.store_combobox = ttk.Combobox(
+            self.frame, textvariable=self.vars["store"],
+            values=grid.store_options, width=8, state='readonly')
+        self.store_combobox.pack(side=tk.LEFT, padx=2)
+
+        # Price
+        ttk.Label(self.frame, text="Price ($):").pack(side=tk.LEFT, padx=2)
+        self.price_entry = ttk.Entry(
+            self.frame, textvariable=self.vars["price"], width=7)
+        self.price_entry.pack(side=tk.LEFT, padx=2)
+
+        # Quantity
+        ttk.Label(self.frame, text="Quantity:").pack(side=tk.LEFT, padx=2)
+        self.quantity_entry = ttk.Entry(
+            self.frame, textvariable=self.vars["quantity"], width=7)
+        self.quantity_entry.pack(side=tk.LEFT, padx=2)
+
+        # Unit Type Combobox
+        ttk.Label(self.frame, text="Type:").pack(side=tk.LEFT, padx=2)
+        self.unit_type_combobox = ttk.Combobox(
+            self.frame, textvariable=self.vars["unit_type"],
+            values=list(UNIT_TYPES), width=6, state='readonly')
+        self.unit_type_combobox.pack(side=tk.LEFT, padx=2)
+        self.unit_type_combobox.bind(
+            "<<ComboboxSelected>>",
+            lambda event: self.index is not None and grid.on_unit_type_selected(self.index))
+
+        # Unit Combobox
+        ttk.Label(self.frame, text="Unit:").pack(side=tk.LEFT, padx=2)
+        self.unit_combobox = ttk.Combobox(
+            self.frame, textvariable=self.vars["unit"], width=12, state=tk.DISABLED)
+        self.unit_combobox.pack(side=tk.LEFT, padx=2)
+
+        # URL field
+        ttk.Label(self.frame, text="URL:").pack(side=tk.LEFT, padx=2)
+        ttk.Entry(self.frame, textvariable=self.vars["url"],
+                  width=30).pack(side=tk.LEFT, padx=2)
+
+        # Remove Button for the row
+        self.remove_button = ttk.Button(
+            self.frame, text="-", width=3,
+            command=lambda: self.index is not None and grid.on_remove(self.index))
+        self.remove_button.pack(side=tk.LEFT, padx=2)
+
+        grid._bind_mousewheel(self.frame)
+        for child in self.frame.winfo_children():
+            grid._bind_mousewheel(child)
+
+        # Widgets highlighted when validation flags their field
+        self._error_widgets = {
+            "price": (self.price_entry, "TEntry"),
+            "quantity": (self.quantity_entry, "TEntry"),
+            "unit": (self.unit_combobox, "TCombobox"),
+        }
+
+    def bind_row(self, index, row, row_count):
+        """Show ``row`` (at model position ``index``) in this widget row"""
+        self.row = row
+        self.index = index
+        self._is_binding = True
+        try:
+            for field, var in self.vars.items():
+                if var.get() != row[field]:
+                    var.set(row[field])
+        finally:
+            self._is_binding = False
+
+        self.index_label.config(text=f"{index+1}.")
+
+        session_unit_type = self.grid.get_unit_type()
+        # The type can only be picked on the first row, before it is locked
+        type_state = 'readonly' if session_unit_type is None and index == 0 else tk.DISABLED
+        if str(self.unit_type_combobox.cget("state")) != type_state:
+            self.unit_type_combobox.config(state=type_state)
+
+        units = units_to_base(session_unit_type) if session_unit_type else None
+        if units is not self._units:
+            self._units = units
+            if units:
+                self.unit_combobox.config(values=list(units), state='readonly')
+            else:
+                self.unit_combobox.config(values=[], state=tk.DISABLED)
+
+        # Only one row left: it can't be removed (use Reset All instead)
+        self.remove_button.config(
+            state=tk.DISABLED if row_count == 1 else tk.NORMAL)
+
+        self.show_error(self.grid.get_row_error(row))
+
+    def show_error(self, error):
+        """Highlight the invalid field of the bound row (None clears it)"""
+        field = getattr(error, "field", None) if error is not None else None
+        if field not in self._error_widgets and error is not None:
+            field = "price"  # Unknown field: flag the row at its first number
+        if field == self._error_field:
+            return
+        if self._error_field is not None:
+            widget, base_style = self._error_widgets[self._error_field]
+            widget.config(style=base_style)
+        if field is not None:
+            widget, base_style = self._error_widgets[field]
+            widget.config(style=f"Error.{base_style}")
+        self.index_label.config(
+            foreground=ERROR_FOREGROUND if field is not None else "")
+        self._error_field = field
+
+    def unbind_row(self):
+        self.row = None
+        self.index = None
+
+    def _on_var_write(self, field):
+        if self._is_binding or self.row is None:
+            return
+        value = self.vars[field].get()
+        if self.row[field] == value:
+            return
+        self.row[field] = value
+        self.grid.on_field_change(self.row, field)
@@ -0,0 +1,103 @@
+"""Open sessions of the tabbed workspace.
+
+Each tab is a :class:`Session`: the rows, file and save state of one
+session, plus its own auto-save stream. Only the active session is bound
+to widgets. The app has a single input grid and results view, which are
+re-bound to another session when the tab changes.
+
+Inactive sessions are kept compact. They drop their calculated results,
+which are recomputed when the tab is shown again, so an open tab costs
+about as much as its row records. A session file load or price import
+pauses while its tab is hidden. Tabs restored from the config are only
+read from disk the first time they are shown.
+"""
+import itertools
+import os
+
+from pricing_engine import ProductGroups, RankedIndex
+
+UNTITLED_TITLE = "Untitled Session"
+
+
+def session_title_for(filename):
+    """Default title of a session file: its name without path and extension"""
+    return os.path.splitext(os.path.basename(filename))[0]
+
+
+def same_file(a, b):
+    """Whether two session paths name the same file"""
+    return (bool(a) and bool(b) and
+            os.path.normcase(os.path.abspath(a)) == os.path.normcase(os.path.abspath(b)))
+
+
+class Session:
+    """Model of one open session (one workspace tab).
+
+    The app reads and writes the active session's fields through its own
+    attributes (``app.input_rows_data`` is ``app.session.rows`` and so on).
+
+    Args:
+        filename: Session file to restore. The file is not read here. The
+            session stays ``pending`` until its tab is first shown.
+    """
+
+    __slots__ = (
+        "unit_type", "title", "filename", "is_saved", "last_save_time",
+        "pending", "loading", "load_reader", "load_products",
+        "load_after_id", "load_is_interactive", "edited_while_loading",
+        "load_fingerprint", "rows", "row_ids", "row_results", "ranking",
+        "groups", "dirty_rows", "results_cache_valid", "row_errors", "auto_saver",
+        "importer", "tab")
+
+    def __init__(self, filename=None):
+        self.unit_type = None  # "Dry", "Liquid" or "Count"
+        self.title = session_title_for(filename) if filename else UNTITLED_TITLE
+        self.filename = filename  # Saved file; enables auto-save
+        # Untitled sessions count as unsaved; restored files are on disk
+        self.is_saved = filename is not None
+        self.last_save_time = None
+        self.pending = filename is not None  # File not read yet
+        self.loading = False  # Prevents auto-save during loading
+        # State of a session file being loaded in chunks
+        self.load_reader = None  # Session reader while a load is running
+        self.load_products = None  # Iterator over the reader's products
+        self.load_after_id = None  # Next chunk; None while paused
+        self.load_is_interactive = False
+        self.edited_while_loading = False
+        self.load_fingerprint = None  # Set when the load should be snapshotted
+        # Row model: one ProductRow record of field strings per product
+        self.rows = []
+        self.row_ids = itertools.count()  # Stable id for each row, in creation order
+        # Cached calculation results, so an edit only recomputes its own row
+        self.row_results = {}  # row_id -> priced product dict
+        self.ranking = RankedIndex()  # row_ids of valid products, best value first
+        self.groups = ProductGroups()  # The same, per product (grouped view)
+        self.dirty_rows = {}  # row_id -> row_data edited since the last calculation
+        self.results_cache_valid = False  # False forces a full calculation
+        # Validation errors of the last calculation, shown inline
+        self.row_errors = {}  # row_id -> pricing_engine.RowError
+        self.auto_saver = None  # autosave.AutoSaveScheduler, set by the app
+        self.importer = None  # price_import.PriceImport while one runs
+        self.tab = None  # Empty page widget standing for this tab
+
+    def has_data(self):
+        """Whether any row has something typed into it"""
+        return any(
+            row_data.name.strip() or row_data.price.strip() or
+            row_data.quantity.strip() or row_data.store.strip() or
+            row_data.url.strip()
+            for row_data in self.rows)
+
+    def tab_text(self):
+        """Label of the session's tab; unsaved changes are marked with *"""
+        unsaved = self.filename and not self.is_saved
+        return f"{self.title} *" if unsaved else self.title
+
+    def release_results(self):
+        """Drop calculated results; called when the tab is hidden"""
+        self.row_results = {}
+        self.ranking = RankedIndex()
+        self.groups = ProductGroups()
+        self.dirty_rows = {}
+        self.results_cache_valid = False
+        self.row_errors = {}